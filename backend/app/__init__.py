@@ -1,6 +1,90 @@
-from flask import Flask
+from flask import Flask, Response, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
+import time
+from app.services import metrics, profiling
+from app.services.service_registry import preload_requested, services
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that records how long each response takes to encode"""
+    
+    @profiling.timed('response.encode')
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context():
+                metrics.SERIALIZATION_SECONDS.observe(time.perf_counter() - start, _endpoint())
+
+def _endpoint() -> str:
+    return request.endpoint or 'unmatched'
+
+def _instrument(app: Flask):
+    """Record wall time, status and payload sizes of every request"""
+    app.json = TimedJSONProvider(app)
+    
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        endpoint = _endpoint()
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.get('request_start', time.perf_counter()), endpoint, request.method)
+        metrics.REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        if request.content_length:
+            metrics.REQUEST_BYTES.inc(endpoint, amount=request.content_length)
+        if not response.is_streamed:
+            metrics.RESPONSE_BYTES.observe(response.calculate_content_length() or 0, endpoint)
+        return response
+
+def _profile(app: Flask):
+    """Report stage timings of requests in a Server-Timing header when PROFILING is on.
+    
+    With profiling off no hooks are added and the timed stages are plain
+    functions. The X-Profile header and /debug/profile need PROFILING_TOKEN.
+    """
+    profiler = app.extensions['profiler'] = profiling.create_profiler()
+    
+    @app.route('/debug/profile', methods=['GET'])
+    def profile_report():
+        """Merged cProfile dumps of sampled requests, when PROFILING is on"""
+        if not profiler.enabled:
+            return {'error': 'Profiling is off'}, 404
+        if not profiler.authorized(request.headers.get(profiling.TOKEN_HEADER)):
+            return {'error': f'Send PROFILING_TOKEN in the {profiling.TOKEN_HEADER} header'}, 403
+        try:
+            report = profiler.report(request.args.get('endpoint'), request.args.get('sort', 'cumulative'),
+                                     int(request.args.get('limit', 40)))
+        except (KeyError, ValueError):
+            return {'error': 'sort must be a pstats sort key and limit an integer'}, 400
+        return Response(report, content_type='text/plain; charset=utf-8')
+    
+    if not profiler.enabled:
+        return
+    
+    @app.before_request
+    def start_profile():
+        header = request.headers.get(profiling.HEADER)
+        if header is not None and not profiler.authorized(request.headers.get(profiling.TOKEN_HEADER)):
+            header = None
+        g.profile = profiler.start(header)
+    
+    @app.after_request
+    def add_server_timing(response):
+        profiled = g.pop('profile', None)
+        if profiled is not None:
+            response.headers['Server-Timing'] = profiler.finish(profiled, _endpoint())
+        return response
+    
+    @app.teardown_request
+    def stop_profile(exc):
+        # Requests that raised never reach after_request
+        profiled = g.pop('profile', None)
+        if profiled is not None:
+            profiler.finish(profiled, _endpoint())
 
 def create_app():
     app = Flask(__name__)
@@ -24,6 +108,15 @@ def create_app():
         app.config['DEBUG'] = True
         CORS(app)  # Allow all origins in development
     
+    _instrument(app)
+    _profile(app)
+    
+    # Services are built on first use; PRELOAD_SERVICES builds the fork-safe ones now,
+    # before gunicorn forks its workers when preload_app is on
+    app.extensions['services'] = services
+    if preload_requested():
+        services.preload()
+    
     # Register blueprints
     from app.routes import shopping_routes, recommendation_routes, voice_routes
     app.register_blueprint(shopping_routes.bp)
@@ -1,50 +1,286 @@
-from dataclasses import dataclass, field, asdict
-from typing import List
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 
-@dataclass
 class ShoppingItem:
-    """Represents a single shopping item"""
-    id: str
-    name: str
-    quantity: int = 1
-    unit: str = "piece"
-    category: str = "uncategorized"
-    price_estimate: float = 0.0
-    added_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    """Represents a single shopping item.
+    
+    Slotted to keep large lists compact. added_at is a POSIX timestamp and
+    is only formatted as ISO 8601 when serialized. key is the catalog
+    spelling a list dedupes on, so "brocoli" and "broccoli" are one item;
+    it defaults to the lowercased name.
+    """
+    
+    __slots__ = ('id', 'name', 'quantity', 'unit', 'category', 'price_estimate', 'added_at', 'key',
+                 '_added_at_iso')
+    
+    def __init__(self, id: str, name: str, quantity: int = 1, unit: str = "piece",
+                 category: str = "uncategorized", price_estimate: float = 0.0,
+                 added_at: Optional[float] = None, key: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.quantity = quantity
+        self.unit = unit
+        self.category = category
+        self.price_estimate = price_estimate
+        self.added_at = time.time() if added_at is None else added_at
+        self.key = key or name.lower()
+        self._added_at_iso = None
+    
+    def __repr__(self):
+        return (f"ShoppingItem(id={self.id!r}, name={self.name!r}, quantity={self.quantity!r}, "
+                f"unit={self.unit!r}, category={self.category!r})")
+    
+    def __eq__(self, other):
+        if not isinstance(other, ShoppingItem):
+            return NotImplemented
+        return ((self.id, self.name, self.quantity, self.unit, self.category, self.price_estimate, self.added_at,
+                 self.key)
+                == (other.id, other.name, other.quantity, other.unit, other.category, other.price_estimate,
+                    other.added_at, other.key))
+    
+    def added_at_iso(self) -> str:
+        """added_at formatted as ISO 8601, cached per timestamp"""
+        cached = self._added_at_iso
+        if cached is None or cached[0] != self.added_at:
+            cached = self._added_at_iso = (self.added_at, datetime.fromtimestamp(self.added_at).isoformat())
+        return cached[1]
+    
+    def copy(self) -> 'ShoppingItem':
+        return ShoppingItem(self.id, self.name, self.quantity, self.unit, self.category,
+                            self.price_estimate, self.added_at, self.key)
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            'id': self.id,
+            'name': self.name,
+            'quantity': self.quantity,
+            'unit': self.unit,
+            'category': self.category,
+            'price_estimate': self.price_estimate,
+            'added_at': self.added_at_iso(),
+        }
 
-@dataclass
 class ShoppingList:
-    """Represents a shopping list"""
-    id: str
-    user_id: str
-    items: List[ShoppingItem] = field(default_factory=list)
-    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
-    
-    def add_item(self, item: ShoppingItem):
-        """Add item to shopping list"""
+    """Represents a shopping list.
+    
+    Items are indexed by id, by key and by category so adds,
+    removes and category reads don't scan the list. The id index doubles as
+    the ordered item store, keeping insertion order for to_dict().
+    
+    Every mutation bumps a monotonically increasing revision. A change log
+    ordered by revision (trimmed to MAX_TOMBSTONES removed items) lets
+    changes_since() return just the items touched after a revision.
+    """
+    
+    MAX_TOMBSTONES = 1000
+    
+    def __init__(self, id: str, user_id: str, items: Optional[List[ShoppingItem]] = None,
+                 created_at: Optional[str] = None):
+        self.id = id
+        self.user_id = user_id
+        self.created_at = created_at or datetime.now().isoformat()
+        self._by_id: Dict[str, ShoppingItem] = {}
+        self._by_key: Dict[str, ShoppingItem] = {}
+        self._by_category: Dict[str, Dict[str, ShoppingItem]] = {}
+        self.revision = 0
+        self._created_revision: Dict[str, int] = {}
+        self._changes: OrderedDict = OrderedDict()  # item id -> revision of last change
+        self._tombstones = 0
+        self._oldest_delta_revision = 0
+        for item in items or []:
+            self.add_item(item)
+    
+    @classmethod
+    def restore(cls, id: str, user_id: str, items: List[ShoppingItem], created_at: str,
+                revision: int) -> 'ShoppingList':
+        """Rebuild a stored list at its stored revision.
+        
+        The restored list has no change log, so deltas must come from the store.
+        """
+        shopping_list = cls(id=id, user_id=user_id, items=items, created_at=created_at)
+        shopping_list._changes.clear()
+        shopping_list._tombstones = 0
+        shopping_list.revision = revision
+        shopping_list._oldest_delta_revision = revision
+        return shopping_list
+    
+    def copy(self) -> 'ShoppingList':
+        """Detached copy of the items at the current revision, without the change log"""
+        items = [item.copy() for item in self._by_id.values()]
+        return ShoppingList.restore(self.id, self.user_id, items, self.created_at, self.revision)
+    
+    @property
+    def items(self) -> List[ShoppingItem]:
+        """Items in insertion order"""
+        return list(self._by_id.values())
+    
+    @items.setter
+    def items(self, items: List[ShoppingItem]):
+        self.clear()
+        for item in items:
+            self.add_item(item)
+    
+    def __len__(self) -> int:
+        # Makes an empty list falsy: check for a missing list with `is None`
+        return len(self._by_id)
+    
+    def add_item(self, item: ShoppingItem) -> ShoppingItem:
+        """Add item to shopping list, returning the stored item"""
         # Check if item already exists
-        existing = next((i for i in self.items if i.name.lower() == item.name.lower()), None)
+        existing = self._by_key.get(item.key)
         if existing:
             existing.quantity += item.quantity
-        else:
-            self.items.append(item)
+            self._record_change(existing.id)
+            return existing
+        
+        self._by_id[item.id] = item
+        self._by_key[item.key] = item
+        self._by_category.setdefault(item.category.lower(), {})[item.id] = item
+        self._record_change(item.id)
+        self._created_revision[item.id] = self.revision
+        return item
     
-    def remove_item(self, item_id: str):
+    def remove_item(self, item_id: str) -> Optional[ShoppingItem]:
         """Remove item from shopping list"""
-        self.items = [i for i in self.items if i.id != item_id]
+        item = self._by_id.pop(item_id, None)
+        if item is None:
+            return None
+        
+        del self._by_key[item.key]
+        category = item.category.lower()
+        in_category = self._by_category[category]
+        del in_category[item_id]
+        if not in_category:
+            del self._by_category[category]
+        
+        del self._created_revision[item_id]
+        self._record_change(item_id)
+        self._tombstones += 1
+        self._trim_changes()
+        return item
+    
+    def clear(self):
+        """Remove every item from the shopping list"""
+        self._by_id.clear()
+        self._by_key.clear()
+        self._by_category.clear()
+        self._created_revision.clear()
+        self._changes.clear()
+        self._tombstones = 0
+        # Removals aren't logged individually, so older revisions need a full resync
+        self.revision += 1
+        self._oldest_delta_revision = self.revision
+    
+    def _record_change(self, item_id: str):
+        self.revision += 1
+        self._changes[item_id] = self.revision
+        self._changes.move_to_end(item_id)
+    
+    def _trim_changes(self):
+        while self._tombstones > self.MAX_TOMBSTONES:
+            item_id, revision = self._changes.popitem(last=False)
+            if item_id not in self._by_id:
+                self._tombstones -= 1
+            self._oldest_delta_revision = revision
+    
+    def changes_since(self, revision: int) -> Optional[Dict]:
+        """Get items added, changed and removed after a revision.
+        
+        Returns None when the revision is too old (or unknown) to build a
+        delta from, in which case the caller should send the full list.
+        """
+        if revision < self._oldest_delta_revision or revision > self.revision:
+            return None
+        
+        added, changed, removed = [], [], []
+        for item_id in reversed(self._changes):
+            if self._changes[item_id] <= revision:
+                break
+            item = self._by_id.get(item_id)
+            if item is None:
+                removed.append(item_id)
+            elif self._created_revision[item_id] > revision:
+                added.append(item.to_dict())
+            else:
+                changed.append(item.to_dict())
+        
+        # The log is walked newest first; report changes in the order they happened
+        added.reverse()
+        changed.reverse()
+        removed.reverse()
+        return {
+            'id': self.id,
+            'revision': self.revision,
+            'since_revision': revision,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+        }
+    
+    def get_item(self, item_id: str) -> Optional[ShoppingItem]:
+        """Get item by id"""
+        return self._by_id.get(item_id)
+    
+    def find_by_name(self, name: str) -> Optional[ShoppingItem]:
+        """Get item by key, which is its lowercased name unless the name was corrected"""
+        return self._by_key.get(name.lower())
     
     def get_by_category(self, category: str) -> List[ShoppingItem]:
         """Get items by category"""
-        return [i for i in self.items if i.category.lower() == category.lower()]
+        return list(self._by_category.get(category.lower(), {}).values())
+    
+    def snapshot(self) -> 'ListSnapshot':
+        """The list as sent in responses, without copying its items or indexes"""
+        return ListSnapshot.build(self.id, self.user_id, self._by_id.values(), self.created_at, self.revision)
     
     def to_dict(self):
         return {
             'id': self.id,
             'user_id': self.user_id,
-            'items': [item.to_dict() for item in self.items],
-            'created_at': self.created_at
+            'items': [item.to_dict() for item in self._by_id.values()],
+            'created_at': self.created_at,
+            'revision': self.revision
         }
+
+class ListSnapshot:
+    """A shopping list serialized at one revision, plus what pricing it needs.
+    
+    Stores build one while they hold the list, so reading a whole list
+    costs one pass over its items instead of a copy with rebuilt indexes.
+    """
+    
+    __slots__ = ('data', 'keys', 'quantities')
+    
+    def __init__(self, data: Dict, keys: List[str], quantities: List[int]):
+        self.data = data
+        self.keys = keys
+        self.quantities = quantities
+    
+    @classmethod
+    def build(cls, id: str, user_id: str, items: Iterable[ShoppingItem], created_at: str,
+              revision: int) -> 'ListSnapshot':
+        items = list(items)
+        return cls(
+            {
+                'id': id,
+                'user_id': user_id,
+                'items': [item.to_dict() for item in items],
+                'created_at': created_at,
+                'revision': revision
+            },
+            [item.key for item in items],
+            [item.quantity for item in items]
+        )
+    
+    @property
+    def revision(self) -> int:
+        return self.data['revision']
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def to_dict(self) -> Dict:
+        """The serialized list itself, not a copy"""
+        return self.data
@@ -0,0 +1,16 @@
+from typing import Optional
+
+# Upper bound on commands accepted by a single batch request
+MAX_BATCH_SIZE = 500
+
+def batch_error(commands) -> Optional[str]:
+    """Return an error message if a request's commands aren't a usable batch"""
+    if not isinstance(commands, list):
+        return 'Commands must be a list of strings'
+    if not commands:
+        return 'Commands are required'
+    if len(commands) > MAX_BATCH_SIZE:
+        return f'At most {MAX_BATCH_SIZE} commands per batch'
+    if not all(isinstance(command, str) for command in commands):
+        return 'Commands must be strings'
+    return None
@@ -1,17 +1,28 @@
 from flask import Blueprint, request, jsonify
-from app.services.recommendation_engine import RecommendationEngine
+from app.services import metrics
+from app.services.service_registry import services
 
 bp = Blueprint('recommendations', __name__, url_prefix='/api/recommendations')
 
-recommendation_engine = RecommendationEngine()
+# Upper bound on recommendations a single request may ask for
+MAX_RECOMMENDATIONS = 50
+
+# Upper bound on items priced by a single bulk request
+MAX_PRICE_ITEMS = 1000
 
 @bp.route('/personalized', methods=['GET'])
 def get_personalized_recommendations():
     """Get personalized recommendations for user"""
     user_id = request.args.get('user_id', 'default_user')
     current_items = request.args.getlist('items')
+    recommendation_engine = services.recommendations
+    k = request.args.get('k', str(recommendation_engine.DEFAULT_RECOMMENDATIONS))
+    
+    if not k.isdigit() or not 1 <= int(k) <= MAX_RECOMMENDATIONS:
+        return jsonify({'error': f'k must be an integer from 1 to {MAX_RECOMMENDATIONS}'}), 400
     
-    recommendations = recommendation_engine.get_recommendations(user_id, current_items)
+    with metrics.RECOMMENDATION_SECONDS.time('personalized'):
+        recommendations = recommendation_engine.get_recommendations(user_id, current_items, int(k))
     
     return jsonify({
         'user_id': user_id,
@@ -28,7 +39,8 @@ def get_alternatives():
     if not item:
         return jsonify({'error': 'Item is required'}), 400
     
-    alternatives = recommendation_engine.get_substitute_products(item)
+    with metrics.RECOMMENDATION_SECONDS.time('alternatives'):
+        alternatives = services.recommendations.get_substitute_products(item)
     
     return jsonify({
         'item': item,
@@ -44,13 +56,37 @@ def get_price_range():
     if not item:
         return jsonify({'error': 'Item is required'}), 400
     
-    price_data = recommendation_engine.get_price_range_by_item(item)
+    price_data = services.recommendations.get_price_range_by_item(item)
     
     return jsonify({
         'item': item,
         'price_range': price_data
     })
 
+@bp.route('/price-ranges', methods=['POST'])
+def get_price_ranges():
+    """Get price ranges for many items at once"""
+    data = request.json
+    items = data.get('items', [])
+    
+    if not items:
+        return jsonify({'error': 'Items are required'}), 400
+    
+    if len(items) > MAX_PRICE_ITEMS:
+        return jsonify({'error': f'At most {MAX_PRICE_ITEMS} items per request'}), 400
+    
+    if not all(isinstance(item, str) for item in items):
+        return jsonify({'error': 'Items must be strings'}), 400
+    
+    price_ranges = services.prices.get_price_ranges(items)
+    
+    return jsonify({
+        'price_ranges': [
+            {'item': item, 'price_range': price_range} for item, price_range in zip(items, price_ranges)
+        ],
+        'count': len(items)
+    })
+
 @bp.route('/record-purchase', methods=['POST'])
 def record_purchase():
     """Record purchase for recommendation tracking"""
@@ -61,17 +97,23 @@ def record_purchase():
     if not items:
         return jsonify({'error': 'Items are required'}), 400
     
-    recommendation_engine.record_purchase(user_id, items)
+    services.recommendations.record_purchase(user_id, items)
     
     return jsonify({
         'success': True,
         'message': 'Purchase recorded'
     })
 
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get recommendation cache counters for this worker"""
+    return jsonify(services.recommendations.cache_stats())
+
 @bp.route('/seasonal', methods=['GET'])
 def get_seasonal():
     """Get seasonal recommendations"""
-    recommendations = recommendation_engine._get_seasonal_recommendations()
+    with metrics.RECOMMENDATION_SECONDS.time('seasonal'):
+        recommendations = services.recommendations._get_seasonal_recommendations()
     
     return jsonify({
         'recommendations': recommendations,
@@ -1,27 +1,186 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+import json
 import uuid
-from app.models.shopping_list import ShoppingList, ShoppingItem
-from app.services.nlp_processor import NLPProcessor
+from typing import Optional
+from app.models.shopping_list import ListSnapshot, ShoppingItem
+from app.services import metrics, profiling
+from app.services.change_feed import streams_supported
+from app.routes.batch import batch_error
+from app.services.service_registry import services
 
 bp = Blueprint('shopping', __name__, url_prefix='/api/shopping')
 
-# In-memory storage (replace with database in production)
-shopping_lists = {}
-nlp = NLPProcessor()
+@profiling.timed('items')
+def _parsed_items(nlp_result: dict) -> list:
+    """Build shopping items from a parsed command, priced at the catalog's average"""
+    price_ranges = services.prices.get_price_ranges(nlp_result['keys'])
+    return [
+        ShoppingItem(
+            id=str(uuid.uuid4()),
+            name=item_name,
+            quantity=nlp_result['quantity'][0],
+            unit=nlp_result['quantity'][1],
+            category=nlp_result['category'] or 'uncategorized',
+            price_estimate=price_range['avg'] if price_range['known'] else 0.0,
+            key=key
+        )
+        for item_name, key, price_range in zip(nlp_result['items'], nlp_result['keys'], price_ranges)
+    ]
+
+def _validate_add_command(nlp_result: dict):
+    """Return an error message if a parsed command can't add items"""
+    if nlp_result['intent'] not in ['ADD', 'UNKNOWN']:
+        return 'Invalid command for adding items'
+    if not nlp_result['items']:
+        return 'No items found in command'
+    return None
+
+def _get_since_revision(options) -> Optional[int]:
+    """Read the optional since_revision field; raises ValueError if malformed"""
+    value = options.get('since_revision')
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def _wants_full_list(options) -> bool:
+    return str(options.get('full', '')).lower() in ('1', 'true', 'yes')
+
+def _wants_totals(options) -> bool:
+    return str(options.get('with_totals', '')).lower() in ('1', 'true', 'yes')
+
+def _list_totals(shopping_list: ListSnapshot) -> dict:
+    """Estimate the cost of a whole list from current catalog prices"""
+    return services.prices.estimate_totals(shopping_list.keys, shopping_list.quantities)
+
+@profiling.timed('list.notify')
+def _list_changed(user_id: str):
+    """Wake the list's open streams; cached recommendations follow the list revision"""
+    services.changes.publish(user_id)
+
+def _full_list(user_id: str) -> ListSnapshot:
+    """Load a user's whole list to send back, recording its size"""
+    shopping_list = services.store.get_snapshot(user_id)
+    metrics.SHOPPING_LIST_ITEMS.observe(len(shopping_list))
+    return shopping_list
+
+@profiling.timed('response.build')
+def _list_state(user_id: str, since_revision: Optional[int], full: bool) -> dict:
+    """Build the shopping list part of a mutation response.
+    
+    Without since_revision the full list is sent, as before. With it only the
+    changes are sent, plus the full list when asked for or when the revision
+    is too old to build a delta from.
+    """
+    state = {'revision': services.store.get_revision(user_id) or 0}
+    if since_revision is not None:
+        changes = services.store.changes_since(user_id, since_revision)
+        if changes is not None:
+            state['changes'] = changes
+        else:
+            full = True
+    else:
+        full = True
+    
+    if full:
+        shopping_list = _full_list(user_id)
+        state['revision'] = shopping_list.revision
+        state['shopping_list'] = shopping_list.to_dict()
+    return state
 
 @bp.route('/list', methods=['GET'])
 def get_shopping_list():
-    """Get user's shopping list"""
+    """Get user's shopping list, or only its changes since a revision.
+    
+    With with_totals=1 the response also carries the list's estimated cost.
+    """
     user_id = request.args.get('user_id', 'default_user')
     
-    if user_id not in shopping_lists:
-        shopping_list = ShoppingList(
-            id=str(uuid.uuid4()),
-            user_id=user_id
-        )
-        shopping_lists[user_id] = shopping_list
+    try:
+        since_revision = _get_since_revision(request.args)
+    except ValueError:
+        return jsonify({'error': 'since_revision must be an integer'}), 400
+    
+    if since_revision is not None and not _wants_full_list(request.args):
+        if since_revision == services.store.get_revision(user_id):
+            return '', 304
+        changes = services.store.changes_since(user_id, since_revision)
+        if changes is not None:
+            if _wants_totals(request.args):
+                changes['totals'] = _list_totals(services.store.get_snapshot(user_id))
+            return jsonify(changes)
+    
+    shopping_list = _full_list(user_id)
+    response = shopping_list.to_dict()
+    if _wants_totals(request.args):
+        response['totals'] = _list_totals(shopping_list)
+    return jsonify(response)
+
+def _event(event: str, data: dict, revision: int) -> str:
+    """Format one server-sent event"""
+    metrics.SHOPPING_STREAM_EVENTS.inc(event)
+    return f"event: {event}\nid: {revision}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def _list_events(user_id: str, revision: Optional[int]):
+    """Yield list changes as server-sent events until the client goes away.
+    
+    Starts with a snapshot of the whole list unless the client already has
+    a revision the store can build a delta from. After that every change
+    is sent as add, update and remove events of single items, or as a new
+    snapshot when the list was cleared or the client fell too far behind.
+    """
+    changes = services.changes
+    subscription = changes.subscribe(user_id)
+    try:
+        changed = True
+        while True:
+            current = services.store.get_revision(user_id) or 0
+            if revision is None or current != revision:
+                delta = services.store.changes_since(user_id, revision) if revision is not None else None
+                if delta is None:
+                    shopping_list = _full_list(user_id)
+                    revision = shopping_list.revision
+                    yield _event('snapshot', shopping_list.to_dict(), revision)
+                else:
+                    revision = delta['revision']
+                    for item in delta['added']:
+                        yield _event('add', item, revision)
+                    for item in delta['changed']:
+                        yield _event('update', item, revision)
+                    for item_id in delta['removed']:
+                        yield _event('remove', {'id': item_id}, revision)
+            elif not changed:
+                # Keeps proxies from timing out the connection and finds closed ones
+                yield ': keepalive\n\n'
+            changed = subscription.wait(changes.keepalive)
+    finally:
+        changes.unsubscribe(subscription)
+
+@bp.route('/stream', methods=['GET'])
+def stream_shopping_list():
+    """Push changes to a user's list as server-sent events.
+    
+    Resumes after since_revision, or the Last-Event-ID header an
+    EventSource sends when it reconnects. Each open stream would hold a
+    sync or gthread worker, so those get a 503 and clients load /list
+    instead; serve streams with gevent workers.
+    """
+    if not streams_supported(request.environ):
+        return jsonify({'error': 'List streams need gevent workers; use /list'}), 503
+    
+    user_id = request.args.get('user_id', 'default_user')
+    
+    try:
+        since_revision = _get_since_revision(request.args)
+        if since_revision is None:
+            since_revision = _get_since_revision({'since_revision': request.headers.get('Last-Event-ID')})
+    except ValueError:
+        return jsonify({'error': 'since_revision must be an integer'}), 400
     
-    return jsonify(shopping_lists[user_id].to_dict())
+    return Response(_list_events(user_id, since_revision), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop nginx from buffering events
+        'X-Accel-Buffering': 'no',
+    })
 
 @bp.route('/add', methods=['POST'])
 def add_item():
@@ -33,40 +192,70 @@ def add_item():
     if not command:
         return jsonify({'error': 'Command is required'}), 400
     
-    # Process natural language command
-    nlp_result = nlp.process_command(command)
+    try:
+        since_revision = _get_since_revision(data)
+    except ValueError:
+        return jsonify({'error': 'since_revision must be an integer'}), 400
     
-    if nlp_result['intent'] not in ['ADD', 'UNKNOWN']:
-        return jsonify({'error': 'Invalid command for adding items'}), 400
+    # Process natural language command, finishing its parse session if it was spoken
+    if data.get('parse_session'):
+        nlp_result = services.parse_sessions.finish(data['parse_session'], command, data.get('language'))
+    else:
+        nlp_result = services.nlp.process_command(command, data.get('language'))
     
-    if not nlp_result['items']:
-        return jsonify({'error': 'No items found in command'}), 400
-    
-    # Create shopping list if doesn't exist
-    if user_id not in shopping_lists:
-        shopping_lists[user_id] = ShoppingList(
-            id=str(uuid.uuid4()),
-            user_id=user_id
-        )
+    error = _validate_add_command(nlp_result)
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Add items to shopping list
-    added_items = []
-    for item_name in nlp_result['items']:
-        item = ShoppingItem(
-            id=str(uuid.uuid4()),
-            name=item_name,
-            quantity=nlp_result['quantity'][0],
-            unit=nlp_result['quantity'][1],
-            category=nlp_result['category'] or 'uncategorized'
-        )
-        shopping_lists[user_id].add_item(item)
-        added_items.append(item.to_dict())
+    # Add items to shopping list, creating it if it doesn't exist
+    items = _parsed_items(nlp_result)
+    services.store.add_items(user_id, items)
+    _list_changed(user_id)
     
     return jsonify({
         'success': True,
-        'message': f'Added {len(added_items)} item(s)',
-        'items': added_items,
-        'shopping_list': shopping_lists[user_id].to_dict()
+        'message': f'Added {len(items)} item(s)',
+        'items': [item.to_dict() for item in items],
+        **_list_state(user_id, since_revision, _wants_full_list(data))
+    })
+
+@bp.route('/add-batch', methods=['POST'])
+def add_items_batch():
+    """Add items from a batch of queued voice commands"""
+    data = request.json
+    user_id = data.get('user_id', 'default_user')
+    commands = data.get('commands', [])
+    
+    error = batch_error(commands)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        since_revision = _get_since_revision(data)
+    except ValueError:
+        return jsonify({'error': 'since_revision must be an integer'}), 400
+    
+    results = []
+    batch_items = []
+    for command, nlp_result in zip(commands, services.nlp.process_commands(commands, data.get('language'))):
+        error = _validate_add_command(nlp_result)
+        if error:
+            results.append({'command': command, 'success': False, 'error': error})
+            continue
+        items = _parsed_items(nlp_result)
+        batch_items.extend(items)
+        results.append({'command': command, 'success': True, 'items': [item.to_dict() for item in items]})
+    
+    # Apply every command to the list in one store call
+    if batch_items:
+        services.store.add_items(user_id, batch_items)
+        _list_changed(user_id)
+    
+    return jsonify({
+        'success': bool(batch_items),
+        'message': f'Added {len(batch_items)} item(s)',
+        'results': results,
+        **_list_state(user_id, since_revision, _wants_full_list(data))
     })
 
 @bp.route('/remove', methods=['POST'])
@@ -79,15 +268,19 @@ def remove_item():
     if not item_id:
         return jsonify({'error': 'Item ID is required'}), 400
     
-    if user_id not in shopping_lists:
-        return jsonify({'error': 'User has no shopping list'}), 404
+    try:
+        since_revision = _get_since_revision(data)
+    except ValueError:
+        return jsonify({'error': 'since_revision must be an integer'}), 400
     
-    shopping_lists[user_id].remove_item(item_id)
+    if services.store.remove_item(user_id, item_id) is None:
+        return jsonify({'error': 'User has no shopping list'}), 404
+    _list_changed(user_id)
     
     return jsonify({
         'success': True,
         'message': 'Item removed',
-        'shopping_list': shopping_lists[user_id].to_dict()
+        **_list_state(user_id, since_revision, _wants_full_list(data))
     })
 
 @bp.route('/clear', methods=['POST'])
@@ -96,12 +289,13 @@ def clear_list():
     data = request.json
     user_id = data.get('user_id', 'default_user')
     
-    if user_id in shopping_lists:
-        shopping_lists[user_id].items = []
+    revision = services.store.clear(user_id)
+    _list_changed(user_id)
     
     return jsonify({
         'success': True,
-        'message': 'Shopping list cleared'
+        'message': 'Shopping list cleared',
+        'revision': revision
     })
 
 @bp.route('/category/<category>', methods=['GET'])
@@ -109,10 +303,10 @@ def get_by_category(category):
     """Get items by category"""
     user_id = request.args.get('user_id', 'default_user')
     
-    if user_id not in shopping_lists:
-        return jsonify({'items': []})
+    items = services.store.get_by_category(user_id, category)
     
-    items = shopping_lists[user_id].get_by_category(category)
+    if items is None:
+        return jsonify({'items': []})
     
     return jsonify({
         'category': category,
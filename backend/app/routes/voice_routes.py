@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify
-from app.services.nlp_processor import NLPProcessor
+from app.services.audio_pool import AudioPoolBusy
+from app.routes.batch import batch_error
+from app.services.service_registry import services
+from app.services.voice_processor import AudioTooLarge
 
 bp = Blueprint('voice', __name__, url_prefix='/api/voice')
 
-nlp = NLPProcessor()
-
 @bp.route('/process-command', methods=['POST'])
 def process_command():
     """Process voice command"""
@@ -15,7 +16,7 @@ def process_command():
     if not command:
         return jsonify({'error': 'Command is required'}), 400
     
-    result = nlp.process_command(command)
+    result = services.nlp.process_command(command, language)
     
     return jsonify({
         'command': command,
@@ -23,17 +24,95 @@ def process_command():
         'processed': result
     })
 
+@bp.route('/parse-partial', methods=['POST'])
+def parse_partial():
+    """Parse an interim transcript of an utterance that is still being spoken.
+    
+    Send the growing transcript with the session_id of the previous
+    response; only the words that changed are parsed again. The result is
+    speculative until final is set, which closes the session. Or pass the
+    session as parse_session to /api/shopping/add with the final command.
+    """
+    data = request.json
+    transcript = data.get('transcript', '')
+    language = data.get('language', 'en')
+    session_id = data.get('session_id')
+    
+    if not transcript:
+        return jsonify({'error': 'Transcript is required'}), 400
+    
+    if data.get('final'):
+        result = services.parse_sessions.finish(session_id, transcript, language)
+    else:
+        session_id, result = services.parse_sessions.update(session_id, transcript, language)
+    
+    return jsonify({
+        'session_id': session_id,
+        'transcript': transcript,
+        'language': language,
+        'speculative': not data.get('final'),
+        'processed': result
+    })
+
+@bp.route('/stream-audio', methods=['POST'])
+def stream_audio():
+    """Transcribe a raw (optionally chunked) audio body and process the command"""
+    language = request.args.get('language', 'en')
+    
+    try:
+        result = services.voice.process_audio_stream(request.stream, language)
+    except AudioTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except AudioPoolBusy as e:
+        return jsonify({'error': str(e)}), 503
+    
+    transcript = result['transcript']
+    if not transcript:
+        return jsonify({'error': 'No speech recognized', 'bytes': result['bytes']}), 422
+    
+    return jsonify({
+        'command': transcript,
+        'language': language,
+        'bytes': result['bytes'],
+        'processed': services.nlp.process_command(transcript, language)
+    })
+
+@bp.route('/process-batch', methods=['POST'])
+def process_batch():
+    """Process a batch of queued voice commands in one request"""
+    data = request.json
+    commands = data.get('commands', [])
+    language = data.get('language', 'en')
+    
+    error = batch_error(commands)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    results = services.nlp.process_commands(commands, language)
+    
+    return jsonify({
+        'language': language,
+        'results': [
+            {'command': command, 'processed': result}
+            for command, result in zip(commands, results)
+        ],
+        'count': len(results)
+    })
+
 @bp.route('/extract-items', methods=['POST'])
 def extract_items():
     """Extract items from natural language"""
     data = request.json
     text = data.get('text', '')
+    language = data.get('language', 'en')
     
     if not text:
         return jsonify({'error': 'Text is required'}), 400
     
-    items = nlp._extract_items(text)
-    categories = [nlp._categorize_item(item) for item in items]
+    nlp = services.nlp
+    pack = nlp.language_pack(language)
+    items = nlp._extract_items(text, language)
+    categories = [nlp._categorize_item(item, pack) for item in items]
     
     return jsonify({
         'text': text,
@@ -46,11 +125,12 @@ def extract_items():
 def get_alternatives():
     """Get alternative products"""
     item = request.args.get('item', '')
+    language = request.args.get('language', 'en')
     
     if not item:
         return jsonify({'error': 'Item is required'}), 400
     
-    alternatives = nlp.find_alternatives(item)
+    alternatives = services.nlp.find_alternatives(item, language)
     
     return jsonify({
         'item': item,
@@ -58,6 +138,11 @@ def get_alternatives():
         'count': len(alternatives)
     })
 
+@bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get parsed command cache counters for this worker"""
+    return jsonify(services.nlp.cache_stats())
+
 @bp.route('/supported-languages', methods=['GET'])
 def get_supported_languages():
     """Get supported languages"""
@@ -0,0 +1,68 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+class AudioPoolBusy(Exception):
+    """Raised when the pool's queue stays full for longer than the wait"""
+
+def gevent_patched() -> bool:
+    """Whether gevent has monkey-patched threading, as gunicorn's gevent workers do"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+class AudioPool:
+    """Bounded pool for speech recognition work.
+    
+    Recognizer calls run on a fixed set of native threads so CPU-heavy or
+    blocking recognition never stalls the worker's event loop, and at most
+    max_pending calls are queued or running at once. Under gevent workers the
+    pool is gevent's native threadpool, so waiting for a result yields to
+    other greenlets instead of blocking them.
+    """
+    
+    def __init__(self, workers: int = 4, max_pending: int = 64, wait: float = 5.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        # Created lazily so the pool's threads start in the worker, not the gunicorn master
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if gevent_patched():
+                        from gevent.threadpool import ThreadPoolExecutor as GeventExecutor
+                        self._executor = GeventExecutor(self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='audio')
+        return self._executor
+    
+    def run(self, fn: Callable, *args):
+        """Run fn(*args) on a pool thread and wait for its result"""
+        if not self._slots.acquire(timeout=self.wait):
+            raise AudioPoolBusy(f'{self.max_pending} audio calls already pending')
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+    
+    def shutdown(self):
+        """Stop the pool threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+def create_audio_pool() -> AudioPool:
+    """Build the pool sized by AUDIO_POOL_WORKERS, AUDIO_POOL_PENDING and AUDIO_POOL_WAIT"""
+    return AudioPool(
+        workers=int(os.environ.get('AUDIO_POOL_WORKERS', 4)),
+        max_pending=int(os.environ.get('AUDIO_POOL_PENDING', 64)),
+        wait=float(os.environ.get('AUDIO_POOL_WAIT', 5.0)),
+    )
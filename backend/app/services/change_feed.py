@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Dict, Set
+
+from app.services.audio_pool import gevent_patched
+
+class Subscription:
+    """One stream's interest in a user's list"""
+    
+    __slots__ = ('user_id', '_changed')
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._changed = threading.Event()
+    
+    def notify(self):
+        self._changed.set()
+    
+    def wait(self, timeout: float) -> bool:
+        """Wait for the list to change; False if timeout passed first"""
+        changed = self._changed.wait(timeout)
+        # Clear before the caller reads the store, so a change published
+        # while it reads wakes the next wait instead of being lost
+        self._changed.clear()
+        return changed
+
+class ChangeFeed:
+    """In-process fan-out of shopping list changes to open streams.
+    
+    Publishing only wakes the user's subscribers; each one then reads the
+    items changed since the revision it last sent from the store. A
+    subscriber is a dict entry and an event, with no queue of its own, so
+    idle streams cost almost nothing and a slow client gets one coalesced
+    delta rather than a backlog. Changes made by other worker processes
+    aren't published here; streams see those when they wake up every
+    keepalive seconds.
+    """
+    
+    def __init__(self, keepalive: float = 15.0):
+        self.keepalive = keepalive
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+    
+    def publish(self, user_id: str):
+        """Wake every stream of the user's list"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.notify()
+    
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+def streams_supported(environ: dict) -> bool:
+    """Whether the server handling a request can hold list streams open.
+    
+    gunicorn's sync and gthread workers give each open stream a whole
+    worker or thread, so a handful of browser tabs would take every one;
+    gevent workers, and servers with a thread per connection like the
+    development server, can hold many.
+    """
+    return not environ.get('SERVER_SOFTWARE', '').startswith('gunicorn/') or gevent_patched()
+
+def create_change_feed() -> ChangeFeed:
+    """Build the feed, waking idle streams every SHOPPING_STREAM_KEEPALIVE seconds"""
+    return ChangeFeed(float(os.environ.get('SHOPPING_STREAM_KEEPALIVE', 15)))
@@ -0,0 +1,249 @@
+import heapq
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.purchase_history import PurchaseHistory
+
+class CoPurchaseModel:
+    """Item co-occurrence counts mined from purchase baskets.
+    
+    Counts are kept as a sparse item -> {item: count} map and updated in
+    O(basket^2) per purchase. Pairs are ranked by lift (or PMI) among those
+    seen at least min_support times. Each item's best RANKED_DEPTH
+    neighbours are ranked when counts are written, and again once the
+    item's count has grown by RERANK_RATIO, so a top-k query is always a
+    dict lookup and a slice, however popular the item.
+    
+    sync() counts the baskets a purchase history recorded since the last
+    sync, so workers reading one shared log end up with the same counts.
+    Writers hold a lock; readers take none, since they only look up single
+    keys and read ranked lists that are replaced, never changed.
+    """
+    
+    SCORING = ('lift', 'pmi')
+    RANKED_DEPTH = 50
+    RERANK_RATIO = 0.01
+    
+    def __init__(self, min_support: int = 2, scoring: str = 'lift'):
+        if scoring not in self.SCORING:
+            raise ValueError(f"Unknown scoring: {scoring}")
+        self.min_support = min_support
+        self.scoring = scoring
+        self.baskets = 0
+        # Position in the purchase history the counts cover, see PurchaseHistory.baskets_since
+        self.cursor = 0
+        self.item_counts: Dict[str, int] = {}
+        self.pair_counts: Dict[str, Dict[str, int]] = {}
+        # item -> others seen with it at least min_support times, the only ones ranking looks at
+        self._supported: Dict[str, set] = {}
+        # item -> best (score, other) pairs, and the item's count when they were ranked
+        self._ranked: Dict[str, List[Tuple[float, str]]] = {}
+        self._ranked_at: Dict[str, int] = {}
+        self._writing = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.item_counts)
+    
+    def add_basket(self, items: Iterable[str]):
+        """Count one purchase basket"""
+        with self._writing:
+            self._rerank(self._count(items))
+    
+    def sync(self, history: PurchaseHistory):
+        """Count every basket recorded in history since the last sync"""
+        # Only ever tried, never waited on: a thread already syncing brings in the same baskets
+        if not self._writing.acquire(blocking=False):
+            return
+        try:
+            touched = set()
+            for cursor, basket in history.baskets_since(self.cursor):
+                touched |= self._count(basket)
+                self.cursor = cursor
+            self._rerank(touched)
+        finally:
+            self._writing.release()
+    
+    def _count(self, items: Iterable[str]) -> set:
+        basket = {item.lower() for item in items}
+        if not basket:
+            return basket
+        
+        self.baskets += 1
+        min_support = self.min_support
+        for item in basket:
+            self.item_counts[item] = self.item_counts.get(item, 0) + 1
+            row = self.pair_counts.setdefault(item, {})
+            for other in basket:
+                if other != item:
+                    together = row[other] = row.get(other, 0) + 1
+                    if together == min_support:
+                        self._supported.setdefault(item, set()).add(other)
+        return basket
+    
+    def _rerank(self, items: Iterable[str]):
+        """Rank the items whose count grew by RERANK_RATIO since they were last ranked"""
+        for item in items:
+            count = self.item_counts[item]
+            ranked_at = self._ranked_at.get(item)
+            if ranked_at is not None and count - ranked_at <= int(ranked_at * self.RERANK_RATIO):
+                continue
+            # Lift as score() computes it, inlined and negated so tuples sort best first, ties by name;
+            # PMI orders the same, so only the kept ones are logged
+            counts, baskets, row = self.item_counts, self.baskets, self.pair_counts.get(item, {})
+            ranked = heapq.nsmallest(
+                self.RANKED_DEPTH,
+                [(-(row[other] * baskets / (count * counts[other])), other)
+                 for other in self._supported.get(item, ())]
+            )
+            if self.scoring == 'pmi':
+                self._ranked[item] = [(math.log(-lift), other) for lift, other in ranked]
+            else:
+                self._ranked[item] = [(-lift, other) for lift, other in ranked]
+            self._ranked_at[item] = count
+    
+    def score(self, item: str, other: str) -> float:
+        """Lift (or PMI) of buying other given item"""
+        together = self.pair_counts.get(item, {}).get(other, 0)
+        if not together:
+            return 0.0
+        lift = together * self.baskets / (self.item_counts[item] * self.item_counts[other])
+        return math.log(lift) if self.scoring == 'pmi' else lift
+    
+    def confidence(self, item: str, other: str) -> float:
+        """Share of baskets with item that also contain other"""
+        count = self.item_counts.get(item)
+        return self.pair_counts.get(item, {}).get(other, 0) / count if count else 0.0
+    
+    def _ranked_neighbours(self, item: str) -> List[Tuple[float, str]]:
+        return self._ranked.get(item, [])
+    
+    def top_k(self, item: str, k: int = 3) -> List[Tuple[str, float]]:
+        """Get up to k (at most RANKED_DEPTH) items most often bought with item"""
+        return [(other, score) for score, other in self._ranked_neighbours(item.lower())[:k]]
+    
+    def recommend(self, items: List[str], k: int = 5) -> List[Tuple[str, str, float]]:
+        """Get (item, bought_with, score) suggestions for a basket in progress"""
+        basket = {item.lower() for item in items}
+        best: Dict[str, Tuple[float, str]] = {}
+        for item in basket:
+            # Anything beyond the first k + len(basket) neighbours can't make the cut
+            for score, other in self._ranked_neighbours(item)[:k + len(basket)]:
+                if other not in basket and score > best.get(other, (0.0, ''))[0]:
+                    best[other] = (score, item)
+        top = heapq.nsmallest(k, best.items(), key=lambda entry: (-entry[1][0], entry[0]))
+        return [(other, item, score) for other, (score, item) in top]
+    
+    def save(self, path: str):
+        """Write the counts to a JSON snapshot"""
+        with open(path, 'w') as f:
+            json.dump({
+                'baskets': self.baskets,
+                'cursor': self.cursor,
+                'item_counts': self.item_counts,
+                'pair_counts': self.pair_counts,
+            }, f)
+    
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'CoPurchaseModel':
+        """Read a snapshot written by save() or rebuild()"""
+        with open(path) as f:
+            data = json.load(f)
+        model = cls(**kwargs)
+        model.baskets = data['baskets']
+        model.cursor = data.get('cursor', 0)
+        model.item_counts = data['item_counts']
+        model.pair_counts = data['pair_counts']
+        model._supported = {
+            item: {other for other, together in row.items() if together >= model.min_support}
+            for item, row in model.pair_counts.items()
+        }
+        model._rerank(model.item_counts)
+        return model
+    
+    @classmethod
+    def rebuild(cls, baskets: Iterable[List[str]], max_neighbours: Optional[int] = None,
+                **kwargs) -> 'CoPurchaseModel':
+        """Recount every basket offline with a sparse matrix product.
+        
+        Builds the binary basket x item matrix X and takes X.T @ X, whose
+        diagonal holds item counts and off-diagonal entries pair counts.
+        Pairs below min_support are dropped, and max_neighbours optionally
+        keeps only each item's highest-lift pairs. Every item is ranked in
+        the same pass. Needs NumPy and SciPy (see requirements-offline.txt).
+        """
+        import numpy as np
+        from scipy import sparse
+        
+        model = cls(**kwargs)
+        vocabulary: Dict[str, int] = {}
+        rows, cols = [], []
+        for basket in baskets:
+            unique = {item.lower() for item in basket}
+            if not unique:
+                continue
+            for item in unique:
+                rows.append(model.baskets)
+                cols.append(vocabulary.setdefault(item, len(vocabulary)))
+            model.baskets += 1
+        
+        names = list(vocabulary)
+        if not names:
+            return model
+        
+        X = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(model.baskets, len(names))
+        )
+        together = (X.T @ X).tocoo()
+        counts = np.asarray(X.sum(axis=0)).ravel()
+        
+        keep = (together.row != together.col) & (together.data >= model.min_support)
+        row, col, data = together.row[keep], together.col[keep], together.data[keep]
+        
+        # Sort by row, then by descending lift with ties by name, as _rerank() ranks
+        lift = data * model.baskets / (counts[row] * counts[col])
+        name_rank = np.empty(len(names), dtype=np.int64)
+        name_rank[np.argsort(np.array(names))] = np.arange(len(names))
+        order = np.lexsort((name_rank[col], -lift, row))
+        row, col, data, lift = row[order], col[order], data[order], lift[order]
+        depth = np.arange(len(row)) - np.searchsorted(row, row)
+        if max_neighbours is not None:
+            keep = depth < max_neighbours
+            row, col, data, lift, depth = row[keep], col[keep], data[keep], lift[keep], depth[keep]
+        
+        model.item_counts = dict(zip(names, counts.tolist()))
+        for i, j, count in zip(row.tolist(), col.tolist(), data.tolist()):
+            model.pair_counts.setdefault(names[i], {})[names[j]] = count
+        model._supported = {item: set(row) for item, row in model.pair_counts.items()}
+        
+        ranked = depth < model.RANKED_DEPTH
+        scores = np.log(lift[ranked]) if model.scoring == 'pmi' else lift[ranked]
+        for i, j, score in zip(row[ranked].tolist(), col[ranked].tolist(), scores.tolist()):
+            model._ranked.setdefault(names[i], []).append((score, names[j]))
+        model._ranked_at = dict(model.item_counts)
+        return model
+
+def create_co_purchase_model(history: PurchaseHistory) -> CoPurchaseModel:
+    """Load the snapshot at CO_PURCHASE_SNAPSHOT if there is one, then count the baskets since"""
+    path = os.environ.get('CO_PURCHASE_SNAPSHOT')
+    if path and os.path.exists(path):
+        model = CoPurchaseModel.load(path)
+    else:
+        model = CoPurchaseModel()
+    model.sync(history)
+    return model
+
+if __name__ == '__main__':
+    # Offline rebuild: python -m app.services.co_purchase
+    from app.services.purchase_history import create_purchase_history
+    
+    snapshot = os.environ.get('CO_PURCHASE_SNAPSHOT', 'co_purchases.json')
+    logged = list(create_purchase_history().baskets_since(0))
+    model = CoPurchaseModel.rebuild([basket for _, basket in logged], max_neighbours=100)
+    # Workers loading the snapshot count only the baskets recorded after these
+    model.cursor = logged[-1][0] if logged else 0
+    model.save(snapshot)
+    print(f"Rebuilt {len(model)} items from {model.baskets} baskets into {snapshot}")
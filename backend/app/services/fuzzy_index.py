@@ -0,0 +1,171 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+class FuzzyIndex:
+    """Approximate term lookup with symmetric deletes (SymSpell).
+    
+    Every term is stored under each string reachable from its first
+    prefix_length characters by deleting up to max_distance characters. A
+    query generates its own deletes the same way, so all terms within the
+    edit distance share at least one key with it and no lookup ever scans
+    the vocabulary. Keys are bucketed by the length of the term prefix they
+    came from, so short keys shared by thousands of long terms are skipped
+    instead of filtered. Candidates are then checked with the optimal
+    string alignment distance (edits plus adjacent transpositions).
+    
+    Short words allow fewer edits, so "tea" never becomes "pea", and a
+    word as close to two different terms as to any is left alone.
+    """
+    
+    def __init__(self, max_distance: int = 1, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._terms: List[str] = []
+        self._canonical: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Keyed by chr(prefix length) + delete; a single term id, or a list
+        # of them once a key is shared
+        self._deletes: Dict[str, Union[int, List[int]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._terms)
+    
+    def __contains__(self, term: str) -> bool:
+        return term.lower() in self._ids
+    
+    def add(self, term: str, canonical: Optional[str] = None):
+        """Register a term, optionally as a spelling of another canonical name"""
+        term = term.lower()
+        if term in self._ids:
+            return
+        term_id = len(self._terms)
+        self._ids[term] = term_id
+        self._terms.append(term)
+        self._canonical.append(canonical.lower() if canonical else term)
+        
+        deletes = self._deletes
+        prefix = term[:self.prefix_length]
+        bucket = chr(len(prefix))
+        for key in self._edits(prefix, self.max_distance):
+            key = bucket + key
+            entry = deletes.get(key)
+            if entry is None:
+                deletes[key] = term_id
+            elif isinstance(entry, int):
+                deletes[key] = [entry, term_id]
+            else:
+                entry.append(term_id)
+    
+    def allowed_distance(self, word: str) -> int:
+        """Edits tolerated for a word of this length"""
+        if len(word) <= 3:
+            return 0
+        if len(word) <= 5:
+            return min(1, self.max_distance)
+        return self.max_distance
+    
+    def lookup(self, word: str) -> Optional[Tuple[str, int]]:
+        """Return (canonical, distance) of the closest term, or None.
+        
+        None too when terms with different canonical names are equally close.
+        """
+        word = word.lower()
+        term_id = self._ids.get(word)
+        if term_id is not None:
+            return self._canonical[term_id], 0
+        
+        limit = self.allowed_distance(word)
+        if not limit:
+            return None
+        
+        best_id, best_distance = None, limit
+        tied = False
+        checked = set()
+        prefix = word[:self.prefix_length]
+        for key in self._edits(prefix, limit):
+            # Deletes come shortest-first; a term within best_distance shares a
+            # key with the query that takes at most best_distance deletes on
+            # each side, which also bounds the term prefix lengths to try
+            if len(prefix) - len(key) > best_distance:
+                break
+            for length in range(len(key), min(len(key) + best_distance, self.prefix_length) + 1):
+                entry = self._deletes.get(chr(length) + key)
+                if entry is None:
+                    continue
+                for candidate in (entry,) if isinstance(entry, int) else entry:
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    term = self._terms[candidate]
+                    if abs(len(term) - len(word)) > best_distance:
+                        continue
+                    distance = _osa_distance(word, term, best_distance)
+                    if distance > best_distance:
+                        continue
+                    if best_id is None or distance < best_distance:
+                        best_id, best_distance, tied = candidate, distance, False
+                    elif self._canonical[candidate] != self._canonical[best_id]:
+                        tied = True
+        
+        if best_id is None or tied:
+            return None
+        return self._canonical[best_id], best_distance
+    
+    def correct(self, word: str) -> Optional[str]:
+        """Return the canonical term closest to word, or None"""
+        match = self.lookup(word)
+        return match[0] if match else None
+    
+    @staticmethod
+    def _edits(word: str, distance: int) -> Iterator[str]:
+        """Yield word and every distinct string up to distance deletes away"""
+        seen = {word}
+        frontier = [word]
+        yield word
+        for _ in range(distance):
+            next_frontier = []
+            for current in frontier:
+                for i in range(len(current)):
+                    shorter = current[:i] + current[i + 1:]
+                    if shorter not in seen:
+                        seen.add(shorter)
+                        next_frontier.append(shorter)
+                        yield shorter
+            frontier = next_frontier
+
+def _osa_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance, or limit + 1 once it must exceed limit.
+    
+    Only the diagonal band |i - j| <= limit can hold values within the
+    limit, so cells outside it are never computed.
+    """
+    if a == b:
+        return 0
+    n, m = len(a), len(b)
+    if abs(n - m) > limit:
+        return limit + 1
+    
+    over = limit + 1
+    previous_previous = None
+    previous = [j if j <= limit else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        current = [over] * (m + 1)
+        if i <= limit:
+            current[0] = i
+        char = a[i - 1]
+        row_min = current[0]
+        for j in range(max(1, i - limit), min(m, i + limit) + 1):
+            value = previous[j - 1] if char == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous_previous is not None and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous_previous, previous = previous, current
+    return previous[m] if previous[m] <= limit else over
@@ -0,0 +1,108 @@
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+class KeywordIndex:
+    """Aho-Corasick automaton for finding many keywords in one pass over a text.
+    
+    Each keyword carries a set of tagged values (e.g. a category and a list of
+    substitutes), so one automaton can serve several lookup tables. When a tag
+    is registered twice for the same keyword, the first value is kept.
+    """
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[str]] = [[]]
+        self._values: Dict[str, Dict[str, Any]] = {}
+        self._order: Dict[str, int] = {}
+        self._built = True
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def __contains__(self, keyword: str) -> bool:
+        return keyword.lower() in self._values
+    
+    def add(self, keyword: str, tag: str, value: Any):
+        """Register a keyword with a tagged value"""
+        keyword = keyword.lower()
+        if keyword not in self._values:
+            self._values[keyword] = {}
+            self._order[keyword] = len(self._order)
+            self._insert(keyword)
+        self._values[keyword].setdefault(tag, value)
+    
+    def _insert(self, keyword: str):
+        node = 0
+        for char in keyword:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[node][char] = nxt
+            node = nxt
+        self._outputs[node].append(keyword)
+        self._built = False
+    
+    def build(self):
+        """Compute failure links; called lazily before the first search"""
+        queue = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Keep output lists complete so searching never walks fail chains
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+        self._built = True
+    
+    def search(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yield (start, keyword) for every keyword occurrence in text"""
+        if not self._built:
+            self.build()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for pos, char in enumerate(text.lower()):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for keyword in outputs[node]:
+                yield pos - len(keyword) + 1, keyword
+    
+    def best_match(self, text: str, tag: str) -> Optional[str]:
+        """Return the keyword in text that best matches for a tag.
+        
+        Longest keyword wins; ties go to the leftmost occurrence and then to
+        the keyword registered first, so results never depend on scan order.
+        """
+        # A text that is a keyword itself is its own longest match
+        text = text.lower()
+        if tag in self._values.get(text, ()):
+            return text
+        best, best_key = None, None
+        for start, keyword in self.search(text):
+            if tag not in self._values[keyword]:
+                continue
+            key = (-len(keyword), start, self._order[keyword])
+            if best_key is None or key < best_key:
+                best, best_key = keyword, key
+        return best
+    
+    def lookup(self, text: str, tag: str, default: Any = None) -> Any:
+        """Return the tagged value of the best matching keyword in text"""
+        keyword = self.best_match(text, tag)
+        if keyword is None:
+            return default
+        return self._values[keyword][tag]
+    
+    def values(self, keyword: str) -> Dict[str, Any]:
+        """Return all tagged values registered for a keyword"""
+        return self._values.get(keyword.lower(), {})
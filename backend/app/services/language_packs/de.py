@@ -0,0 +1,43 @@
+# German command rules
+
+INTENTS = {
+    'ADD': ['füge', 'hinzu', 'hinzufügen', 'kaufe', 'kaufen', 'brauche', 'besorge'],
+    'REMOVE': ['entferne', 'entfernen', 'lösche', 'löschen', 'streiche'],
+    'LIST': ['zeige', 'zeig', 'liste'],
+    'SEARCH': ['suche', 'finde', 'wo ist', 'wo sind'],
+}
+
+LIST_QUESTION = (r'\bwas\b', ['habe', 'haben'])
+
+QUANTITY_UNITS = ['flasche', 'stück', 'kg', 'kilo', 'liter', 'packung', 'karton', 'dose']
+
+# "füge ... hinzu" is split around the item, so both halves are stripped
+STRIP_KEYWORDS = {'füge', 'hinzu', 'hinzufügen', 'kaufe', 'kaufen', 'brauche', 'besorge',
+                  'entferne', 'entfernen', 'lösche', 'löschen', 'suche', 'finde'}
+STRIP_UNITS = [r'flaschen?', r'stück', r'kg', r'kilos?', r'liter', r'packungen?', r'kartons?', r'dosen?']
+FILLER_PHRASES = [r'zu\s+meiner\s+liste', r'auf\s+meine\s+liste', r'von\s+meiner\s+liste', r'zur\s+liste']
+STOPWORDS = {'der', 'die', 'das', 'ein', 'eine', 'einen', 'und', 'oder', 'zu', 'von', 'mit', 'bitte', 'mir'}
+
+LETTERS = r'[^\W\d_]'
+
+# Spoken product name -> catalog product, for categories and prices
+PRODUCTS = {
+    'milch': 'milk', 'käse': 'cheese', 'butter': 'butter', 'joghurt': 'yogurt', 'sahne': 'cream',
+    'eier': 'eggs', 'apfel': 'apple', 'äpfel': 'apple', 'banane': 'banana', 'bananen': 'banana',
+    'orange': 'orange', 'orangen': 'orange', 'karotten': 'carrot', 'möhren': 'carrot',
+    'brokkoli': 'broccoli', 'tomaten': 'tomato', 'salat': 'lettuce', 'hähnchen': 'chicken',
+    'rindfleisch': 'beef', 'schweinefleisch': 'pork', 'fisch': 'fish', 'pute': 'turkey', 'lamm': 'lamb',
+    'chips': 'chips', 'kekse': 'cookie', 'schokolade': 'chocolate', 'wasser': 'water', 'saft': 'juice',
+    'limonade': 'soda', 'kaffee': 'coffee', 'tee': 'tea', 'wein': 'wine', 'bier': 'beer', 'brot': 'bread',
+    'brötchen': 'roll', 'kuchen': 'cake', 'speiseeis': 'ice cream', 'reis': 'rice', 'nudeln': 'pasta',
+    'öl': 'oil', 'salz': 'salt', 'zucker': 'sugar', 'mehl': 'flour', 'seife': 'soap',
+    'shampoo': 'shampoo', 'zahnpasta': 'toothpaste', 'waschmittel': 'detergent',
+}
+
+# Correctly spelled words the product table lacks; they are never corrected into a product
+KNOWN_WORDS = {
+    'lachs', 'thunfisch', 'garnelen', 'schinken', 'wurst', 'würstchen', 'müsli', 'suppe', 'erbsen',
+    'bohnen', 'linsen', 'zwiebel', 'zwiebeln', 'knoblauch', 'pfeffer', 'spinat', 'pilze', 'zitrone',
+    'zitronen', 'birne', 'birnen', 'trauben', 'erdbeeren', 'gurke', 'kartoffeln', 'honig', 'marmelade',
+    'senf', 'essig', 'soße', 'frisch', 'frische', 'flaschen', 'stück', 'kilo', 'liter', 'packungen', 'dosen',
+}
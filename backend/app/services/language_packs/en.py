@@ -0,0 +1,45 @@
+# English command rules, the default language
+
+# Intent keywords, in priority order (ADD beats REMOVE beats LIST beats SEARCH)
+INTENTS = {
+    'ADD': ['add', 'buy', 'get', 'need', 'purchase', 'put', 'include'],
+    'REMOVE': ['remove', 'delete', 'cancel', 'take off', 'strike', 'eliminate'],
+    'LIST': ['show', 'display', 'list', 'check'],
+    'SEARCH': ['search', 'find', 'look for', 'where'],
+}
+
+# "what ... have" / "what ... got" questions are LIST commands too
+LIST_QUESTION = ('what', ['have', 'got'])
+
+# Units that make a bare "<number> <unit>" command a QUANTITY intent
+QUANTITY_UNITS = ['bottle', 'piece', 'kg', 'liter', 'pack', 'box', 'items', 'item']
+
+# Words and phrases stripped out when extracting item names
+STRIP_KEYWORDS = {'add', 'buy', 'get', 'need', 'remove', 'delete', 'search', 'find'}
+STRIP_UNITS = ['bottle', 'piece', 'kg', 'liter', 'pack', 'box']
+FILLER_PHRASES = [r'to\s+my\s+list', r'from\s+my\s+list']
+STOPWORDS = {'the', 'a', 'an', 'of', 'to', 'and', 'or', 'from', 'in', 'on', 'at', 'by'}
+
+# Letters a unit word after a number is made of
+LETTERS = '[a-z]'
+
+# Product names are the catalog's own
+PRODUCTS = None
+
+# Correctly spelled words the catalog lacks; they are never corrected into a product
+KNOWN_WORDS = {
+    'salmon', 'tuna', 'shrimp', 'cod', 'bacon', 'ham', 'sausage', 'sausages', 'steak', 'mince', 'meat',
+    'cereal', 'oats', 'oatmeal', 'granola', 'soup', 'peas', 'beans', 'lentils', 'corn', 'potato', 'potatoes',
+    'onion', 'onions', 'garlic', 'ginger', 'pepper', 'peppers', 'spinach', 'kale', 'cabbage', 'celery',
+    'cucumber', 'zucchini', 'mushroom', 'mushrooms', 'lemon', 'lemons', 'lime', 'limes', 'pear', 'pears',
+    'peach', 'peaches', 'plum', 'plums', 'grape', 'grapes', 'mango', 'pineapple', 'berries', 'strawberries',
+    'blueberries', 'cherries', 'melon', 'watermelon', 'avocado', 'pumpkin', 'squash', 'cranberries',
+    'salad', 'vegetables', 'fruit', 'sprite', 'cola', 'coke', 'lemonade', 'tortillas', 'crackers',
+    'pretzels', 'honey', 'jam', 'jelly', 'peanut', 'butter', 'mayo', 'mayonnaise', 'ketchup', 'mustard',
+    'vinegar', 'sauce', 'salsa', 'noodles', 'syrup', 'cocoa', 'cinnamon', 'vanilla', 'yeast', 'baking',
+    'tissues', 'napkins', 'diapers', 'razors', 'toothbrush', 'sponges', 'foil', 'bleach', 'batteries',
+    'sunscreen', 'popsicles', 'hot', 'fresh', 'organic', 'large', 'small', 'whole', 'sliced', 'ground',
+    'spring', 'green', 'red', 'white', 'brown', 'some', 'more', 'please', 'my', 'list', 'i', 'we', 'you',
+    'do', 'for', 'what', 'with',
+    'bottles', 'pieces', 'liters', 'packs', 'boxes', 'bags', 'cans', 'jars', 'dozen',
+}
@@ -0,0 +1,46 @@
+# Spanish command rules
+
+INTENTS = {
+    'ADD': ['añade', 'añadir', 'agrega', 'agregar', 'compra', 'comprar', 'necesito', 'incluye'],
+    'REMOVE': ['quita', 'quitar', 'elimina', 'eliminar', 'borra', 'borrar', 'saca'],
+    'LIST': ['muestra', 'mostrar', 'enseña', 'lista'],
+    'SEARCH': ['busca', 'buscar', 'encuentra', 'dónde'],
+}
+
+LIST_QUESTION = ('qué', ['tengo', 'tenemos', 'hay'])
+
+QUANTITY_UNITS = ['botella', 'pieza', 'kg', 'kilo', 'litro', 'paquete', 'caja', 'unidad']
+
+STRIP_KEYWORDS = {'añade', 'añadir', 'agrega', 'agregar', 'compra', 'comprar', 'necesito',
+                  'quita', 'quitar', 'elimina', 'eliminar', 'borra', 'borrar', 'busca', 'buscar'}
+# Units take a following "de" with them: "2 litros de leche" -> "leche"
+STRIP_UNITS = [r'botellas?(?:\s+de)?', r'piezas?(?:\s+de)?', r'kg(?:\s+de)?', r'kilos?(?:\s+de)?',
+               r'litros?(?:\s+de)?', r'paquetes?(?:\s+de)?', r'cajas?(?:\s+de)?']
+FILLER_PHRASES = [r'a\s+mi\s+lista', r'de\s+mi\s+lista', r'en\s+mi\s+lista']
+STOPWORDS = {'el', 'la', 'los', 'las', 'un', 'una', 'de', 'del', 'y', 'o', 'a', 'en', 'por', 'para', 'mi'}
+
+LETTERS = r'[^\W\d_]'
+
+# Spoken product name -> catalog product, for categories and prices
+PRODUCTS = {
+    'leche': 'milk', 'queso': 'cheese', 'mantequilla': 'butter', 'yogur': 'yogurt', 'nata': 'cream',
+    'huevos': 'eggs', 'huevo': 'eggs', 'manzana': 'apple', 'manzanas': 'apple', 'plátano': 'banana',
+    'plátanos': 'banana', 'naranja': 'orange', 'naranjas': 'orange', 'zanahoria': 'carrot',
+    'zanahorias': 'carrot', 'brócoli': 'broccoli', 'tomate': 'tomato', 'tomates': 'tomato',
+    'lechuga': 'lettuce', 'pollo': 'chicken', 'ternera': 'beef', 'cerdo': 'pork', 'pescado': 'fish',
+    'pavo': 'turkey', 'cordero': 'lamb', 'patatas fritas': 'chips', 'galletas': 'cookie',
+    'chocolate': 'chocolate', 'agua': 'water', 'zumo': 'juice', 'jugo': 'juice', 'refresco': 'soda',
+    'café': 'coffee', 'té': 'tea', 'vino': 'wine', 'cerveza': 'beer', 'pan': 'bread', 'pastel': 'cake',
+    'helado': 'ice cream', 'arroz': 'rice', 'pasta': 'pasta', 'aceite': 'oil', 'sal': 'salt',
+    'azúcar': 'sugar', 'harina': 'flour', 'jabón': 'soap', 'champú': 'shampoo',
+    'pasta de dientes': 'toothpaste', 'detergente': 'detergent',
+}
+
+# Correctly spelled words the product table lacks; they are never corrected into a product
+KNOWN_WORDS = {
+    'salmón', 'atún', 'gambas', 'jamón', 'salchicha', 'salchichas', 'cereales', 'sopa', 'guisantes',
+    'frijoles', 'lentejas', 'cebolla', 'cebollas', 'ajo', 'pimienta', 'espinacas', 'champiñones', 'limón',
+    'limones', 'pera', 'peras', 'uvas', 'fresas', 'pepino', 'papas', 'patatas', 'miel', 'mermelada',
+    'mostaza', 'vinagre', 'salsa', 'fideos', 'fresco', 'fresca', 'botellas', 'piezas', 'kilos', 'litros',
+    'paquetes', 'cajas',
+}
@@ -0,0 +1,46 @@
+# French command rules
+
+INTENTS = {
+    'ADD': ['ajoute', 'ajouter', 'achète', 'acheter', 'prends', 'prendre', 'il me faut'],
+    'REMOVE': ['enlève', 'enlever', 'retire', 'retirer', 'supprime', 'supprimer', 'efface'],
+    'LIST': ['montre', 'affiche', 'liste'],
+    'SEARCH': ['cherche', 'chercher', 'trouve', 'où'],
+}
+
+LIST_QUESTION = (r"qu'est-ce\s+qu", ["j'ai", 'nous avons', 'on a'])
+
+QUANTITY_UNITS = ['bouteille', 'pièce', 'kg', 'kilo', 'litre', 'paquet', 'boîte']
+
+STRIP_KEYWORDS = {'ajoute', 'ajouter', 'achète', 'acheter', 'prends', 'prendre', 'il me faut',
+                  'enlève', 'enlever', 'retire', 'retirer', 'supprime', 'supprimer', 'cherche', 'chercher'}
+# Units take a following "de" / "d'" with them: "2 bouteilles d'eau" -> "eau"
+STRIP_UNITS = [r"bouteilles?(?:\s+de\b|\s+d')?", r"pièces?(?:\s+de\b|\s+d')?", r"kg(?:\s+de\b|\s+d')?",
+               r"kilos?(?:\s+de\b|\s+d')?", r"litres?(?:\s+de\b|\s+d')?", r"paquets?(?:\s+de\b|\s+d')?",
+               r"boîtes?(?:\s+de\b|\s+d')?"]
+FILLER_PHRASES = [r'à\s+ma\s+liste', r'de\s+ma\s+liste', r'sur\s+ma\s+liste', r'dans\s+ma\s+liste']
+STOPWORDS = {'le', 'la', 'les', 'un', 'une', 'des', 'du', 'de', 'et', 'ou', 'à', 'au', 'en', 'ma', 'mon'}
+
+LETTERS = r'[^\W\d_]'
+
+# Spoken product name -> catalog product, for categories and prices
+PRODUCTS = {
+    'lait': 'milk', 'fromage': 'cheese', 'beurre': 'butter', 'yaourt': 'yogurt', 'crème': 'cream',
+    'œufs': 'eggs', 'oeufs': 'eggs', 'pomme': 'apple', 'pommes': 'apple', 'banane': 'banana',
+    'bananes': 'banana', 'orange': 'orange', 'carotte': 'carrot', 'carottes': 'carrot',
+    'brocoli': 'broccoli', 'tomate': 'tomato', 'tomates': 'tomato', 'laitue': 'lettuce',
+    'poulet': 'chicken', 'bœuf': 'beef', 'boeuf': 'beef', 'porc': 'pork', 'poisson': 'fish',
+    'dinde': 'turkey', 'agneau': 'lamb', 'chips': 'chips', 'biscuits': 'cookie', 'chocolat': 'chocolate',
+    'eau': 'water', 'jus': 'juice', 'soda': 'soda', 'café': 'coffee', 'thé': 'tea', 'vin': 'wine',
+    'bière': 'beer', 'pain': 'bread', 'gâteau': 'cake', 'glace': 'ice cream', 'riz': 'rice',
+    'pâtes': 'pasta', 'huile': 'oil', 'sel': 'salt', 'sucre': 'sugar', 'farine': 'flour',
+    'savon': 'soap', 'shampooing': 'shampoo', 'dentifrice': 'toothpaste', 'lessive': 'detergent',
+}
+
+# Correctly spelled words the product table lacks; they are never corrected into a product
+KNOWN_WORDS = {
+    'saumon', 'thon', 'crevettes', 'jambon', 'saucisse', 'saucisses', 'céréales', 'soupe', 'petits', 'pois',
+    'haricots', 'lentilles', 'oignon', 'oignons', 'ail', 'poivre', 'épinards', 'champignons', 'citron',
+    'citrons', 'poire', 'poires', 'raisin', 'raisins', 'fraises', 'concombre', 'courgette', 'miel',
+    'confiture', 'moutarde', 'vinaigre', 'sauce', 'nouilles', 'frais', 'fraîche', 'bio', 'terre',
+    'bouteilles', 'pièces', 'kilos', 'litres', 'paquets', 'boîtes',
+}
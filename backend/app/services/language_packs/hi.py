@@ -0,0 +1,38 @@
+# Hindi command rules (Devanagari; verbs usually come after the item)
+
+INTENTS = {
+    'ADD': ['जोड़ो', 'जोड़ें', 'जोड़ दो', 'डालो', 'डाल दो', 'खरीदो', 'खरीदना', 'चाहिए', 'लाना'],
+    'REMOVE': ['हटाओ', 'हटाएं', 'हटा दो', 'निकालो', 'निकाल दो'],
+    'LIST': ['दिखाओ', 'दिखाएं', 'सूची'],
+    'SEARCH': ['ढूंढो', 'खोजो', 'कहाँ'],
+}
+
+LIST_QUESTION = ('क्या', ['है', 'हैं'])
+
+QUANTITY_UNITS = ['बोतल', 'पीस', 'किलो', 'लीटर', 'पैकेट', 'डिब्बा', 'डिब्बे']
+
+STRIP_KEYWORDS = {'जोड़ो', 'जोड़ें', 'जोड़ दो', 'डालो', 'डाल दो', 'खरीदो', 'खरीदना', 'चाहिए', 'लाना',
+                  'हटाओ', 'हटाएं', 'हटा दो', 'निकालो', 'निकाल दो', 'ढूंढो', 'खोजो'}
+STRIP_UNITS = ['बोतल', 'पीस', 'किलो', 'लीटर', 'पैकेट', 'डिब्बा', 'डिब्बे']
+FILLER_PHRASES = [r'मेरी\s+सूची\s+में', r'मेरी\s+सूची\s+से', r'मेरी\s+लिस्ट\s+में', r'मेरी\s+लिस्ट\s+से']
+STOPWORDS = {'और', 'या', 'में', 'से', 'का', 'की', 'के', 'को', 'भी'}
+
+# Devanagari block, vowel signs included
+LETTERS = '[ऀ-ॿ]'
+
+# Spoken product name -> catalog product, for categories and prices
+PRODUCTS = {
+    'दूध': 'milk', 'पनीर': 'cheese', 'मक्खन': 'butter', 'दही': 'yogurt', 'मलाई': 'cream',
+    'अंडे': 'eggs', 'अंडा': 'eggs', 'सेब': 'apple', 'केला': 'banana', 'केले': 'banana',
+    'संतरा': 'orange', 'संतरे': 'orange', 'गाजर': 'carrot', 'टमाटर': 'tomato', 'चिकन': 'chicken',
+    'मछली': 'fish', 'चिप्स': 'chips', 'बिस्कुट': 'cookie', 'चॉकलेट': 'chocolate', 'पानी': 'water',
+    'जूस': 'juice', 'कॉफी': 'coffee', 'चाय': 'tea', 'ब्रेड': 'bread', 'डबलरोटी': 'bread', 'केक': 'cake',
+    'आइसक्रीम': 'ice cream', 'चावल': 'rice', 'तेल': 'oil', 'नमक': 'salt', 'चीनी': 'sugar',
+    'आटा': 'flour', 'साबुन': 'soap', 'शैम्पू': 'shampoo', 'टूथपेस्ट': 'toothpaste',
+}
+
+# Correctly spelled words the product table lacks; they are never corrected into a product
+KNOWN_WORDS = {
+    'दाल', 'आलू', 'प्याज', 'लहसुन', 'अदरक', 'मटर', 'घी', 'मसाला', 'हल्दी', 'सूप', 'नींबू', 'अंगूर',
+    'आम', 'पालक', 'मिर्च', 'शहद', 'सिरका',
+}
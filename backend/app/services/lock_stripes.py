@@ -0,0 +1,21 @@
+import threading
+from typing import Hashable
+
+class LockStripes:
+    """A fixed pool of locks shared out by key.
+    
+    Everything done under one key serializes on that key's lock, while
+    different keys almost always get different locks, so two households
+    never wait on each other the way they would behind one global lock.
+    The pool size is fixed however many keys there are.
+    """
+    
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+    
+    def __len__(self) -> int:
+        return len(self._locks)
+    
+    def __call__(self, key: Hashable) -> threading.Lock:
+        """Get the lock guarding a key"""
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,324 @@
+import atexit
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BYTE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Totals of exited processes in the shared directory; not a *.json file, so never read as a process's
+ARCHIVE = 'exited.archive'
+
+class Metric:
+    """A named metric family with a fixed set of label names"""
+    
+    TYPE = ''
+    
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # Label values -> mutable value; only touched with the registry lock held
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def _new_value(self) -> List[float]:
+        raise NotImplementedError
+    
+    def _add_series(self, label_values: Tuple[str, ...]) -> List[float]:
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}")
+        value = self.series[label_values] = self._new_value()
+        return value
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+    
+    TYPE = 'counter'
+    
+    def _new_value(self) -> List[float]:
+        return [0.0]
+    
+    def inc(self, *label_values: str, amount: float = 1.0):
+        """Add amount to the series for label_values"""
+        registry = self.registry
+        with registry._lock:
+            value = self.series.get(label_values) or self._add_series(label_values)
+            value[0] += amount
+            registry._dirty = True
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, Prometheus style"""
+    
+    TYPE = 'histogram'
+    
+    def __init__(self, registry: 'MetricsRegistry', name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labels)
+        self.buckets = tuple(buckets)
+    
+    def _new_value(self) -> List[float]:
+        # One count per bucket plus +Inf, then the sum of observations
+        return [0.0] * (len(self.buckets) + 2)
+    
+    def observe(self, amount: float, *label_values: str):
+        """Record one observation for label_values"""
+        index = bisect.bisect_left(self.buckets, amount)
+        registry = self.registry
+        with registry._lock:
+            value = self.series.get(label_values) or self._add_series(label_values)
+            value[index] += 1
+            value[-1] += amount
+            registry._dirty = True
+    
+    def time(self, *label_values: str) -> '_Timer':
+        """Observe the wall time of the with block"""
+        return _Timer(self, label_values)
+
+class _Timer:
+    """Context manager behind Histogram.time(), lighter than a generator-based one"""
+    
+    __slots__ = ('histogram', 'label_values', 'start')
+    
+    def __init__(self, histogram: Histogram, label_values: Tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+class MetricsRegistry:
+    """Process-local metric values, optionally shared through a directory.
+    
+    Every process keeps its own values in memory and, when directory is
+    set, a background thread writes them to the process's own JSON file at
+    most once per flush_interval.
+    render() merges every file in the directory, so a scrape of any gunicorn
+    worker reports totals for all of them. retire() folds the files of an
+    exited worker into one archive, so recycled workers don't pile up
+    files and counters never go backwards.
+    """
+    
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._metrics: Dict[str, Metric] = {}
+        self._values: Dict[str, Dict[Tuple[str, ...], List[float]]] = {}
+        self._lock = threading.Lock()
+        self._path = None
+        self._dirty = False
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+        self._start_process()
+        # Checked once per fork rather than on every update
+        os.register_at_fork(after_in_child=self._after_fork)
+    
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        """Register a counter"""
+        return self._register(Counter(self, name, help, labels))
+    
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Register a histogram"""
+        return self._register(Histogram(self, name, help, labels, buckets))
+    
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        self._values[metric.name] = metric.series
+        return metric
+    
+    def _start_process(self):
+        """Give this process its own file and, since threads don't survive fork, its own flusher"""
+        if self.directory:
+            self._path = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+            threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+    
+    def _after_fork(self):
+        # A forked worker starts from zero; its parent's values are in the parent's file.
+        # The lock may have been held by another thread of the parent when it forked
+        self._lock = threading.Lock()
+        for series in self._values.values():
+            series.clear()
+        self._dirty = False
+        self._start_process()
+    
+    def _flush_periodically(self):
+        path = self._path
+        while path == self._path:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                if self._dirty and path == self._path:
+                    self._flush_locked()
+    
+    def flush(self):
+        """Write this process's values to its file in the shared directory"""
+        if self.directory:
+            with self._lock:
+                if self._dirty:
+                    self._flush_locked()
+    
+    def _flush_locked(self):
+        data = {
+            name: [[list(labels), value] for labels, value in series.items()]
+            for name, series in self._values.items() if series
+        }
+        # Recreated on every write: gunicorn's on_starting wipes the directory after a
+        # preloaded app has already created it
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f'{self._path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self._path)
+        self._dirty = False
+    
+    def collect(self) -> Dict[str, Dict[Tuple[str, ...], List[float]]]:
+        """Sum the values of every process sharing the directory"""
+        if not self.directory:
+            with self._lock:
+                return {name: {labels: list(value) for labels, value in series.items()}
+                        for name, series in self._values.items()}
+        
+        self.flush()
+        while True:
+            # Listed before the archive is read: a file retired in between is then either
+            # named in the archive or gone, and gone means reading everything again
+            paths = glob.glob(os.path.join(self.directory, '*.json'))
+            archive = _read(os.path.join(self.directory, ARCHIVE)) or {}
+            retired = set(archive.get('files', ()))
+            totals: Dict[str, Dict[Tuple[str, ...], List[float]]] = {name: {} for name in self._metrics}
+            _merge(totals, archive.get('metrics', {}))
+            complete = True
+            for path in paths:
+                if os.path.basename(path) in retired:
+                    continue
+                data = _read(path)
+                if data is None and not os.path.exists(path):
+                    complete = False
+                    break
+                _merge(totals, data or {})
+            if complete:
+                return totals
+    
+    def retire(self, pid: int):
+        """Fold the files of an exited process into the archive and remove them.
+        
+        Only one process may retire at a time; gunicorn's master does it
+        from child_exit. The archive names the files it just took in, so a
+        concurrent collect() never counts them twice.
+        """
+        if not self.directory:
+            return
+        paths = glob.glob(os.path.join(self.directory, f'{pid}-*.json'))
+        if not paths:
+            return
+        archive_path = os.path.join(self.directory, ARCHIVE)
+        totals: Dict[str, Dict[Tuple[str, ...], List[float]]] = {}
+        _merge(totals, (_read(archive_path) or {}).get('metrics', {}), add_names=True)
+        for path in paths:
+            _merge(totals, _read(path) or {}, add_names=True)
+        with open(f'{archive_path}.tmp', 'w') as f:
+            json.dump({
+                'files': [os.path.basename(path) for path in paths],
+                'metrics': {name: [[list(labels), value] for labels, value in series.items()]
+                            for name, series in totals.items()},
+            }, f)
+        os.replace(f'{archive_path}.tmp', archive_path)
+        for path in paths:
+            os.remove(path)
+    
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        totals = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.TYPE}')
+            for labels, value in sorted(totals.get(name, {}).items()):
+                pairs = list(zip(metric.labels, labels))
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets + (math.inf,), value):
+                        cumulative += count
+                        le = '+Inf' if bound == math.inf else _format_number(bound)
+                        lines.append(f'{name}_bucket{_format_labels(pairs + [("le", le)])} {_format_number(cumulative)}')
+                    lines.append(f'{name}_sum{_format_labels(pairs)} {_format_number(value[-1])}')
+                    lines.append(f'{name}_count{_format_labels(pairs)} {_format_number(cumulative)}')
+                else:
+                    lines.append(f'{name}{_format_labels(pairs)} {_format_number(value[0])}')
+        return '\n'.join(lines) + '\n'
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _merge(totals: Dict[str, Dict[Tuple[str, ...], List[float]]], data: dict, add_names: bool = False):
+    """Add the series of one process's file into totals, skipping unknown metrics unless add_names"""
+    for name, entries in data.items():
+        series = totals.setdefault(name, {}) if add_names else totals.get(name)
+        if series is None:
+            continue
+        for labels, value in entries:
+            total = series.setdefault(tuple(labels), [0.0] * len(value))
+            if len(total) == len(value):
+                for i, amount in enumerate(value):
+                    total[i] += amount
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+def create_registry() -> MetricsRegistry:
+    """Build the registry, shared between processes through METRICS_DIR if it is set"""
+    return MetricsRegistry(os.environ.get('METRICS_DIR') or None)
+
+registry = create_registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Wall time per request', ('endpoint', 'method'))
+REQUESTS = registry.counter(
+    'http_requests_total', 'Requests served', ('endpoint', 'method', 'status'))
+REQUEST_BYTES = registry.counter(
+    'http_request_bytes_total', 'Request payload bytes received', ('endpoint',))
+RESPONSE_BYTES = registry.histogram(
+    'http_response_bytes', 'Response payload size', ('endpoint',), BYTE_BUCKETS)
+SERIALIZATION_SECONDS = registry.histogram(
+    'response_serialization_seconds', 'Time spent encoding JSON responses', ('endpoint',))
+NLP_PARSE_SECONDS = registry.histogram(
+    'nlp_parse_seconds', 'Time to parse one voice command on a cache miss')
+NLP_PARTIAL_PARSE_SECONDS = registry.histogram(
+    'nlp_partial_parse_seconds', 'Time to parse one interim transcript in a parse session')
+NLP_CACHE_LOOKUPS = registry.counter(
+    'nlp_cache_lookups_total', 'Parsed command cache lookups', ('result',))
+RECOMMENDATION_CACHE_LOOKUPS = registry.counter(
+    'recommendation_cache_lookups_total', 'Personalized recommendation cache lookups', ('result',))
+RECOMMENDATION_SECONDS = registry.histogram(
+    'recommendation_seconds', 'Time to build recommendations', ('kind',))
+SHOPPING_LIST_ITEMS = registry.histogram(
+    'shopping_list_items', 'Items in shopping lists sent in full', buckets=SIZE_BUCKETS)
+SHOPPING_STREAM_EVENTS = registry.counter(
+    'shopping_stream_events_total', 'Events pushed to shopping list streams', ('event',))
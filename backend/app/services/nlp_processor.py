@@ -1,123 +1,379 @@
+import importlib
+import os
+import pkgutil
 import re
-from typing import Dict, List, Tuple
+import threading
+import time
+import unicodedata
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+from app.services import language_packs, metrics, profiling
+from app.services.keyword_index import KeywordIndex
+from app.services.lru_cache import LRUCache
+from app.services.product_catalog import (
+    CATEGORIES, SYNONYMS, build_fuzzy_index, fuzzy_products, product_index, product_vocabulary
+)
+
+# Parsed commands are shared by every NLPProcessor in the process
+command_cache = LRUCache(
+    maxsize=int(os.environ.get('NLP_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('NLP_CACHE_TTL', 3600)),
+)
+
+def _compile_command_pattern(intents: Dict[str, List[str]], list_question: Tuple[str, List[str]],
+                             fillers: List[str], strip_keywords: List[str], strip_units: List[str],
+                             letters: str = '[a-z]'):
+    """Build one alternation with a named group per token kind, so a single
+    finditer() over a command yields intents, fillers and quantities in order.
+    
+    Commands are lowercased by _normalize() and rules are written in
+    lowercase, so patterns match case-sensitively, which is much faster.
+    """
+    def alternation(words):
+        # Longest first so that a keyword never shadows a longer one sharing its prefix
+        return '|'.join(sorted(words, key=len, reverse=True))
+    
+    question, answers = list_question
+    groups = [f"(?P<filler>{alternation(fillers)})"]
+    groups += [f"(?P<{intent}>{alternation(words)})" for intent, words in intents.items()]
+    groups += [
+        f"(?P<what>{question})",
+        f"(?P<have>{alternation(answers)})",
+        # Units are only peeked at, so keywords right after a number are still matched
+        rf"(?P<qty>\d+(?=(?P<ws>\s*)(?P<unit>{letters}*))"
+        rf"(?:(?=(?:\s*(?:{alternation(strip_keywords)}))*\s*(?P<strip_unit>{alternation(strip_units)})))?)",
+    ]
+    pattern = '|'.join(groups)
+    # Skip positions no token can start at without trying every alternative there
+    starts = _first_characters([*fillers, *(word for words in intents.values() for word in words),
+                                question, *answers])
+    if starts is not None:
+        pattern = rf"(?=[{re.escape(''.join(sorted(starts)))}\d])(?:{pattern})"
+    return re.compile(unicodedata.normalize('NFC', pattern))
+
+def _first_characters(fragments: List[str]) -> Optional[Set[str]]:
+    """Characters every match of the regex fragments starts with, or None
+    if a fragment doesn't plainly start with a literal character"""
+    starts = set()
+    for fragment in fragments:
+        fragment = unicodedata.normalize('NFC', fragment)
+        if not fragment[:1].isalnum() or fragment[1:2] in ('?', '*', '{') or '|' in fragment:
+            return None
+        starts.add(fragment[0])
+    return starts
+
+class LanguagePack:
+    """One language's compiled command grammar and product vocabulary.
+    
+    Built from a rules module in app.services.language_packs. Languages
+    other than English name products in their own words, so their PRODUCTS
+    table maps each spoken name to a catalog product and the pack gets its
+    own keyword and misspelling indexes over the spoken names. Words of
+    those names, the rules' KNOWN_WORDS and command words are known_words,
+    which are never corrected.
+    """
+    
+    def __init__(self, code: str, rules):
+        self.code = code
+        self.intents = list(rules.INTENTS)
+        self.strip_keywords = frozenset(_normalize(word) for word in rules.STRIP_KEYWORDS)
+        self.stopwords = frozenset(_normalize(word) for word in rules.STOPWORDS)
+        self.command_re = _compile_command_pattern(rules.INTENTS, rules.LIST_QUESTION, rules.FILLER_PHRASES,
+                                                   rules.STRIP_KEYWORDS, rules.STRIP_UNITS, rules.LETTERS)
+        self.quantity_unit_re = re.compile(unicodedata.normalize('NFC', '|'.join(rules.QUANTITY_UNITS)))
+        # How far past a match the command pattern can look, for resuming scans (see _scan)
+        phrases = [word for words in rules.INTENTS.values() for word in words]
+        phrases += [rules.LIST_QUESTION[0], *rules.LIST_QUESTION[1], *rules.FILLER_PHRASES,
+                    *rules.STRIP_KEYWORDS, *rules.STRIP_UNITS]
+        self.lookahead = max(len(phrase) for phrase in phrases) + 1
+        self.keyword_run_re = re.compile(unicodedata.normalize(
+            'NFC', rf"(?:\s*(?:{'|'.join(sorted(rules.STRIP_KEYWORDS, key=len, reverse=True))}))*"
+        ))
+        
+        names = product_vocabulary() if rules.PRODUCTS is None else [_normalize(name) for name in rules.PRODUCTS]
+        command_words = [word for words in rules.INTENTS.values() for word in words] + rules.LIST_QUESTION[1]
+        self.known_words = frozenset(
+            word for phrase in (*names, *command_words, *rules.KNOWN_WORDS, *rules.STOPWORDS, *rules.STRIP_KEYWORDS)
+            for word in _normalize(phrase).split()
+        )
+        
+        # Item key -> category; keys repeat across commands far more than commands do
+        self.categories = LRUCache(maxsize=4096)
+        
+        if rules.PRODUCTS is None:
+            self.products, self.fuzzy = product_index, fuzzy_products
+            return
+        self.products = KeywordIndex()
+        for name, product in rules.PRODUCTS.items():
+            category = product_index.lookup(product, 'category')
+            if category is not None:
+                self.products.add(_normalize(name), 'category', category)
+            alternatives = product_index.lookup(product, 'alternatives')
+            if alternatives is not None:
+                self.products.add(_normalize(name), 'alternatives', alternatives)
+        self.products.build()
+        self.fuzzy = build_fuzzy_index(names)
+
+def _normalize(text: str) -> str:
+    """Lowercase and NFC-normalize, so precomposed and combining spellings match"""
+    text = text.lower().strip()
+    return text if text.isascii() else unicodedata.normalize('NFC', text)
+
+# Languages with a rules module; each is compiled on first use and kept for the process
+AVAILABLE_LANGUAGES = frozenset(module.name for module in pkgutil.iter_modules(language_packs.__path__))
+_packs: Dict[str, LanguagePack] = {}
+_packs_lock = threading.Lock()
+
+def get_language_pack(language: Optional[str]) -> LanguagePack:
+    """Get the compiled pack for a language code like "es" or "es-ES"; English if there is none"""
+    pack = _packs.get(language or NLPProcessor.DEFAULT_LANGUAGE)
+    if pack is not None:
+        return pack
+    code = (language or NLPProcessor.DEFAULT_LANGUAGE).split('-')[0].lower()
+    if code not in AVAILABLE_LANGUAGES:
+        code = NLPProcessor.DEFAULT_LANGUAGE
+    pack = _packs.get(code)
+    if pack is None:
+        with _packs_lock:
+            pack = _packs.get(code)
+            if pack is None:
+                rules = importlib.import_module(f'{language_packs.__name__}.{code}')
+                pack = _packs[code] = LanguagePack(code, rules)
+    return pack
+
+class ScanCheckpoint(NamedTuple):
+    """State of NLPProcessor._scan() right after one match.
+    
+    The scan can resume from pos on any text that agrees with the scanned
+    one up to horizon, or from any later position before the next match
+    that is at least LanguagePack.lookahead characters short of where the
+    texts differ. That holds when words are separated by single spaces,
+    which is how speech recognizers transcribe them.
+    """
+    start: int
+    pos: int
+    horizon: int
+    found: FrozenSet[str]
+    seen_what: bool
+    counted_unit: bool
+    quantity: Optional[Tuple[int, str]]
+    pieces: Tuple[str, ...]
+    last: int
 
 class NLPProcessor:
-    """Natural Language Processing for voice commands"""
-    
-    # Intent patterns
-    INTENTS = {
-        'ADD': [
-            r'(add|buy|get|need|add me|purchase|put|include)',
-            r'(i\s+(?:need|want|should|must)\s+(?:to\s+)?(?:buy|get|purchase))',
-        ],
-        'REMOVE': [
-            r'(remove|delete|cancel|take off|strike|eliminate)',
-        ],
-        'LIST': [
-            r'(show|display|list|what.*have|what.*got|check)',
-        ],
-        'SEARCH': [
-            r'(search|find|look for|where)',
-        ],
-        'QUANTITY': [
-            r'(\d+)\s*(bottle|piece|kg|liter|pack|box|item|items)',
-        ],
-    }
+    """Natural Language Processing for voice commands.
+    
+    Commands are parsed with the rules of their language (see
+    app.services.language_packs); unknown languages are parsed as English.
+    """
+    
+    DEFAULT_LANGUAGE = 'en'
     
     # Categories mapping
-    CATEGORIES = {
-        'dairy': ['milk', 'cheese', 'butter', 'yogurt', 'cream', 'eggs'],
-        'produce': ['apple', 'banana', 'orange', 'carrot', 'broccoli', 'tomato', 'lettuce'],
-        'meat': ['chicken', 'beef', 'pork', 'fish', 'turkey', 'lamb'],
-        'snacks': ['chips', 'cookie', 'candy', 'chocolate', 'popcorn', 'nuts'],
-        'beverages': ['water', 'juice', 'soda', 'coffee', 'tea', 'milk', 'wine', 'beer'],
-        'bakery': ['bread', 'roll', 'bagel', 'donut', 'cake', 'pastry'],
-        'frozen': ['ice cream', 'frozen vegetable', 'frozen pizza', 'frozen meal'],
-        'pantry': ['rice', 'pasta', 'oil', 'salt', 'sugar', 'flour', 'spice'],
-        'personal_care': ['soap', 'shampoo', 'toothpaste', 'deodorant', 'lotion'],
-        'household': ['detergent', 'paper towel', 'soap', 'cleaner'],
-    }
-    
-    def __init__(self):
-        self.synonyms = {
-            'milk': ['dairy milk', 'whole milk', 'skim milk'],
-            'bread': ['whole wheat bread', 'white bread', 'brown bread'],
-            'water': ['mineral water', 'sparkling water'],
-        }
+    CATEGORIES = CATEGORIES
+    
+    # Shortest word fixed on its own inside a multi-word item
+    MIN_CORRECTED_WORD = 5
+    
+    language_pack = staticmethod(get_language_pack)
     
-    def process_command(self, text: str) -> Dict:
+    def __init__(self, cache: Optional[LRUCache] = None):
+        self.cache = cache if cache is not None else command_cache
+        self.synonyms = SYNONYMS
+    
+    @profiling.timed('nlp')
+    def process_command(self, text: str, language: Optional[str] = None) -> Dict:
         """Process voice command and extract intent and entities"""
-        text = text.lower().strip()
+        pack = get_language_pack(language)
+        text = _normalize(text)
+        
+        key = (pack.code, text)
+        result = self.cache.get(key)
+        if result is None:
+            metrics.NLP_CACHE_LOOKUPS.inc('miss')
+            start = time.perf_counter()
+            result = self._parse(text, pack)
+            metrics.NLP_PARSE_SECONDS.observe(time.perf_counter() - start)
+            self.cache.put(key, result)
+        else:
+            metrics.NLP_CACHE_LOOKUPS.inc('hit')
         
-        result = {
+        # Cached results are shared, so callers only ever get copies
+        return self._copy_result(result)
+    
+    def process_commands(self, texts: List[str], language: Optional[str] = None) -> List[Dict]:
+        """Process a batch of voice commands, returning results in input order"""
+        parsed = {}
+        results = []
+        
+        for text in texts:
+            key = _normalize(text)
+            if key not in parsed:
+                parsed[key] = self.process_command(key, language)
+            results.append(self._copy_result(parsed[key]))
+        
+        return results
+    
+    def _parse(self, text: str, pack: Optional[LanguagePack] = None) -> Dict:
+        """Parse an already normalized command"""
+        pack = pack or get_language_pack(self.DEFAULT_LANGUAGE)
+        intent, items, quantity = self._scan(text, pack)
+        return self._result(text, pack, intent, items, [self._item_key(item, pack) for item in items], quantity)
+    
+    def _result(self, text: str, pack: LanguagePack, intent: str, items: List[str], keys: List[str],
+                quantity: Tuple[int, str]) -> Dict:
+        """Assemble a parse result from scanned items and their keys"""
+        return {
             'original': text,
-            'intent': self._extract_intent(text),
-            'items': self._extract_items(text),
-            'quantity': self._extract_quantity(text),
-            'category': None,
+            'intent': intent,
+            'items': items,
+            'keys': keys,
+            'quantity': quantity,
+            'category': self._categorize_item(keys[0], pack) if keys else None,
         }
+    
+    @staticmethod
+    def _copy_result(result: Dict) -> Dict:
+        return dict(result, items=list(result['items']), keys=list(result['keys']))
+    
+    def cache_stats(self) -> Dict:
+        """Get hit/miss counters of the parsed command cache"""
+        return self.cache.stats()
+    
+    # Intent and item extraction share this one pass over the text
+    @profiling.timed('nlp.scan')
+    def _scan(self, text: str, pack: Optional[LanguagePack] = None, resume: Optional[ScanCheckpoint] = None,
+              checkpoints: Optional[List[ScanCheckpoint]] = None) -> Tuple[str, List[str], Tuple[int, str]]:
+        """Extract intent, items and quantity in a single pass over the text.
+        
+        With resume, a checkpoint taken while scanning an earlier text that
+        this one extends, only the text after it is scanned again. With
+        checkpoints, one is appended after every match.
+        """
+        pack = pack or get_language_pack(self.DEFAULT_LANGUAGE)
+        if resume is None:
+            pos = horizon = 0
+            found = set()
+            seen_what = False
+            counted_unit = False
+            quantity = None
+            pieces = []
+            last = 0
+        else:
+            _, pos, horizon, found, seen_what, counted_unit, quantity, pieces, last = resume
+            found = set(found)
+            pieces = list(pieces)
+        
+        for match in pack.command_re.finditer(text, pos):
+            kind = match.lastgroup
+            strip_end = None
+            
+            if kind == 'qty':
+                unit = match.group('unit')
+                if quantity is None:
+                    quantity = (int(match.group('qty')), unit or 'piece')
+                if pack.quantity_unit_re.match(unit):
+                    counted_unit = True
+                if match.group('strip_unit'):
+                    strip_end = match.end('strip_unit')
+            elif kind == 'filler':
+                found.add('LIST')
+                strip_end = match.end()
+            elif kind == 'what':
+                seen_what = True
+            elif kind == 'have':
+                if seen_what:
+                    found.add('LIST')
+            else:
+                found.add(kind)
+                if match.group() in pack.strip_keywords:
+                    strip_end = match.end()
+            
+            if strip_end is not None and match.start() >= last:
+                pieces.append(text[last:match.start()])
+                last = strip_end
+            
+            if checkpoints is not None:
+                # The last character this match (and every earlier one) depended on
+                end = match.end()
+                if kind == 'qty':
+                    # Its lookaheads read the unit word and any keywords before a unit to strip
+                    end = max(match.end('unit'), match.end('strip_unit'), pack.keyword_run_re.match(text, end).end())
+                horizon = max(horizon, end + pack.lookahead)
+                checkpoints.append(ScanCheckpoint(match.start(), match.end(), horizon, frozenset(found),
+                                                  seen_what, counted_unit, quantity, tuple(pieces), last))
+        
+        for intent in pack.intents:
+            if intent in found:
+                break
+        else:
+            intent = 'QUANTITY' if counted_unit else 'UNKNOWN'
         
-        if result['items']:
-            result['category'] = self._categorize_item(result['items'][0])
+        pieces.append(text[last:])
+        stopwords = pack.stopwords
+        items = [item for item in map(str.strip, ''.join(pieces).split(','))
+                 if len(item) > 1 and item not in stopwords]
         
-        return result
+        return intent, items, quantity or (1, 'piece')
     
-    def _extract_intent(self, text: str) -> str:
+    def _extract_intent(self, text: str, language: Optional[str] = None) -> str:
         """Extract intent from text"""
-        for intent, patterns in self.INTENTS.items():
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    return intent
-        return 'UNKNOWN'
+        return self._scan(_normalize(text), get_language_pack(language))[0]
     
-    def _extract_items(self, text: str) -> List[str]:
+    def _extract_items(self, text: str, language: Optional[str] = None) -> List[str]:
         """Extract items from text"""
-        # Remove common stopwords and prepositions
-        stopwords = {'the', 'a', 'an', 'of', 'to', 'and', 'or', 'from', 'in', 'on', 'at', 'by'}
-        
-        # Clean the text
-        cleaned = re.sub(r'(add|buy|get|need|remove|delete|search|find)', '', text, flags=re.IGNORECASE)
-        cleaned = re.sub(r'(\d+\s*(?:bottle|piece|kg|liter|pack|box))', '', cleaned, flags=re.IGNORECASE)
-        cleaned = re.sub(r'(to\s+my\s+list|from\s+my\s+list)', '', cleaned, flags=re.IGNORECASE)
-        
-        # Extract items
-        items = [word.strip() for word in cleaned.split(',') if word.strip() and word.strip() not in stopwords]
-        return [item for item in items if len(item) > 1]
+        return self._scan(_normalize(text), get_language_pack(language))[1]
     
-    def _extract_quantity(self, text: str) -> Tuple[int, str]:
+    def _extract_quantity(self, text: str, language: Optional[str] = None) -> Tuple[int, str]:
         """Extract quantity and unit from text"""
-        match = re.search(r'(\d+)\s*([a-z]+)?', text, re.IGNORECASE)
-        if match:
-            quantity = int(match.group(1))
-            unit = match.group(2) or 'piece'
-            return quantity, unit
-        return 1, 'piece'
-    
-    def _categorize_item(self, item: str) -> str:
-        """Categorize item based on keywords"""
-        item_lower = item.lower()
-        
-        for category, keywords in self.CATEGORIES.items():
-            for keyword in keywords:
-                if keyword in item_lower:
-                    return category
+        return self._scan(_normalize(text), get_language_pack(language))[2]
+    
+    @profiling.timed('nlp.correct')
+    def _item_key(self, item: str, pack: Optional[LanguagePack] = None,
+                  corrected_words: Optional[Dict[str, str]] = None) -> str:
+        """Key a possibly misheard product name by its catalog spelling, e.g. "brocoli" -> "broccoli".
         
-        return 'uncategorized'
+        The key categorizes, prices and dedupes the item; its name stays as
+        spoken. Only words the pack doesn't know are corrected, so "cereal"
+        never becomes "cream", and names that already contain a known
+        product are kept. Words shorter than MIN_CORRECTED_WORD are only
+        fixed as part of a whole name, so "something nice" doesn't turn into
+        "something rice". Fixes of single words are remembered in
+        corrected_words if given.
+        """
+        pack = pack or get_language_pack(self.DEFAULT_LANGUAGE)
+        words = item.split()
+        if pack.known_words.issuperset(words):
+            return item
+        unknown = {word for word in words if len(word) > 1 and word.isalpha() and word not in pack.known_words}
+        if not unknown or pack.products.best_match(item, 'category') is not None:
+            return item
+        corrected = pack.fuzzy.correct(item)
+        # A whole-name fix may only have changed the unknown words
+        if corrected is not None and all(word in corrected.split() for word in words if word not in unknown):
+            return corrected
+        if corrected_words is None:
+            corrected_words = {}
+        keys = []
+        for word in words:
+            fixed = corrected_words.get(word)
+            if fixed is None:
+                fixed = corrected_words[word] = (
+                    (pack.fuzzy.correct(word) if word in unknown and len(word) >= self.MIN_CORRECTED_WORD
+                     else None) or word
+                )
+            keys.append(fixed)
+        return ' '.join(keys)
     
-    def find_alternatives(self, item: str) -> List[str]:
+    @profiling.timed('nlp.categorize')
+    def _categorize_item(self, item: str, pack: Optional[LanguagePack] = None) -> str:
+        """Categorize item based on keywords"""
+        pack = pack or get_language_pack(self.DEFAULT_LANGUAGE)
+        category = pack.categories.get(item)
+        if category is None:
+            category = pack.products.lookup(item, 'category', 'uncategorized')
+            pack.categories.put(item, category)
+        return category
+    
+    def find_alternatives(self, item: str, language: Optional[str] = None) -> List[str]:
         """Find alternative products for a given item"""
-        item_lower = item.lower()
-        
-        # Simple alternative suggestions
-        alternatives = {
-            'milk': ['almond milk', 'soy milk', 'oat milk', 'coconut milk'],
-            'bread': ['whole wheat bread', 'sourdough bread', 'multigrain bread'],
-            'apple': ['pear', 'orange', 'banana'],
-            'coffee': ['tea', 'espresso'],
-        }
-        
-        for key, alts in alternatives.items():
-            if key in item_lower:
-                return alts
-        
-        return []
+        return list(get_language_pack(language).products.lookup(item, 'alternatives', []))
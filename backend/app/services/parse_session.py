@@ -0,0 +1,113 @@
+import os
+import re
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from app.services import metrics, profiling
+from app.services.lru_cache import LRUCache
+from app.services.nlp_processor import NLPProcessor, ScanCheckpoint, _normalize
+
+# Scan checkpoints assume single spaces between words
+_WHITESPACE_RUN = re.compile(r'\s\s')
+
+# Where a session's first scan starts
+SCAN_START = ScanCheckpoint(0, 0, 0, frozenset(), False, False, None, (), 0)
+
+class ParseSession:
+    """Incremental parse of one utterance from its interim transcripts.
+    
+    Recognizers send a growing transcript of what has been said so far and
+    sometimes revise its last words. Each update scans again only from the
+    last checkpoint the new transcript still agrees with, and item names
+    corrected for an earlier transcript aren't corrected again, so parsing
+    every interim transcript costs little more than parsing the new words.
+    Results are the same as process_command() gives for the same text.
+    """
+    
+    def __init__(self, nlp: NLPProcessor, language: Optional[str] = None):
+        self.nlp = nlp
+        self.pack = nlp.language_pack(language)
+        self.text = ''
+        self._checkpoints: List[ScanCheckpoint] = []
+        self._keys: Dict[str, str] = {}
+        self._corrected_words: Dict[str, str] = {}
+        self._result: Optional[Dict] = None
+        self._lock = threading.Lock()
+    
+    def update(self, transcript: str) -> Dict:
+        """Parse the latest transcript of the utterance"""
+        text = _normalize(transcript)
+        with metrics.NLP_PARTIAL_PARSE_SECONDS.time(), self._lock:
+            # Final transcripts usually repeat the last interim one
+            if text == self.text and self._result is not None:
+                return self.nlp._copy_result(self._result)
+            
+            checkpoints = self._checkpoints
+            agreed = len(os.path.commonprefix([self.text, text]))
+            # The earlier scan found no match between the last checkpoint kept
+            # and the first one dropped, and those that end far enough before
+            # the first difference can't start matching now either
+            next_match = len(self.text)
+            while checkpoints and checkpoints[-1].horizon > agreed:
+                next_match = checkpoints.pop().start
+            if _WHITESPACE_RUN.search(text):
+                checkpoints.clear()
+                next_match = 0
+            resume = checkpoints[-1] if checkpoints else SCAN_START
+            resume = resume._replace(pos=max(resume.pos, min(next_match, agreed - self.pack.lookahead)))
+            
+            intent, items, quantity = self.nlp._scan(text, self.pack, resume, checkpoints)
+            keys = []
+            for item in items:
+                key = self._keys.get(item)
+                if key is None:
+                    key = self._keys[item] = self.nlp._item_key(item, self.pack, self._corrected_words)
+                keys.append(key)
+            self.text = text
+            self._result = self.nlp._result(text, self.pack, intent, items, keys, quantity)
+            return self.nlp._copy_result(self._result)
+    
+    def finish(self, transcript: str) -> Dict:
+        """Parse the final transcript, caching it like process_command() would"""
+        result = self.update(transcript)
+        self.nlp.cache.put((self.pack.code, result['original']), self.nlp._copy_result(result))
+        return result
+
+class ParseSessions:
+    """Open parse sessions of this worker process.
+    
+    Sessions are dropped ttl seconds after their last update. A session id
+    this worker doesn't know, e.g. one opened on another worker, starts a
+    new session, so results stay correct and only the reuse is lost.
+    """
+    
+    def __init__(self, nlp: NLPProcessor, maxsize: int = 1000, ttl: float = 30.0):
+        self.nlp = nlp
+        self._sessions = LRUCache(maxsize=maxsize, ttl=ttl)
+    
+    def update(self, session_id: Optional[str], transcript: str,
+               language: Optional[str] = None) -> Tuple[str, Dict]:
+        """Parse an interim transcript, returning the session id and speculative result"""
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None or session.pack is not self.nlp.language_pack(language):
+            session_id = session_id or uuid.uuid4().hex
+            session = ParseSession(self.nlp, language)
+        self._sessions.put(session_id, session)
+        return session_id, session.update(transcript)
+    
+    @profiling.timed('nlp.session')
+    def finish(self, session_id: Optional[str], transcript: str, language: Optional[str] = None) -> Dict:
+        """Parse the final transcript and close the session"""
+        session = self._sessions.pop(session_id) if session_id else None
+        if session is None or session.pack is not self.nlp.language_pack(language):
+            return self.nlp.process_command(transcript, language)
+        return session.finish(transcript)
+
+def create_parse_sessions(nlp: NLPProcessor) -> ParseSessions:
+    """Build the sessions, sized by PARSE_SESSION_LIMIT and PARSE_SESSION_TTL"""
+    return ParseSessions(
+        nlp,
+        maxsize=int(os.environ.get('PARSE_SESSION_LIMIT', 1000)),
+        ttl=float(os.environ.get('PARSE_SESSION_TTL', 30)),
+    )
@@ -0,0 +1,257 @@
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Built-in prices used when no PRICE_CATALOG is configured
+DEFAULT_PRICES = {
+    'milk': (2.50, 4.00, 3.20),
+    'bread': (1.50, 3.50, 2.50),
+    'eggs': (2.50, 4.50, 3.50),
+    'apple': (0.50, 1.50, 1.00),
+    'chicken': (4.00, 8.00, 6.00),
+}
+
+# Range reported for items the catalog doesn't know
+UNKNOWN_RANGE = (1.00, 10.00, 5.00)
+
+MAGIC = b'PRC1'
+HEADER = struct.Struct('<4sQ')
+
+class PriceCatalog:
+    """Immutable columnar price table over one flat buffer.
+    
+    The buffer holds a header, count + 1 name offsets, the min, max and avg
+    columns as float64, then every lowercased name in UTF-8 byte order. The
+    columns are memoryviews into the buffer and names are found by binary
+    search, so a compiled catalog can be memory-mapped and served without
+    parsing it or building per-row Python objects. Arrays use native byte
+    order; compile catalogs on the architecture that serves them.
+    
+    Every SPARSE_STEP-th name is copied into a small in-memory list, so
+    lookups bisect that first and only probe the buffer within one block.
+    """
+    
+    SPARSE_STEP = 64
+    
+    def __init__(self, buffer):
+        magic, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError('Not a price catalog')
+        self.count = count
+        self._buffer = buffer
+        view = memoryview(buffer)
+        start = HEADER.size
+        self._offsets = view[start:start + 8 * (count + 1)].cast('Q')
+        start += 8 * (count + 1)
+        self.mins, self.maxs, self.avgs = (
+            view[start + 8 * count * i:start + 8 * count * (i + 1)].cast('d') for i in range(3)
+        )
+        self._names_start = start + 24 * count
+        self._sparse = [bytes(self._name(row)) for row in range(0, count, self.SPARSE_STEP)]
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _name(self, row: int) -> bytes:
+        base = self._names_start
+        return self._buffer[base + self._offsets[row]:base + self._offsets[row + 1]]
+    
+    def row(self, item: str) -> int:
+        """Get the row of an item, or -1 if the catalog doesn't have it"""
+        key = item.strip().lower().encode()
+        # The sparse index narrows the search to one block of rows in C
+        block = bisect.bisect_right(self._sparse, key) - 1
+        if block < 0:
+            return -1
+        lo = block * self.SPARSE_STEP
+        hi = min(lo + self.SPARSE_STEP, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self._name(lo) == key else -1
+    
+    def rows(self, items: Iterable[str]) -> List[int]:
+        """Get the row of every item, -1 for unknown ones"""
+        return [self.row(item) for item in items]
+    
+    def names(self) -> Iterator[str]:
+        """Yield every item name in catalog order"""
+        for row in range(self.count):
+            yield bytes(self._name(row)).decode()
+
+def pack_catalog(entries: Iterable[Tuple[str, float, float, float]]) -> bytes:
+    """Build a catalog buffer from (name, min, max, avg) rows; later rows win"""
+    table: Dict[bytes, Tuple[float, float, float]] = {}
+    for name, low, high, avg in entries:
+        table[name.strip().lower().encode()] = (low, high, avg)
+    keys = sorted(table)
+    
+    offsets = array('Q', [0])
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+    columns = [array('d', (table[key][i] for key in keys)) for i in range(3)]
+    return b''.join([
+        HEADER.pack(MAGIC, len(keys)),
+        offsets.tobytes(),
+        *(column.tobytes() for column in columns),
+        *keys,
+    ])
+
+def read_csv(path: str) -> Iterator[Tuple[str, float, float, float]]:
+    """Yield rows of a CSV with name, min and max columns and an optional avg"""
+    with open(path, newline='') as f:
+        for record in csv.DictReader(f):
+            low, high = float(record['min']), float(record['max'])
+            avg = record.get('avg')
+            yield record['name'], low, high, float(avg) if avg else (low + high) / 2
+
+def read_parquet(path: str) -> Iterator[Tuple[str, float, float, float]]:
+    """Yield rows of a Parquet file with the same columns as read_csv().
+    
+    Needs pyarrow (see requirements-offline.txt).
+    """
+    import pyarrow.parquet as pq
+    
+    parquet = pq.ParquetFile(path)
+    has_avg = 'avg' in parquet.schema_arrow.names
+    columns = ['name', 'min', 'max'] + (['avg'] if has_avg else [])
+    for batch in parquet.iter_batches(columns=columns):
+        data = batch.to_pydict()
+        avgs = data['avg'] if has_avg else [None] * batch.num_rows
+        for name, low, high, avg in zip(data['name'], data['min'], data['max'], avgs):
+            yield name, low, high, avg if avg is not None else (low + high) / 2
+
+def open_catalog(path: str) -> PriceCatalog:
+    """Load a .csv or .parquet catalog into memory, or memory-map a compiled one"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return PriceCatalog(pack_catalog(read_csv(path)))
+    if extension == '.parquet':
+        return PriceCatalog(pack_catalog(read_parquet(path)))
+    with open(path, 'rb') as f:
+        return PriceCatalog(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def compile_catalog(source: str, target: str):
+    """Convert a .csv or .parquet catalog to the memory-mappable format"""
+    catalog = open_catalog(source)
+    temp_path = f'{target}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(catalog._buffer)
+    # Replace rather than rewrite, so workers mapping the old file keep a valid copy
+    os.replace(temp_path, target)
+
+class PriceEngine:
+    """Price lookups served from the current catalog.
+    
+    When built from a path, the file is checked at most every
+    check_interval seconds and a changed catalog is loaded on a background
+    thread, then swapped in with a single assignment. Requests keep using
+    the old catalog until then, so reloading millions of rows never blocks
+    them.
+    """
+    
+    def __init__(self, catalog: Optional[PriceCatalog] = None, path: Optional[str] = None,
+                 check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._catalog = catalog if catalog is not None else PriceCatalog(pack_catalog(
+            (name, *prices) for name, prices in DEFAULT_PRICES.items()
+        ))
+        self._signature = self._stat() if path else None
+        self._checked_at = time.monotonic()
+        self._reloading = threading.Lock()
+        self.reloads = 0
+    
+    @property
+    def catalog(self) -> PriceCatalog:
+        if self.path and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._stat() != self._signature:
+                self.reload()
+        return self._catalog
+    
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+    
+    def reload(self) -> bool:
+        """Start loading the catalog file in the background; False if a reload is running"""
+        if not self._reloading.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._reload, name='price-catalog-reload', daemon=True).start()
+        return True
+    
+    def _reload(self):
+        signature = self._stat()
+        try:
+            self._catalog = open_catalog(self.path)
+            self.reloads += 1
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the old catalog until the file changes again
+            print(f"Price catalog reload failed: {e}", file=sys.stderr)
+        finally:
+            self._signature = signature
+            self._reloading.release()
+    
+    def get_price_range(self, item: str) -> Dict:
+        """Get the min, max and avg price of one item"""
+        return self.get_price_ranges([item])[0]
+    
+    def get_price_ranges(self, items: Sequence[str]) -> List[Dict]:
+        """Get the price range of every item, the generic range for unknown ones"""
+        catalog = self.catalog
+        mins, maxs, avgs = catalog.mins, catalog.maxs, catalog.avgs
+        ranges = []
+        for row in catalog.rows(items):
+            if row < 0:
+                low, high, avg = UNKNOWN_RANGE
+            else:
+                low, high, avg = mins[row], maxs[row], avgs[row]
+            ranges.append({'min': low, 'max': high, 'avg': avg, 'known': row >= 0})
+        return ranges
+    
+    def estimate_totals(self, names: Sequence[str], quantities: Sequence[float]) -> Dict:
+        """Sum min, max and avg prices times quantities over a whole list in one pass"""
+        catalog = self.catalog
+        mins, maxs, avgs = catalog.mins, catalog.maxs, catalog.avgs
+        low = high = avg = 0.0
+        priced = 0
+        for row, quantity in zip(catalog.rows(names), quantities):
+            if row >= 0:
+                low += mins[row] * quantity
+                high += maxs[row] * quantity
+                avg += avgs[row] * quantity
+                priced += 1
+        return {
+            'min': round(low, 2),
+            'max': round(high, 2),
+            'avg': round(avg, 2),
+            'priced_items': priced,
+            'unpriced_items': len(names) - priced,
+        }
+
+def create_price_engine() -> PriceEngine:
+    """Serve the catalog at PRICE_CATALOG if set, else the built-in prices"""
+    path = os.environ.get('PRICE_CATALOG')
+    if not path:
+        return PriceEngine()
+    return PriceEngine(open_catalog(path), path, float(os.environ.get('PRICE_CATALOG_CHECK_INTERVAL', 5)))
+
+if __name__ == '__main__':
+    # Offline conversion: python -m app.services.price_catalog prices.csv prices.bin
+    source, target = sys.argv[1:3]
+    compile_catalog(source, target)
+    print(f"Compiled {len(open_catalog(target)):,} prices from {source} into {target}")
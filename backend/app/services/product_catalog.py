@@ -0,0 +1,78 @@
+from typing import List
+from app.services.fuzzy_index import FuzzyIndex
+from app.services.keyword_index import KeywordIndex
+
+# Categories mapping
+CATEGORIES = {
+    'dairy': ['milk', 'cheese', 'butter', 'yogurt', 'cream', 'eggs'],
+    'produce': ['apple', 'banana', 'orange', 'carrot', 'broccoli', 'tomato', 'lettuce'],
+    'meat': ['chicken', 'beef', 'pork', 'fish', 'turkey', 'lamb'],
+    'snacks': ['chips', 'cookie', 'candy', 'chocolate', 'popcorn', 'nuts'],
+    'beverages': ['water', 'juice', 'soda', 'coffee', 'tea', 'milk', 'wine', 'beer'],
+    'bakery': ['bread', 'roll', 'bagel', 'donut', 'cake', 'pastry'],
+    'frozen': ['ice cream', 'frozen vegetable', 'frozen pizza', 'frozen meal'],
+    'pantry': ['rice', 'pasta', 'oil', 'salt', 'sugar', 'flour', 'spice'],
+    'personal_care': ['soap', 'shampoo', 'toothpaste', 'deodorant', 'lotion'],
+    'household': ['detergent', 'paper towel', 'soap', 'cleaner'],
+}
+
+# Alternative product suggestions
+ALTERNATIVES = {
+    'milk': ['almond milk', 'soy milk', 'oat milk', 'coconut milk'],
+    'bread': ['whole wheat bread', 'sourdough bread', 'multigrain bread'],
+    'apple': ['pear', 'orange', 'banana'],
+    'coffee': ['tea', 'espresso'],
+}
+
+# Substitutes when an item is unavailable
+SUBSTITUTES = {
+    'milk': ['almond milk', 'soy milk', 'oat milk', 'coconut milk'],
+    'eggs': ['tofu', 'applesauce', 'mashed banana'],
+    'butter': ['coconut oil', 'olive oil', 'margarine'],
+    'wheat bread': ['rye bread', 'sourdough', 'multigrain'],
+    'chicken': ['turkey', 'tofu', 'fish'],
+    'beef': ['ground turkey', 'lean pork', 'veggie burger'],
+}
+
+# Common product variants
+SYNONYMS = {
+    'milk': ['dairy milk', 'whole milk', 'skim milk'],
+    'bread': ['whole wheat bread', 'white bread', 'brown bread'],
+    'water': ['mineral water', 'sparkling water'],
+}
+
+def product_vocabulary() -> List[str]:
+    """Every product name the catalog knows, in a stable order"""
+    names = [keyword for keywords in CATEGORIES.values() for keyword in keywords]
+    for table in (ALTERNATIVES, SUBSTITUTES, SYNONYMS):
+        for keyword, related in table.items():
+            names.append(keyword)
+            names.extend(related)
+    return list(dict.fromkeys(names))
+
+def build_product_index() -> KeywordIndex:
+    """Build the keyword index shared by categorization and substitute lookups"""
+    index = KeywordIndex()
+    for category, keywords in CATEGORIES.items():
+        for keyword in keywords:
+            index.add(keyword, 'category', category)
+    for keyword, alternatives in ALTERNATIVES.items():
+        index.add(keyword, 'alternatives', alternatives)
+    for keyword, substitutes in SUBSTITUTES.items():
+        index.add(keyword, 'substitutes', substitutes)
+    index.build()
+    return index
+
+def build_fuzzy_index(names: List[str]) -> FuzzyIndex:
+    """Build the misspelling-tolerant index over product names and their words"""
+    index = FuzzyIndex()
+    for name in names:
+        index.add(name)
+    # Single words of multi-word names let "frozen piza" be fixed word by word
+    for name in names:
+        for word in name.split():
+            index.add(word)
+    return index
+
+product_index = build_product_index()
+fuzzy_products = build_fuzzy_index(product_vocabulary())
@@ -0,0 +1,195 @@
+import cProfile
+import functools
+import glob
+import hmac
+import io
+import itertools
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Request header asking for a profile: 1 for stage timings, cprofile for a cProfile dump as well
+HEADER = 'X-Profile'
+
+# Request header carrying PROFILING_TOKEN, without which HEADER is ignored and /debug/profile refused
+TOKEN_HEADER = 'X-Profile-Token'
+
+# Stage timings of the request being profiled, name -> [seconds, calls]; None when it isn't
+_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar('profiling_timings', default=None)
+
+MODES = ('off', 'header', 'always')
+
+def profiling_mode(value: Optional[str]) -> str:
+    """Parse a PROFILING value into one of MODES; boolean spellings mean off or header"""
+    mode = (value or '').strip().lower()
+    if mode in ('', '0', 'false', 'no'):
+        return 'off'
+    if mode in ('1', 'true', 'yes', 'on'):
+        return 'header'
+    if mode not in MODES:
+        raise ValueError(f"PROFILING must be one of {', '.join(MODES)}, not {value!r}")
+    return mode
+
+# Read once at import: with profiling off, timed() leaves functions untouched
+ENABLED = profiling_mode(os.environ.get('PROFILING')) != 'off'
+
+def _add(timings: Dict[str, List[float]], name: str, seconds: float):
+    total = timings.get(name)
+    if total is None:
+        timings[name] = [seconds, 1]
+    else:
+        total[0] += seconds
+        total[1] += 1
+
+def timed(name: str) -> Callable:
+    """Time every call of the decorated function as a stage of profiled requests.
+    
+    Calls outside a profiled request only pay for one context variable
+    lookup, and when PROFILING is off at import the function is returned
+    as is, so the hooks cost nothing at all.
+    """
+    def decorate(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _timings.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _add(timings, name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def server_timing(timings: Dict[str, List[float]]) -> str:
+    """Format stage timings as a Server-Timing header value, in milliseconds"""
+    return ', '.join(
+        f'{name};dur={seconds * 1e3:.3f}' + (f';desc="{int(calls)} calls"' if calls > 1 else '')
+        for name, (seconds, calls) in timings.items()
+    )
+
+class ProfiledRequest(NamedTuple):
+    start: float
+    timings: Dict[str, List[float]]
+    token: Token
+    profile: Optional[cProfile.Profile]
+
+class Profiler:
+    """Opt-in profiling of requests.
+    
+    mode is off (the default; no request is profiled and the header is
+    ignored), header (requests sending X-Profile are) or always. Profiled
+    requests get their stage timings back in a Server-Timing header. A
+    sample_rate share of them, and those sending X-Profile: cprofile, also
+    run under cProfile, and the dump is written to directory. Each process
+    keeps only its last `keep` dumps. report() merges the dumps of every
+    worker.
+    
+    Clients only choose what is profiled, and read the report, when they
+    send token; with no token set the X-Profile header is always ignored.
+    
+    Only one request per process is under cProfile at a time. cProfile
+    follows the OS thread, so under gevent a dump also shows the other
+    greenlets that ran during the request.
+    """
+    
+    MODES = MODES
+    
+    def __init__(self, mode: str = 'off', sample_rate: float = 0.0, directory: Optional[str] = None,
+                 keep: int = 20, token: Optional[str] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Profiling mode must be one of {', '.join(self.MODES)}, not {mode!r}")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'voice-assistant-profiles')
+        self.keep = keep
+        self.token = token
+        self._profiling = threading.Lock()
+        self._dumps = itertools.count()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.mode != 'off'
+    
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether a request sent the profiling token"""
+        return bool(self.token) and token is not None and hmac.compare_digest(
+            token.encode(), self.token.encode()
+        )
+    
+    def start(self, header: Optional[str]) -> Optional[ProfiledRequest]:
+        """Start profiling a request if its header or the mode asks for it"""
+        header = (header or '').strip().lower()
+        if self.mode == 'off' or (self.mode == 'header' and header in ('', '0', 'false', 'no')):
+            return None
+        
+        profile = None
+        if (header == 'cprofile' or random.random() < self.sample_rate) and self._profiling.acquire(blocking=False):
+            profile = cProfile.Profile()
+            profile.enable()
+        timings = {}
+        return ProfiledRequest(time.perf_counter(), timings, _timings.set(timings), profile)
+    
+    def finish(self, profiled: ProfiledRequest, endpoint: str) -> str:
+        """Stop profiling a request, returning its Server-Timing header value"""
+        total = time.perf_counter() - profiled.start
+        _timings.reset(profiled.token)
+        if profiled.profile is not None:
+            profiled.profile.disable()
+            self._profiling.release()
+            self._dump(profiled.profile, endpoint)
+        return server_timing({**profiled.timings, 'total': [total, 1]})
+    
+    def _dump(self, profile: cProfile.Profile, endpoint: str):
+        os.makedirs(self.directory, exist_ok=True)
+        slot = next(self._dumps) % self.keep
+        # Overwrite this process's oldest dump; the endpoint lets report() filter by it
+        for path in glob.glob(os.path.join(self.directory, f'{os.getpid()}-{slot}-*.prof')):
+            os.remove(path)
+        profile.dump_stats(os.path.join(self.directory, f'{os.getpid()}-{slot}-{endpoint}.prof'))
+    
+    def stats(self, endpoint: Optional[str] = None) -> Optional[pstats.Stats]:
+        """Merge the kept cProfile dumps, optionally of one endpoint only; None if there are none"""
+        if endpoint and not re.fullmatch(r'[\w.]+', endpoint):
+            return None
+        paths = sorted(glob.glob(os.path.join(self.directory, f'*-*-{endpoint or "*"}.prof')))
+        merged = None
+        for path in paths:
+            try:
+                if merged is None:
+                    merged = pstats.Stats(path, stream=io.StringIO())
+                else:
+                    merged.add(path)
+            except (OSError, EOFError, TypeError, ValueError):
+                # Being rewritten by its worker; skip it this time
+                continue
+        return merged
+    
+    def report(self, endpoint: Optional[str] = None, sort: str = 'cumulative', limit: int = 40) -> str:
+        """Render the merged dumps as a pstats text report"""
+        merged = self.stats(endpoint)
+        if merged is None:
+            return 'No profiles recorded yet\n'
+        merged.stream = io.StringIO()
+        merged.sort_stats(sort).print_stats(limit)
+        return merged.stream.getvalue()
+
+def create_profiler() -> Profiler:
+    """Build the profiler from the PROFILING* environment variables"""
+    return Profiler(
+        profiling_mode(os.environ.get('PROFILING')),
+        float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+        os.environ.get('PROFILING_DIR') or None,
+        int(os.environ.get('PROFILING_KEEP', 20)),
+        os.environ.get('PROFILING_TOKEN') or None,
+    )
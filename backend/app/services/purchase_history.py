@@ -0,0 +1,187 @@
+import itertools
+import os
+import sqlite3
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services.lock_stripes import LockStripes
+from app.services.sqlite_db import SQLiteDatabase
+
+class PurchaseHistory:
+    """Append-only log of purchases, read per user and incrementally.
+    
+    Nothing is loaded up front: a user's purchases are only read when that
+    user is first asked about, so startup cost doesn't depend on history size.
+    """
+    
+    def record(self, user_id: str, items: List[str], purchased_at: Optional[float] = None):
+        """Append one basket of purchased items"""
+        raise NotImplementedError
+    
+    def revision(self, user_id: str) -> int:
+        """Get a counter that grows with every basket the user records"""
+        raise NotImplementedError
+    
+    def purchases(self, user_id: str) -> List[Tuple[str, float]]:
+        """Get the user's full (item, timestamp) log, oldest first"""
+        raise NotImplementedError
+    
+    def purchases_since(self, user_id: str, cursor: int) -> Tuple[int, int, List[Tuple[str, float]]]:
+        """Get (revision, cursor, purchases) for what the user recorded after cursor.
+        
+        Start from cursor 0 and pass back the returned cursor to read only
+        newer purchases; the revision is the one they bring the user up to.
+        """
+        raise NotImplementedError
+    
+    def baskets_since(self, cursor: int) -> Iterator[Tuple[int, List[str]]]:
+        """Iterate over (cursor, basket) for every basket recorded after cursor, oldest first.
+        
+        Start from cursor 0 and pass back the last cursor seen to read only
+        newer baskets.
+        """
+        raise NotImplementedError
+    
+    def all_purchases(self) -> Iterator[Tuple[str, str, float]]:
+        """Iterate over every (user_id, item, timestamp), for offline model rebuilds"""
+        raise NotImplementedError
+    
+    def revisions(self) -> Dict[str, int]:
+        """Get every user's current revision"""
+        raise NotImplementedError
+
+class InMemoryPurchaseHistory(PurchaseHistory):
+    """Purchase log held in memory; private to the worker process.
+    
+    Recording holds the user's lock stripe, so concurrent checkouts by one
+    household never share a revision.
+    """
+    
+    def __init__(self):
+        self._log: Dict[str, List[Tuple[str, float]]] = {}
+        self._revisions: Dict[str, int] = {}
+        self._baskets: List[List[str]] = []
+        self._locks = LockStripes()
+    
+    def record(self, user_id: str, items: List[str], purchased_at: Optional[float] = None):
+        purchased_at = time.time() if purchased_at is None else purchased_at
+        with self._locks(user_id):
+            self._log.setdefault(user_id, []).extend((item, purchased_at) for item in items)
+            self._revisions[user_id] = self._revisions.get(user_id, 0) + 1
+        self._baskets.append(list(items))
+    
+    def revision(self, user_id: str) -> int:
+        return self._revisions.get(user_id, 0)
+    
+    def purchases(self, user_id: str) -> List[Tuple[str, float]]:
+        return sorted(self._log.get(user_id, []), key=lambda purchase: purchase[1])
+    
+    def purchases_since(self, user_id: str, cursor: int) -> Tuple[int, int, List[Tuple[str, float]]]:
+        # The cursor is a position in the user's log, read under the lock that appends to it
+        with self._locks(user_id):
+            log = self._log.get(user_id, [])
+            return (self._revisions.get(user_id, 0), len(log),
+                    sorted(log[cursor:], key=lambda purchase: purchase[1]))
+    
+    def baskets_since(self, cursor: int) -> Iterator[Tuple[int, List[str]]]:
+        # The cursor counts baskets recorded so far
+        for index in range(cursor, len(self._baskets)):
+            yield index + 1, self._baskets[index]
+    
+    def all_purchases(self) -> Iterator[Tuple[str, str, float]]:
+        for user_id, log in list(self._log.items()):
+            for item, purchased_at in list(log):
+                yield user_id, item, purchased_at
+    
+    def revisions(self) -> Dict[str, int]:
+        return dict(self._revisions)
+
+class SQLitePurchaseHistory(SQLiteDatabase, PurchaseHistory):
+    """Purchase log in SQLite, durable and shared by every worker on a host.
+    
+    Purchases are only ever inserted, so their seq doubles as the cursor
+    for reading a user's purchases since the last read.
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS purchases (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            basket_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            item TEXT NOT NULL,
+            purchased_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS purchases_by_user ON purchases (user_id, purchased_at);
+        CREATE INDEX IF NOT EXISTS purchases_by_user_seq ON purchases (user_id, seq);
+        CREATE TABLE IF NOT EXISTS purchase_revisions (
+            user_id TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    '''
+    
+    def record(self, user_id: str, items: List[str], purchased_at: Optional[float] = None):
+        purchased_at = time.time() if purchased_at is None else purchased_at
+        basket_id = str(uuid.uuid4())
+        with self._write() as conn:
+            conn.executemany(
+                'INSERT INTO purchases (basket_id, user_id, item, purchased_at) VALUES (?, ?, ?, ?)',
+                [(basket_id, user_id, item, purchased_at) for item in items]
+            )
+            conn.execute(
+                'INSERT INTO purchase_revisions (user_id, revision) VALUES (?, 1) '
+                'ON CONFLICT (user_id) DO UPDATE SET revision = revision + 1',
+                (user_id,)
+            )
+    
+    def revision(self, user_id: str) -> int:
+        row = self._connection().execute(
+            'SELECT revision FROM purchase_revisions WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def purchases(self, user_id: str) -> List[Tuple[str, float]]:
+        return self._connection().execute(
+            'SELECT item, purchased_at FROM purchases WHERE user_id = ? ORDER BY purchased_at, seq',
+            (user_id,)
+        ).fetchall()
+    
+    def purchases_since(self, user_id: str, cursor: int) -> Tuple[int, int, List[Tuple[str, float]]]:
+        # One snapshot, so the revision covers exactly the rows read
+        with self._read() as conn:
+            revision = self.revision(user_id)
+            rows = conn.execute(
+                'SELECT seq, item, purchased_at FROM purchases WHERE user_id = ? AND seq > ? '
+                'ORDER BY purchased_at, seq',
+                (user_id, cursor)
+            ).fetchall()
+        return (revision, max((seq for seq, _, _ in rows), default=cursor),
+                [(item, purchased_at) for _, item, purchased_at in rows])
+    
+    def baskets_since(self, cursor: int) -> Iterator[Tuple[int, List[str]]]:
+        # A basket is inserted in one transaction, so its rows have consecutive seqs
+        rows = self._connection().execute(
+            'SELECT seq, basket_id, item FROM purchases WHERE seq > ? ORDER BY seq', (cursor,)
+        )
+        for _, group in itertools.groupby(rows, key=lambda row: row[1]):
+            group = list(group)
+            yield group[-1][0], [item for _, _, item in group]
+    
+    def all_purchases(self) -> Iterator[Tuple[str, str, float]]:
+        conn = sqlite3.connect(self.path)
+        try:
+            yield from conn.execute('SELECT user_id, item, purchased_at FROM purchases ORDER BY seq')
+        finally:
+            conn.close()
+    
+    def revisions(self) -> Dict[str, int]:
+        return dict(self._connection().execute('SELECT user_id, revision FROM purchase_revisions'))
+
+def create_purchase_history() -> PurchaseHistory:
+    """Build the history selected by PURCHASE_HISTORY_STORE (memory or sqlite)"""
+    backend = os.environ.get('PURCHASE_HISTORY_STORE', 'memory').lower()
+    if backend == 'sqlite':
+        return SQLitePurchaseHistory(os.environ.get('PURCHASE_HISTORY_DB', 'purchase_history.db'))
+    if backend == 'memory':
+        return InMemoryPurchaseHistory()
+    raise ValueError(f"Unknown PURCHASE_HISTORY_STORE: {backend}")
@@ -1,9 +1,32 @@
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional, Set
 from datetime import datetime, timedelta
+import heapq
+import itertools
+import operator
+import os
 import random
+import time
+from app.services import metrics
+from app.services.co_purchase import CoPurchaseModel
+from app.services.lru_cache import LRUCache
+from app.services.price_catalog import PriceEngine
+from app.services.product_catalog import product_index
+from app.services.purchase_history import InMemoryPurchaseHistory, PurchaseHistory
+from app.services.restock import DAY, RestockModel
+from app.services.shopping_list_store import ShoppingListStore
 
 class RecommendationEngine:
-    """Smart recommendation system for shopping items"""
+    """Smart recommendation system for shopping items.
+    
+    Results are cached per (user, current items, season, list revision,
+    purchase history revision, mined basket count), so the repeat calls
+    the app makes after every list change cost one cache lookup. Both
+    revisions come from shared stores, and co-purchase counts are synced
+    from the history first, so a list change or purchase made through
+    another worker invalidates this worker's entries too, and nothing is
+    kept per user beyond the cache itself. The TTL bounds how stale "last
+    bought N days ago" reasons can get.
+    """
     
     # Seasonal items by month
     SEASONAL_ITEMS = {
@@ -13,7 +36,7 @@ class RecommendationEngine:
         'fall': ['pumpkin', 'apples', 'squash', 'cranberries', 'turkey'],
     }
     
-    # Frequently bought together
+    # Frequently bought together, used until purchases have been mined for an item
     FREQUENTLY_TOGETHER = {
         'milk': ['bread', 'eggs', 'butter'],
         'eggs': ['milk', 'butter', 'bread'],
@@ -22,7 +45,10 @@ class RecommendationEngine:
         'chicken': ['garlic', 'onion', 'salt'],
     }
     
-    # Low stock alerts
+    # Recommendations returned when the caller doesn't ask for a count
+    DEFAULT_RECOMMENDATIONS = 5
+    
+    # Restock intervals in days for items a user has only bought once
     RESTOCK_ITEMS = {
         'milk': 7,  # every 7 days
         'bread': 3,
@@ -30,125 +56,167 @@ class RecommendationEngine:
         'water': 7,
     }
     
-    def __init__(self):
-        self.user_history = {}  # Store shopping history per user
+    def __init__(self, history: Optional[PurchaseHistory] = None,
+                 co_purchases: Optional[CoPurchaseModel] = None,
+                 cache: Optional[LRUCache] = None, restock: Optional[RestockModel] = None,
+                 prices: Optional[PriceEngine] = None, lists: Optional[ShoppingListStore] = None):
+        # Shopping history per user, loaded lazily from the purchase log
+        self.history = history if history is not None else InMemoryPurchaseHistory()
+        self.co_purchases = co_purchases if co_purchases is not None else CoPurchaseModel()
+        self.restock = restock if restock is not None else RestockModel(
+            self.history, default_days=self.RESTOCK_ITEMS
+        )
+        self.prices = prices if prices is not None else PriceEngine()
+        self.cache = cache if cache is not None else LRUCache(
+            maxsize=int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 4096)),
+            ttl=float(os.environ.get('RECOMMENDATION_CACHE_TTL', 300))
+        )
+        # Shopping lists, whose revisions key the cache; without them only purchases invalidate it
+        self.lists = lists
+        self._seasonal: Dict[str, List[Dict]] = {}
     
-    def get_recommendations(self, user_id: str, current_items: List[str]) -> List[Dict]:
-        """Get personalized recommendations"""
-        recommendations = []
-        
-        # 1. Frequently bought together
-        for item in current_items:
-            if item in self.FREQUENTLY_TOGETHER:
-                for rec_item in self.FREQUENTLY_TOGETHER[item]:
-                    if rec_item not in current_items:
-                        recommendations.append({
-                            'item': rec_item,
-                            'reason': f'Often bought with {item}',
-                            'confidence': 0.8,
-                            'type': 'frequently_together'
-                        })
-        
-        # 2. Seasonal items
-        seasonal_recs = self._get_seasonal_recommendations()
-        recommendations.extend(seasonal_recs)
+    def get_recommendations(self, user_id: str, current_items: List[str],
+                            k: int = DEFAULT_RECOMMENDATIONS) -> List[Dict]:
+        """Get the k best personalized recommendations"""
+        self.co_purchases.sync(self.history)
+        key = (
+            user_id,
+            tuple(current_items),
+            k,
+            self._current_season(),
+            self.lists.get_revision(user_id) if self.lists is not None else None,
+            self.history.revision(user_id),
+            self.co_purchases.baskets,
+        )
+        recommendations = self.cache.get(key)
+        if recommendations is None:
+            metrics.RECOMMENDATION_CACHE_LOOKUPS.inc('miss')
+            recommendations = self._build_recommendations(user_id, current_items, k)
+            self.cache.put(key, recommendations)
+        else:
+            metrics.RECOMMENDATION_CACHE_LOOKUPS.inc('hit')
         
-        # 3. Low stock alerts
-        low_stock_recs = self._get_low_stock_recommendations(user_id)
-        recommendations.extend(low_stock_recs)
+        # Cached results are shared, so callers only ever get copies
+        return [dict(rec) for rec in recommendations]
+    
+    def cache_stats(self) -> Dict:
+        """Get hit/miss counters of the recommendation cache"""
+        return self.cache.stats()
+    
+    def _build_recommendations(self, user_id: str, current_items: List[str], k: int) -> List[Dict]:
+        candidates = itertools.chain(
+            self._get_together_recommendations(current_items),
+            self._seasonal_candidates(self._current_season()),
+            self._get_low_stock_recommendations(user_id),
+        )
+        return self._rank(candidates, set(current_items), k)
+    
+    @staticmethod
+    def _rank(candidates: Iterable[Dict], exclude: Set[str], k: int) -> List[Dict]:
+        """Merge candidates proposed for the same item and keep the k best.
         
-        # Remove duplicates
-        seen = set()
-        unique_recs = []
-        for rec in recommendations:
-            if rec['item'] not in seen:
-                unique_recs.append(rec)
-                seen.add(rec['item'])
+        Confidences from several sources combine as independent evidence,
+        1 - (1 - a)(1 - b), and the reason and type come from the strongest
+        source. Selection is a heap over the merged pool, so cost grows as
+        n log k rather than with a full sort; ties keep proposal order.
+        """
+        missing: Dict[str, float] = {}
+        best: Dict[str, Dict] = {}
+        for rec in candidates:
+            item = rec['item']
+            if item in exclude:
+                continue
+            confidence = rec['confidence']
+            chance_missed = missing.get(item)
+            if chance_missed is None:
+                missing[item] = 1.0 - confidence
+                best[item] = rec
+            else:
+                missing[item] = chance_missed * (1.0 - confidence)
+                if confidence > best[item]['confidence']:
+                    best[item] = rec
         
-        return unique_recs[:5]  # Return top 5 recommendations
+        top = heapq.nsmallest(k, missing.items(), key=operator.itemgetter(1))
+        return [dict(best[item], confidence=round(1.0 - chance_missed, 2)) for item, chance_missed in top]
     
-    def _get_seasonal_recommendations(self) -> List[Dict]:
-        """Get recommendations based on current season"""
+    def _get_together_recommendations(self, current_items: List[str]) -> Iterator[Dict]:
+        """Items often bought with the current ones, mined or from the static table"""
+        for item in current_items:
+            mined = self.co_purchases.top_k(item, 3)
+            if mined:
+                for rec_item, _ in mined:
+                    yield {
+                        'item': rec_item,
+                        'reason': f'Often bought with {item}',
+                        'confidence': round(self.co_purchases.confidence(item.lower(), rec_item), 2),
+                        'type': 'frequently_together'
+                    }
+            elif item in self.FREQUENTLY_TOGETHER:
+                for rec_item in self.FREQUENTLY_TOGETHER[item]:
+                    yield {
+                        'item': rec_item,
+                        'reason': f'Often bought with {item}',
+                        'confidence': 0.8,
+                        'type': 'frequently_together'
+                    }
+    
+    @staticmethod
+    def _current_season() -> str:
         month = datetime.now().month
         
         if month in [3, 4, 5]:
-            season = 'spring'
+            return 'spring'
         elif month in [6, 7, 8]:
-            season = 'summer'
+            return 'summer'
         elif month in [9, 10, 11]:
-            season = 'fall'
+            return 'fall'
         else:
-            season = 'winter'
-        
-        items = self.SEASONAL_ITEMS.get(season, [])
-        return [{
-            'item': item,
-            'reason': f'In season this {season}',
-            'confidence': 0.6,
-            'type': 'seasonal'
-        } for item in items[:3]]
+            return 'winter'
+    
+    def _seasonal_candidates(self, season: str) -> List[Dict]:
+        # Built once per season and shared, so never handed out uncopied
+        recommendations = self._seasonal.get(season)
+        if recommendations is None:
+            items = self.SEASONAL_ITEMS.get(season, [])
+            recommendations = self._seasonal[season] = [{
+                'item': item,
+                'reason': f'In season this {season}',
+                'confidence': 0.6,
+                'type': 'seasonal'
+            } for item in items[:3]]
+        return recommendations
+    
+    def _get_seasonal_recommendations(self) -> List[Dict]:
+        """Get recommendations based on current season"""
+        return [dict(rec) for rec in self._seasonal_candidates(self._current_season())]
     
     def _get_low_stock_recommendations(self, user_id: str) -> List[Dict]:
         """Get recommendations for items that need restocking"""
+        now = time.time()
         recommendations = []
         
-        if user_id not in self.user_history:
-            return recommendations
-        
-        history = self.user_history[user_id]
-        
-        for item, last_purchased in history.items():
-            if item in self.RESTOCK_ITEMS:
-                days_since = (datetime.now() - last_purchased).days
-                restock_interval = self.RESTOCK_ITEMS[item]
-                
-                if days_since > restock_interval:
-                    recommendations.append({
-                        'item': item,
-                        'reason': f'Time to restock (last bought {days_since} days ago)',
-                        'confidence': 0.9,
-                        'type': 'restock'
-                    })
+        for item, last_purchased, interval in self.restock.due(user_id, now):
+            days_since = int((now - last_purchased) // DAY)
+            recommendations.append({
+                'item': item,
+                'reason': f'Time to restock (last bought {days_since} days ago, '
+                          f'usually every {max(round(interval / DAY), 1)} days)',
+                'confidence': 0.9,
+                'type': 'restock'
+            })
         
         return recommendations
     
     def record_purchase(self, user_id: str, items: List[str]):
         """Record purchase history for recommendations"""
-        if user_id not in self.user_history:
-            self.user_history[user_id] = {}
-        
-        for item in items:
-            self.user_history[user_id][item] = datetime.now()
+        self.history.record(user_id, items)
+        self.co_purchases.sync(self.history)
     
     def get_substitute_products(self, item: str) -> List[Dict]:
         """Get substitute products if item is unavailable"""
-        substitutes = {
-            'milk': ['almond milk', 'soy milk', 'oat milk', 'coconut milk'],
-            'eggs': ['tofu', 'applesauce', 'mashed banana'],
-            'butter': ['coconut oil', 'olive oil', 'margarine'],
-            'wheat bread': ['rye bread', 'sourdough', 'multigrain'],
-            'chicken': ['turkey', 'tofu', 'fish'],
-            'beef': ['ground turkey', 'lean pork', 'veggie burger'],
-        }
-        
-        item_lower = item.lower()
-        for key, subs in substitutes.items():
-            if key in item_lower:
-                return [{'item': sub, 'reason': f'Substitute for {item}'} for sub in subs]
-        
-        return []
+        substitutes = product_index.lookup(item, 'substitutes', [])
+        return [{'item': sub, 'reason': f'Substitute for {item}'} for sub in substitutes]
     
     def get_price_range_by_item(self, item: str) -> Dict:
         """Get average price range for an item"""
-        # Mock data - in production, fetch from real pricing API
-        price_data = {
-            'milk': {'min': 2.50, 'max': 4.00, 'avg': 3.20},
-            'bread': {'min': 1.50, 'max': 3.50, 'avg': 2.50},
-            'eggs': {'min': 2.50, 'max': 4.50, 'avg': 3.50},
-            'apple': {'min': 0.50, 'max': 1.50, 'avg': 1.00},
-            'chicken': {'min': 4.00, 'max': 8.00, 'avg': 6.00},
-        }
-        
-        return price_data.get(item.lower(), {
-            'min': 1.00, 'max': 10.00, 'avg': 5.00
-        })
+        return self.prices.get_price_range(item)
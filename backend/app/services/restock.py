@@ -0,0 +1,195 @@
+import heapq
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.purchase_history import PurchaseHistory
+
+DAY = 86400.0
+
+class UserRestock:
+    """One user's learned intervals and a min-heap of item due dates"""
+    
+    __slots__ = ('revision', 'cursor', 'items', 'heap')
+    
+    def __init__(self, revision: int, items: Dict[str, Tuple[float, Optional[float]]],
+                 defaults: Dict[str, float], cursor: Optional[int] = None):
+        self.revision = revision
+        # Where the history left off (see PurchaseHistory.purchases_since); None forces a full replay
+        self.cursor = cursor
+        # item -> (last purchased timestamp, learned interval in seconds or None)
+        self.items = items
+        self.heap: List[Tuple[float, str]] = []
+        for item, (last, interval) in items.items():
+            if interval is None:
+                interval = defaults.get(item)
+            if interval is not None:
+                self.heap.append((last + interval, item))
+        heapq.heapify(self.heap)
+
+class RestockModel:
+    """Predicts when a user will run out of each item they buy again.
+    
+    The interval for a (user, item) pair is an exponentially weighted mean
+    of the gaps between its purchases, so recent habits count most; gaps
+    under min_gap are one shopping trip and are skipped. Items bought only
+    once fall back to default_days. Each user's due dates sit in a min-heap,
+    so finding what is due costs O(m log n) for m due items. When a user's
+    history revision moves on, only the purchases recorded since are folded
+    in; the whole log is replayed only for a backdated purchase.
+    """
+    
+    def __init__(self, history: PurchaseHistory, alpha: float = 0.3, min_gap: float = DAY / 2,
+                 default_days: Optional[Dict[str, float]] = None):
+        self.history = history
+        self.alpha = alpha
+        self.min_gap = min_gap
+        self.defaults = {item: days * DAY for item, days in (default_days or {}).items()}
+        self._users: Dict[str, UserRestock] = {}
+        self._lock = threading.Lock()
+    
+    def due(self, user_id: str, now: Optional[float] = None) -> List[Tuple[str, float, float]]:
+        """Get (item, last purchased, interval) for every item due by now, soonest first"""
+        now = time.time() if now is None else now
+        state = self._user_state(user_id)
+        due = []
+        with self._lock:
+            heap = state.heap
+            while heap and heap[0][0] <= now:
+                due.append(heapq.heappop(heap))
+            for entry in due:
+                heapq.heappush(heap, entry)
+        return [(item, state.items[item][0], due_at - state.items[item][0]) for due_at, item in due]
+    
+    def _user_state(self, user_id: str) -> UserRestock:
+        revision = self.history.revision(user_id)
+        state = self._users.get(user_id)
+        if state is not None and state.revision == revision:
+            return state
+        items, cursor = {}, 0
+        if state is not None and state.cursor is not None:
+            items, cursor = state.items, state.cursor
+        revision, cursor, purchases = self.history.purchases_since(user_id, cursor)
+        if any(purchased_at < items[item][0] for item, purchased_at in purchases if item in items):
+            # A backdated purchase changes gaps already averaged in, so start over
+            items = {}
+            revision, cursor, purchases = self.history.purchases_since(user_id, 0)
+        state = self._users[user_id] = UserRestock(
+            revision, self.learn(purchases, items), self.defaults, cursor
+        )
+        return state
+    
+    def learn(self, purchases: Iterable[Tuple[str, float]],
+              items: Optional[Dict[str, Tuple[float, Optional[float]]]] = None
+              ) -> Dict[str, Tuple[float, Optional[float]]]:
+        """Replay one user's (item, timestamp) log, oldest first, into (last, interval) per item.
+        
+        Passing the items learned so far folds newer purchases into a copy of them.
+        """
+        items = dict(items) if items else {}
+        for item, purchased_at in purchases:
+            state = items.get(item)
+            if state is None:
+                items[item] = (purchased_at, None)
+                continue
+            last, interval = state
+            gap = purchased_at - last
+            if gap < self.min_gap:
+                items[item] = (max(last, purchased_at), interval)
+            elif interval is None:
+                items[item] = (purchased_at, gap)
+            else:
+                items[item] = (purchased_at, self.alpha * gap + (1 - self.alpha) * interval)
+        return items
+    
+    def save(self, path: str):
+        """Write every loaded user's intervals to a JSON snapshot"""
+        with open(path, 'w') as f:
+            json.dump({
+                user_id: {'revision': state.revision, 'cursor': state.cursor, 'items': state.items}
+                for user_id, state in self._users.items()
+            }, f)
+    
+    def load(self, path: str):
+        """Preload users from a snapshot; users whose revision has moved on are replayed later"""
+        with open(path) as f:
+            data = json.load(f)
+        for user_id, entry in data.items():
+            items = {item: (last, interval) for item, (last, interval) in entry['items'].items()}
+            self._users[user_id] = UserRestock(entry['revision'], items, self.defaults, entry.get('cursor'))
+    
+    @classmethod
+    def rebuild(cls, history: PurchaseHistory, **kwargs) -> 'RestockModel':
+        """Learn every user's intervals at once with NumPy.
+        
+        Sorts the whole log by (user, item) pair and time, drops gaps under
+        min_gap, then computes each pair's EWMA in closed form: the gap
+        k places from the end of a run of n weighs alpha (1 - alpha)^k,
+        except the first, which seeds the average and weighs
+        (1 - alpha)^(n - 1). Needs NumPy (see requirements-offline.txt).
+        """
+        import numpy as np
+        
+        model = cls(history, **kwargs)
+        # Revisions first: purchases landing during the scan make users look stale, never fresh
+        revisions = history.revisions()
+        
+        pairs: Dict[Tuple[str, str], int] = {}
+        pair_ids, times = [], []
+        for user_id, item, purchased_at in history.all_purchases():
+            pair_ids.append(pairs.setdefault((user_id, item), len(pairs)))
+            times.append(purchased_at)
+        if not pairs:
+            return model
+        
+        pair_ids = np.asarray(pair_ids, dtype=np.int64)
+        times = np.asarray(times, dtype=np.float64)
+        order = np.lexsort((times, pair_ids))
+        pair_ids, times = pair_ids[order], times[order]
+        
+        last = np.full(len(pairs), -np.inf)
+        np.maximum.at(last, pair_ids, times)
+        
+        same_pair = pair_ids[1:] == pair_ids[:-1]
+        gaps = times[1:] - times[:-1]
+        # A short gap merges purchases into one trip, so the next gap is measured from the later one
+        keep = same_pair & (gaps >= model.min_gap)
+        gap_pairs = pair_ids[1:][keep]
+        gap_values = gaps[keep]
+        
+        counts = np.bincount(gap_pairs, minlength=len(pairs))
+        starts = np.cumsum(counts) - counts
+        position = np.arange(len(gap_pairs)) - starts[gap_pairs]
+        from_end = counts[gap_pairs] - 1 - position
+        weights = model.alpha * (1 - model.alpha) ** from_end
+        weights[position == 0] = (1 - model.alpha) ** from_end[position == 0]
+        intervals = np.bincount(gap_pairs, weights=weights * gap_values, minlength=len(pairs))
+        
+        users: Dict[str, Dict[str, Tuple[float, Optional[float]]]] = {}
+        for (user_id, item), last_at, interval, count in zip(pairs, last.tolist(), intervals.tolist(),
+                                                            counts.tolist()):
+            users.setdefault(user_id, {})[item] = (last_at, interval if count else None)
+        for user_id, items in users.items():
+            model._users[user_id] = UserRestock(revisions.get(user_id, -1), items, model.defaults)
+        return model
+
+def create_restock_model(history: PurchaseHistory,
+                         default_days: Optional[Dict[str, float]] = None) -> RestockModel:
+    """Build the model, preloaded from RESTOCK_SNAPSHOT if there is one"""
+    model = RestockModel(history, default_days=default_days)
+    path = os.environ.get('RESTOCK_SNAPSHOT')
+    if path and os.path.exists(path):
+        model.load(path)
+    return model
+
+if __name__ == '__main__':
+    # Periodic batch job: python -m app.services.restock
+    from app.services.purchase_history import create_purchase_history
+    from app.services.recommendation_engine import RecommendationEngine
+    
+    snapshot = os.environ.get('RESTOCK_SNAPSHOT', 'restock.json')
+    model = RestockModel.rebuild(create_purchase_history(), default_days=RecommendationEngine.RESTOCK_ITEMS)
+    model.save(snapshot)
+    print(f"Learned restock intervals for {len(model._users)} users into {snapshot}")
@@ -0,0 +1,127 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List
+
+class ServiceRegistry:
+    """Shared services of the app, each built on first use.
+    
+    Factories are registered by name and receive the registry, so a service
+    can ask for the ones it depends on; every service is built once per
+    process. Importing the routes therefore costs almost nothing, and a
+    service's tables are only compiled when a request first needs them.
+    
+    Services registered fork_safe hold tables but no connections, pools or
+    locks that are waited on, so preload() may build them in the gunicorn
+    master before it forks (preload_app). Workers then share their memory
+    copy-on-write. Everything else is always built in the worker.
+    """
+    
+    def __init__(self):
+        self._factories: Dict[str, Callable[['ServiceRegistry'], Any]] = {}
+        self._fork_safe: List[str] = []
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+    
+    def register(self, name: str, factory: Callable[['ServiceRegistry'], Any], fork_safe: bool = False):
+        """Register how to build a service"""
+        self._factories[name] = factory
+        if fork_safe:
+            self._fork_safe.append(name)
+    
+    def get(self, name: str) -> Any:
+        """Get a service, building it on first use"""
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._instances[name] = self._factories[name](self)
+        return instance
+    
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_') or name not in self._factories:
+            raise AttributeError(name)
+        return self.get(name)
+    
+    def preload(self) -> List[str]:
+        """Build every fork-safe service now, returning their names"""
+        for name in self._fork_safe:
+            self.get(name)
+        # Whatever else they were built from, like the purchase history, is built again in each worker
+        with self._lock:
+            for name in list(self._instances):
+                if name not in self._fork_safe:
+                    del self._instances[name]
+        return list(self._fork_safe)
+    
+    def loaded(self) -> List[str]:
+        """Names of the services built so far"""
+        return list(self._instances)
+    
+    def reset(self):
+        """Drop every built service; the next use rebuilds it"""
+        with self._lock:
+            self._instances.clear()
+
+def _create_store(services: ServiceRegistry):
+    from app.services.shopping_list_store import create_store
+    return create_store()
+
+def _create_purchase_history(services: ServiceRegistry):
+    from app.services.purchase_history import create_purchase_history
+    return create_purchase_history()
+
+def _create_co_purchases(services: ServiceRegistry):
+    from app.services.co_purchase import create_co_purchase_model
+    return create_co_purchase_model(services.purchase_history)
+
+def _create_prices(services: ServiceRegistry):
+    from app.services.price_catalog import create_price_engine
+    return create_price_engine()
+
+def _create_nlp(services: ServiceRegistry):
+    from app.services.nlp_processor import NLPProcessor, get_language_pack
+    # Compile the default language up front; the others stay lazy
+    get_language_pack(NLPProcessor.DEFAULT_LANGUAGE)
+    return NLPProcessor()
+
+def _create_parse_sessions(services: ServiceRegistry):
+    from app.services.parse_session import create_parse_sessions
+    return create_parse_sessions(services.nlp)
+
+def _create_recommendations(services: ServiceRegistry):
+    from app.services.recommendation_engine import RecommendationEngine
+    from app.services.restock import create_restock_model
+    
+    history = services.purchase_history
+    return RecommendationEngine(
+        history,
+        services.co_purchases,
+        restock=create_restock_model(history, RecommendationEngine.RESTOCK_ITEMS),
+        prices=services.prices,
+        lists=services.store
+    )
+
+def _create_changes(services: ServiceRegistry):
+    from app.services.change_feed import create_change_feed
+    return create_change_feed()
+
+def _create_voice(services: ServiceRegistry):
+    from app.services.audio_pool import create_audio_pool
+    from app.services.voice_processor import VoiceProcessor
+    return VoiceProcessor(pool=create_audio_pool())
+
+services = ServiceRegistry()
+services.register('store', _create_store)
+services.register('purchase_history', _create_purchase_history)
+services.register('co_purchases', _create_co_purchases, fork_safe=True)
+services.register('prices', _create_prices, fork_safe=True)
+services.register('nlp', _create_nlp, fork_safe=True)
+services.register('parse_sessions', _create_parse_sessions)
+services.register('recommendations', _create_recommendations)
+services.register('changes', _create_changes)
+services.register('voice', _create_voice)
+
+def preload_requested() -> bool:
+    """Whether PRELOAD_SERVICES asks for fork-safe services to be built at startup"""
+    return os.environ.get('PRELOAD_SERVICES', '').lower() in ('1', 'true', 'yes')
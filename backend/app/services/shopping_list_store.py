@@ -0,0 +1,379 @@
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.models.shopping_list import ListSnapshot, ShoppingItem, ShoppingList
+from app.services import profiling
+from app.services.lock_stripes import LockStripes
+from app.services.sqlite_db import SQLiteDatabase
+
+class ShoppingListStore:
+    """Storage backend for shopping lists.
+    
+    Routes go through the store for every read and mutation, so lists can
+    live in process memory or in a database shared by several workers.
+    Mutations return the list revision after the change.
+    """
+    
+    def get_list(self, user_id: str) -> Optional[ShoppingList]:
+        """Get the user's shopping list, or None if they have none"""
+        raise NotImplementedError
+    
+    def get_or_create_list(self, user_id: str) -> ShoppingList:
+        """Get the user's shopping list, creating it on first use"""
+        raise NotImplementedError
+    
+    def get_snapshot(self, user_id: str) -> ListSnapshot:
+        """Get the user's list serialized for a response, creating it on first use"""
+        raise NotImplementedError
+    
+    def get_revision(self, user_id: str) -> Optional[int]:
+        """Get the current revision of the user's list"""
+        raise NotImplementedError
+    
+    def get_by_category(self, user_id: str, category: str) -> Optional[List[ShoppingItem]]:
+        """Get the user's items in a category, or None if they have no list"""
+        raise NotImplementedError
+    
+    def changes_since(self, user_id: str, revision: int) -> Optional[Dict]:
+        """Get items changed after a revision; see ShoppingList.changes_since"""
+        raise NotImplementedError
+    
+    def add_items(self, user_id: str, items: List[ShoppingItem]) -> int:
+        """Add items to the user's list, merging by name, creating the list if needed"""
+        raise NotImplementedError
+    
+    def remove_item(self, user_id: str, item_id: str) -> Optional[int]:
+        """Remove an item; returns None if the user has no list"""
+        raise NotImplementedError
+    
+    def clear(self, user_id: str) -> int:
+        """Remove every item from the user's list"""
+        raise NotImplementedError
+
+class InMemoryShoppingListStore(ShoppingListStore):
+    """Lists held in a dict; private to the worker process.
+    
+    Every read and mutation of a user's list holds that user's lock stripe,
+    so threaded workers can't lose updates to the same list, and lists of
+    different users are still changed in parallel. Lists and items handed
+    out are copies, like the SQLite store's, so callers never read one that
+    another thread is changing; routes take a snapshot instead, which is
+    cheaper to build while holding the lock.
+    """
+    
+    LOCK_STRIPES = 64
+    
+    def __init__(self):
+        self.lists: Dict[str, ShoppingList] = {}
+        self._locks = LockStripes(self.LOCK_STRIPES)
+    
+    def get_list(self, user_id: str) -> Optional[ShoppingList]:
+        with self._locks(user_id):
+            shopping_list = self.lists.get(user_id)
+            return shopping_list.copy() if shopping_list is not None else None
+    
+    def get_or_create_list(self, user_id: str) -> ShoppingList:
+        with self._locks(user_id):
+            return self._get_or_create(user_id).copy()
+    
+    def get_snapshot(self, user_id: str) -> ListSnapshot:
+        with self._locks(user_id):
+            return self._get_or_create(user_id).snapshot()
+    
+    def _get_or_create(self, user_id: str) -> ShoppingList:
+        shopping_list = self.lists.get(user_id)
+        if shopping_list is None:
+            shopping_list = ShoppingList(
+                id=str(uuid.uuid4()),
+                user_id=user_id
+            )
+            self.lists[user_id] = shopping_list
+        return shopping_list
+    
+    def get_revision(self, user_id: str) -> Optional[int]:
+        shopping_list = self.lists.get(user_id)
+        return shopping_list.revision if shopping_list is not None else None
+    
+    def get_by_category(self, user_id: str, category: str) -> Optional[List[ShoppingItem]]:
+        with self._locks(user_id):
+            shopping_list = self.lists.get(user_id)
+            if shopping_list is None:
+                return None
+            return [item.copy() for item in shopping_list.get_by_category(category)]
+    
+    def changes_since(self, user_id: str, revision: int) -> Optional[Dict]:
+        with self._locks(user_id):
+            shopping_list = self.lists.get(user_id)
+            return shopping_list.changes_since(revision) if shopping_list is not None else None
+    
+    @profiling.timed('list.add')
+    def add_items(self, user_id: str, items: List[ShoppingItem]) -> int:
+        with self._locks(user_id):
+            shopping_list = self._get_or_create(user_id)
+            for item in items:
+                shopping_list.add_item(item.copy())
+            return shopping_list.revision
+    
+    def remove_item(self, user_id: str, item_id: str) -> Optional[int]:
+        with self._locks(user_id):
+            shopping_list = self.lists.get(user_id)
+            if shopping_list is None:
+                return None
+            shopping_list.remove_item(item_id)
+            return shopping_list.revision
+    
+    def clear(self, user_id: str) -> int:
+        with self._locks(user_id):
+            shopping_list = self.lists.get(user_id)
+            if shopping_list is None:
+                return 0
+            shopping_list.clear()
+            return shopping_list.revision
+
+class SQLiteShoppingListStore(SQLiteDatabase, ShoppingListStore):
+    """Lists in a SQLite database in WAL mode, shared by every worker on a host.
+    
+    Each item is its own row, so mutations write only the rows they touch.
+    Every mutation runs in a BEGIN IMMEDIATE transaction that also bumps the
+    list revision, and removals leave tombstones so deltas work across
+    workers.
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS shopping_lists (
+            user_id TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 0,
+            oldest_delta_revision INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS shopping_items (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            name TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit TEXT NOT NULL,
+            category TEXT NOT NULL,
+            category_key TEXT NOT NULL,
+            price_estimate REAL NOT NULL,
+            added_at REAL NOT NULL,
+            created_revision INTEGER NOT NULL,
+            revision INTEGER NOT NULL,
+            UNIQUE (user_id, name_key)
+        );
+        CREATE INDEX IF NOT EXISTS shopping_items_by_revision
+            ON shopping_items (user_id, revision);
+        CREATE INDEX IF NOT EXISTS shopping_items_by_category
+            ON shopping_items (user_id, category_key);
+        CREATE TABLE IF NOT EXISTS shopping_item_tombstones (
+            user_id TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            item_id TEXT NOT NULL,
+            PRIMARY KEY (user_id, revision)
+        );
+    '''
+    
+    ITEM_COLUMNS = 'id, name, quantity, unit, category, price_estimate, added_at, name_key'
+    
+    def __init__(self, path: str, max_tombstones: int = ShoppingList.MAX_TOMBSTONES):
+        super().__init__(path)
+        self.max_tombstones = max_tombstones
+    
+    @staticmethod
+    def _item_from_row(row) -> ShoppingItem:
+        return ShoppingItem(
+            id=row[0],
+            name=row[1],
+            quantity=row[2],
+            unit=row[3],
+            category=row[4],
+            price_estimate=row[5],
+            added_at=row[6],
+            key=row[7]
+        )
+    
+    def _list_row(self, conn, user_id: str):
+        return conn.execute(
+            'SELECT id, created_at, revision, oldest_delta_revision FROM shopping_lists WHERE user_id = ?',
+            (user_id,)
+        ).fetchone()
+    
+    def _ensure_list_row(self, conn, user_id: str):
+        conn.execute(
+            'INSERT OR IGNORE INTO shopping_lists (user_id, id, created_at) VALUES (?, ?, ?)',
+            (user_id, str(uuid.uuid4()), datetime.now().isoformat())
+        )
+        return self._list_row(conn, user_id)
+    
+    def _items(self, conn, user_id: str) -> List[ShoppingItem]:
+        rows = conn.execute(
+            f'SELECT {self.ITEM_COLUMNS} FROM shopping_items WHERE user_id = ? ORDER BY created_revision',
+            (user_id,)
+        ).fetchall()
+        return [self._item_from_row(row) for row in rows]
+    
+    def _load(self, conn, user_id: str, row) -> ShoppingList:
+        list_id, created_at, revision, _ = row
+        return ShoppingList.restore(
+            id=list_id,
+            user_id=user_id,
+            items=self._items(conn, user_id),
+            created_at=created_at,
+            revision=revision
+        )
+    
+    def _snapshot(self, conn, user_id: str, row) -> ListSnapshot:
+        list_id, created_at, revision, _ = row
+        return ListSnapshot.build(list_id, user_id, self._items(conn, user_id), created_at, revision)
+    
+    def get_list(self, user_id: str) -> Optional[ShoppingList]:
+        with self._read() as conn:
+            row = self._list_row(conn, user_id)
+            return self._load(conn, user_id, row) if row else None
+    
+    def get_or_create_list(self, user_id: str) -> ShoppingList:
+        with self._read() as conn:
+            row = self._list_row(conn, user_id)
+            if row:
+                return self._load(conn, user_id, row)
+        with self._write() as conn:
+            return self._load(conn, user_id, self._ensure_list_row(conn, user_id))
+    
+    def get_snapshot(self, user_id: str) -> ListSnapshot:
+        with self._read() as conn:
+            row = self._list_row(conn, user_id)
+            if row:
+                return self._snapshot(conn, user_id, row)
+        with self._write() as conn:
+            return self._snapshot(conn, user_id, self._ensure_list_row(conn, user_id))
+    
+    def get_revision(self, user_id: str) -> Optional[int]:
+        row = self._list_row(self._connection(), user_id)
+        return row[2] if row else None
+    
+    def get_by_category(self, user_id: str, category: str) -> Optional[List[ShoppingItem]]:
+        with self._read() as conn:
+            if not self._list_row(conn, user_id):
+                return None
+            rows = conn.execute(
+                f'SELECT {self.ITEM_COLUMNS} FROM shopping_items '
+                'WHERE user_id = ? AND category_key = ? ORDER BY created_revision',
+                (user_id, category.lower())
+            ).fetchall()
+            return [self._item_from_row(row) for row in rows]
+    
+    def changes_since(self, user_id: str, revision: int) -> Optional[Dict]:
+        with self._read() as conn:
+            row = self._list_row(conn, user_id)
+            if row is None:
+                return None
+            list_id, _, current, oldest = row
+            if revision < oldest or revision > current:
+                return None
+            
+            added, changed = [], []
+            rows = conn.execute(
+                f'SELECT {self.ITEM_COLUMNS}, created_revision FROM shopping_items '
+                'WHERE user_id = ? AND revision > ? ORDER BY revision',
+                (user_id, revision)
+            ).fetchall()
+            for item_row in rows:
+                target = added if item_row[8] > revision else changed
+                target.append(self._item_from_row(item_row).to_dict())
+            removed = [item_id for (item_id,) in conn.execute(
+                'SELECT item_id FROM shopping_item_tombstones '
+                'WHERE user_id = ? AND revision > ? ORDER BY revision',
+                (user_id, revision)
+            )]
+        
+        return {
+            'id': list_id,
+            'revision': current,
+            'since_revision': revision,
+            'added': added,
+            'changed': changed,
+            'removed': removed,
+        }
+    
+    @profiling.timed('list.add')
+    def add_items(self, user_id: str, items: List[ShoppingItem]) -> int:
+        with self._write() as conn:
+            revision = self._ensure_list_row(conn, user_id)[2]
+            for item in items:
+                revision += 1
+                conn.execute(
+                    'INSERT INTO shopping_items (id, user_id, name_key, name, quantity, unit, category, '
+                    'category_key, price_estimate, added_at, created_revision, revision) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (user_id, name_key) DO UPDATE SET '
+                    'quantity = quantity + excluded.quantity, revision = excluded.revision',
+                    (item.id, user_id, item.key, item.name, item.quantity, item.unit,
+                     item.category, item.category.lower(), item.price_estimate, item.added_at,
+                     revision, revision)
+                )
+            conn.execute('UPDATE shopping_lists SET revision = ? WHERE user_id = ?', (revision, user_id))
+        return revision
+    
+    def remove_item(self, user_id: str, item_id: str) -> Optional[int]:
+        with self._write() as conn:
+            row = self._list_row(conn, user_id)
+            if row is None:
+                return None
+            revision = row[2]
+            deleted = conn.execute(
+                'DELETE FROM shopping_items WHERE id = ? AND user_id = ?', (item_id, user_id)
+            ).rowcount
+            if not deleted:
+                return revision
+            
+            revision += 1
+            conn.execute(
+                'INSERT INTO shopping_item_tombstones (user_id, revision, item_id) VALUES (?, ?, ?)',
+                (user_id, revision, item_id)
+            )
+            conn.execute('UPDATE shopping_lists SET revision = ? WHERE user_id = ?', (revision, user_id))
+            self._trim_tombstones(conn, user_id)
+        return revision
+    
+    def _trim_tombstones(self, conn, user_id: str):
+        cutoff = conn.execute(
+            'SELECT revision FROM shopping_item_tombstones WHERE user_id = ? '
+            'ORDER BY revision DESC LIMIT 1 OFFSET ?',
+            (user_id, self.max_tombstones)
+        ).fetchone()
+        if cutoff:
+            conn.execute(
+                'DELETE FROM shopping_item_tombstones WHERE user_id = ? AND revision <= ?',
+                (user_id, cutoff[0])
+            )
+            conn.execute(
+                'UPDATE shopping_lists SET oldest_delta_revision = ? WHERE user_id = ?',
+                (cutoff[0], user_id)
+            )
+    
+    def clear(self, user_id: str) -> int:
+        with self._write() as conn:
+            row = self._list_row(conn, user_id)
+            if row is None:
+                return 0
+            revision = row[2] + 1
+            conn.execute('DELETE FROM shopping_items WHERE user_id = ?', (user_id,))
+            conn.execute('DELETE FROM shopping_item_tombstones WHERE user_id = ?', (user_id,))
+            # Removals aren't logged individually, so older revisions need a full resync
+            conn.execute(
+                'UPDATE shopping_lists SET revision = ?, oldest_delta_revision = ? WHERE user_id = ?',
+                (revision, revision, user_id)
+            )
+        return revision
+
+def create_store() -> ShoppingListStore:
+    """Build the store selected by SHOPPING_LIST_STORE (memory or sqlite)"""
+    backend = os.environ.get('SHOPPING_LIST_STORE', 'memory').lower()
+    if backend == 'sqlite':
+        return SQLiteShoppingListStore(os.environ.get('SHOPPING_LIST_DB', 'shopping_lists.db'))
+    if backend == 'memory':
+        return InMemoryShoppingListStore()
+    raise ValueError(f"Unknown SHOPPING_LIST_STORE: {backend}")
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import sys
+import threading
+
+class SQLiteDatabase:
+    """Base for SQLite-backed stores shared by worker processes.
+    
+    Opens the database in WAL mode so readers never block the writer, and
+    reuses one connection per OS thread, reopening it after a fork.
+    Subclasses set SCHEMA to the statements creating their tables.
+    """
+    
+    SCHEMA = ''
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = _os_thread_local()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Reuse one connection per thread, reopening it after a fork"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _write(self) -> '_Transaction':
+        """Transaction that takes the write lock up front"""
+        return _Transaction(self._connection(), 'BEGIN IMMEDIATE')
+    
+    def _read(self) -> '_Transaction':
+        """Transaction giving a consistent snapshot for several reads"""
+        return _Transaction(self._connection(), 'BEGIN')
+
+def _os_thread_local():
+    """A thread-local that stays per OS thread when gevent has patched threading.
+    
+    Greenlets of a gevent worker take turns on one OS thread, and a store
+    call never yields to another greenlet between its statements, so they
+    can share that thread's connection instead of each request (and every
+    open stream) opening and holding one of its own.
+    """
+    monkey = sys.modules.get('gevent.monkey')
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return monkey.get_original('threading', 'local')()
+    return threading.local()
+
+class _Transaction:
+    """Context manager running a block in one SQLite transaction"""
+    
+    def __init__(self, conn: sqlite3.Connection, begin: str):
+        self.conn = conn
+        self.begin = begin
+    
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute(self.begin)
+        return self.conn
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -1,8 +1,86 @@
 import base64
-from typing import Dict, Optional
+import binascii
+import codecs
+import os
+import re
+import time
+from typing import BinaryIO, Callable, Dict, Optional
+
+from app.services.audio_pool import AudioPool
+
+# Characters b64decode skips unless validating, like the line breaks of MIME-wrapped input
+NON_BASE64 = re.compile(r'[^A-Za-z0-9+/=]')
+
+class RecognitionSession:
+    """One utterance being fed to a speech recognizer chunk by chunk"""
+    
+    def feed(self, chunk: memoryview):
+        """Consume the next chunk of audio; the view is reused after this returns"""
+        raise NotImplementedError
+    
+    def finish(self) -> Optional[str]:
+        """Return the transcript once all audio has been fed"""
+        raise NotImplementedError
+
+class SpeechRecognizer:
+    """Local speech recognizer that consumes audio incrementally"""
+    
+    def start(self, language: str) -> RecognitionSession:
+        """Begin recognizing a new utterance"""
+        raise NotImplementedError
+
+class StubRecognizer(SpeechRecognizer):
+    """Deterministic recognizer for tests and local development.
+    
+    Treats the audio bytes as UTF-8 text and returns it as the transcript,
+    so sending b"add milk" as audio is recognized as "add milk". latency
+    adds a blocking delay before each transcript to stand in for a real
+    speech-to-text call in load tests.
+    """
+    
+    MAX_TRANSCRIPT = 1000
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+    
+    class Session(RecognitionSession):
+        def __init__(self, latency: float):
+            self._latency = latency
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            self._parts = []
+            self._length = 0
+        
+        def feed(self, chunk: memoryview):
+            if self._length >= StubRecognizer.MAX_TRANSCRIPT:
+                return
+            text = self._decoder.decode(chunk)
+            self._parts.append(text)
+            self._length += len(text)
+        
+        def finish(self) -> Optional[str]:
+            if self._latency:
+                time.sleep(self._latency)
+            self._parts.append(self._decoder.decode(b'', final=True))
+            transcript = ' '.join(''.join(self._parts)[:StubRecognizer.MAX_TRANSCRIPT].split())
+            return transcript or None
+    
+    def start(self, language: str) -> RecognitionSession:
+        return self.Session(self.latency)
+
+RECOGNIZERS = {
+    'stub': StubRecognizer,
+}
+
+class AudioTooLarge(Exception):
+    """Raised when an upload exceeds VoiceProcessor.max_audio_bytes"""
 
 class VoiceProcessor:
-    """Handle voice input and processing"""
+    """Handle voice input and processing.
+    
+    Audio is streamed through one preallocated chunk buffer into the
+    recognizer, so memory per request is bounded by chunk_size rather than
+    by the length of the utterance.
+    """
     
     supported_languages = {
         'en': 'en-US',
@@ -12,20 +90,72 @@ class VoiceProcessor:
         'hi': 'hi-IN',
     }
     
-    def __init__(self):
-        pass
+    def __init__(self, recognizer: Optional[SpeechRecognizer] = None, chunk_size: int = 64 * 1024,
+                 max_audio_bytes: int = 10 * 1024 * 1024, pool: Optional[AudioPool] = None):
+        self.recognizer = recognizer if recognizer is not None else create_recognizer()
+        self.chunk_size = chunk_size
+        self.max_audio_bytes = max_audio_bytes
+        self.pool = pool
+    
+    def process_audio_stream(self, stream: BinaryIO, language: str = 'en') -> Dict:
+        """Recognize raw audio read incrementally from a binary stream.
+        
+        With a pool, reads stay on the request's thread (or greenlet) and
+        only the recognizer calls run on pool threads, so a slow upload
+        holds no pool capacity while it waits for the next chunk.
+        """
+        if self.pool is None:
+            return self._recognize_stream(stream, language, lambda fn, *args: fn(*args))
+        return self._recognize_stream(stream, language, self.pool.run)
+    
+    def _recognize_stream(self, stream: BinaryIO, language: str, call: Callable) -> Dict:
+        session = call(self.recognizer.start, self.supported_languages.get(language, language))
+        buffer = bytearray(self.chunk_size)
+        view = memoryview(buffer)
+        total = 0
+        
+        while True:
+            size = self._read_chunk(stream, view)
+            if not size:
+                break
+            total += size
+            if total > self.max_audio_bytes:
+                raise AudioTooLarge(f'Audio exceeds {self.max_audio_bytes} bytes')
+            call(session.feed, view[:size])
+        
+        return {'transcript': call(session.finish), 'bytes': total}
+    
+    @staticmethod
+    def _read_chunk(stream: BinaryIO, view: memoryview) -> int:
+        readinto = getattr(stream, 'readinto', None)
+        if readinto is not None:
+            return readinto(view) or 0
+        data = stream.read(len(view))
+        view[:len(data)] = data
+        return len(data)
     
     def process_audio_file(self, audio_base64: str, language: str = 'en') -> Optional[str]:
         """
         Process audio file (base64 encoded)
-        In production, integrate with Google Speech-to-Text or similar service
+        Decoded a chunk at a time into the same streaming recognizer
         """
         try:
-            audio_data = base64.b64decode(audio_base64)
-            # TODO: Integrate with Google Cloud Speech-to-Text API
-            # For now, this is a placeholder
-            return None
-        except Exception as e:
+            session = self.recognizer.start(self.supported_languages.get(language, language))
+            step = self.chunk_size // 3 * 4
+            pending = ''
+            for start in range(0, len(audio_base64), step):
+                # Drop line breaks and other non-alphabet characters as a one-shot b64decode does,
+                # then decode whole 4-character groups and carry the rest into the next slice
+                piece = pending + NON_BASE64.sub('', audio_base64[start:start + step])
+                aligned = len(piece) - len(piece) % 4
+                if aligned:
+                    session.feed(memoryview(base64.b64decode(piece[:aligned])))
+                pending = piece[aligned:]
+            if pending:
+                # Left over characters are truncated input: raises Incorrect padding
+                base64.b64decode(pending)
+            return session.finish()
+        except (binascii.Error, ValueError) as e:
             print(f"Error processing audio: {e}")
             return None
     
@@ -40,3 +170,11 @@ class VoiceProcessor:
         }
         return {code: language_names.get(code, code) for code in self.supported_languages.keys()}
 
+def create_recognizer() -> SpeechRecognizer:
+    """Build the recognizer named by SPEECH_RECOGNIZER (default: stub)"""
+    name = os.environ.get('SPEECH_RECOGNIZER', 'stub').lower()
+    if name not in RECOGNIZERS:
+        raise ValueError(f"Unknown SPEECH_RECOGNIZER: {name}")
+    if name == 'stub':
+        return StubRecognizer(latency=float(os.environ.get('STUB_RECOGNIZER_LATENCY', 0)))
+    return RECOGNIZERS[name]()
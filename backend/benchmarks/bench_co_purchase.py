@@ -0,0 +1,108 @@
+"""
+Benchmark for the co-purchase model
+
+Builds the model the way production does: the offline sparse rebuild
+(needs requirements-offline.txt) over millions of synthetic baskets drawn
+from a skewed 50k-item catalog, then live purchases synced from a purchase
+history. Times top_k()/recommend() against the 1ms target, for items
+picked by popularity, and the sync of each purchase, which re-ranks the
+items it made stale. A small run checks that incremental counts match
+the rebuild.
+Run from the backend directory:
+
+    python -m benchmarks.bench_co_purchase [baskets] [live_purchases]
+"""
+import itertools
+import random
+import sys
+import time
+from typing import Optional
+
+from app.services.co_purchase import CoPurchaseModel
+from app.services.purchase_history import InMemoryPurchaseHistory
+
+CATALOG_SIZE = 50_000
+BASKET_SIZE = (2, 12)
+QUERIES = 20_000
+TARGET_US = 1_000
+
+
+def make_baskets(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    catalog = [f'product-{n}' for n in range(CATALOG_SIZE)]
+    # Zipf-like popularity: a few staples dominate, as in real grocery data
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(CATALOG_SIZE)))
+    return [rng.choices(catalog, cum_weights=cum_weights, k=rng.randint(*BASKET_SIZE))
+            for _ in range(count)]
+
+
+def percentiles_us(samples: list, target_us: Optional[float] = None) -> str:
+    samples = sorted(samples)
+    p50 = samples[len(samples) // 2] * 1e6
+    p99 = samples[int(len(samples) * 0.99)] * 1e6
+    summary = f"p50 {p50:.1f}us  p99 {p99:.1f}us  max {samples[-1] * 1e6:.0f}us"
+    if target_us is not None:
+        summary += f"  ({'within' if p99 < target_us else 'OVER'} the {target_us:,.0f}us p99 target)"
+    return summary
+
+
+def timed(calls) -> list:
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def check_rebuild(baskets: list):
+    model = CoPurchaseModel()
+    for basket in baskets:
+        model.add_basket(basket)
+    rebuilt = CoPurchaseModel.rebuild(baskets)
+    assert rebuilt.item_counts == model.item_counts
+    assert all(
+        rebuilt.pair_counts.get(item, {}) == {o: c for o, c in row.items() if c >= model.min_support}
+        for item, row in model.pair_counts.items()
+    )
+
+
+def main(baskets: int = 2_000_000, live: int = 20_000):
+    try:
+        check_rebuild(make_baskets(20_000, seed=3))
+    except ImportError:
+        print("needs requirements-offline.txt for the offline rebuild")
+        return
+    
+    data = make_baskets(baskets + live)
+    start = time.perf_counter()
+    model = CoPurchaseModel.rebuild(data[:baskets], max_neighbours=100)
+    print(f"offline rebuild: {baskets:,} baskets, {len(model):,} items in {time.perf_counter() - start:.1f}s")
+    
+    # Items in proportion to how often they are bought, so staples dominate the queries
+    rng = random.Random(5)
+    queries = [rng.choice(rng.choice(data)) for _ in range(QUERIES)]
+    in_progress = [rng.choice(data)[:3] for _ in range(QUERIES)]
+    purchases = data[baskets:]
+    # A server holds the model, not the baskets it was built from
+    del data
+    
+    samples = timed(lambda item=item: model.top_k(item, 5) for item in queries)
+    print(f"top_k: {percentiles_us(samples, TARGET_US)}")
+    samples = timed(lambda items=items: model.recommend(items, 5) for items in in_progress)
+    print(f"recommend: {percentiles_us(samples, TARGET_US)}")
+    
+    history = InMemoryPurchaseHistory()
+    
+    def purchase(basket):
+        history.record('bench', basket)
+        model.sync(history)
+    
+    samples = timed(lambda basket=basket: purchase(basket) for basket in purchases)
+    print(f"live purchases, record and sync: {percentiles_us(samples)}")
+    samples = timed(lambda item=item: model.top_k(item, 5) for item in queries)
+    print(f"top_k after them: {percentiles_us(samples, TARGET_US)}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,99 @@
+"""
+Cold start benchmark: time to first response
+
+Each measurement runs in a fresh interpreter, as a scaled-to-zero
+instance would. In-process runs time importing the app, create_app() and
+the first request through the test client, with services built lazily
+and with PRELOAD_SERVICES=1. Gunicorn runs time from launching the
+server to the first successful HTTP response, with and without
+--preload. Run from the backend directory:
+
+    python -m benchmarks.bench_cold_start [runs] [workers]
+"""
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+FIRST_REQUEST = ('/api/shopping/add', {'user_id': 'cold', 'command': 'add milk, eggs, bread'})
+
+IN_PROCESS = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+response = app.test_client().post(%r, json=%r)
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({'import': imported - start, 'create_app': created - imported,
+                  'first_request': done - created, 'total': done - start}))
+''' % FIRST_REQUEST
+
+
+def in_process(preload: bool) -> dict:
+    env = dict(os.environ, PRELOAD_SERVICES='1' if preload else '')
+    output = subprocess.run([sys.executable, '-c', IN_PROCESS], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def gunicorn_first_response(preload: bool, workers: int) -> float:
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+               '--log-level', 'warning', 'wsgi:app']
+    if preload:
+        command.insert(-1, '--preload')
+    env = dict(os.environ, PRELOAD_SERVICES='1' if preload else '')
+    path, body = FIRST_REQUEST
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=json.dumps(body).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    response.read()
+                return time.perf_counter() - start
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError('gunicorn exited')
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(runs: int = 5, workers: int = 4):
+    print(f"in-process, median of {runs} runs (ms)")
+    print(f"{'mode':>8} {'import':>8} {'create':>8} {'first':>8} {'total':>8}")
+    for preload in (False, True):
+        samples = [in_process(preload) for _ in range(runs)]
+        median = {key: statistics.median(sample[key] for sample in samples) * 1e3 for key in samples[0]}
+        print(f"{'preload' if preload else 'lazy':>8} {median['import']:>8.1f} {median['create_app']:>8.1f} "
+              f"{median['first_request']:>8.1f} {median['total']:>8.1f}")
+    
+    if importlib.util.find_spec('gunicorn') is None:
+        print("gunicorn not installed; skipping server runs (pip install -r requirements-async.txt)")
+        return
+    print(f"\ngunicorn, {workers} workers, launch to first response, median of {runs} runs (ms)")
+    for preload in (False, True):
+        median = statistics.median(gunicorn_first_response(preload, workers) for _ in range(runs)) * 1e3
+        print(f"{'--preload' if preload else 'default':>10} {median:>8.1f}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
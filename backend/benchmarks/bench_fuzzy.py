@@ -0,0 +1,91 @@
+"""
+Lookup benchmark for the fuzzy product index
+
+Builds FuzzyIndex over synthetic catalogs of pronounceable product names
+and times lookups of misspelled names (one or two edits away) and of
+words that match nothing, against a linear scan of the same vocabulary.
+Run from the backend directory:
+
+    python -m benchmarks.bench_fuzzy [catalog_size ...]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from app.services.fuzzy_index import FuzzyIndex, _osa_distance
+
+SIZES = [1_000, 100_000]
+QUERIES = 2_000
+CONSONANTS = 'bcdfghklmnprstvz'
+VOWELS = 'aeiou'
+
+
+def product_name(rng: random.Random) -> str:
+    syllables = rng.randint(2, 4)
+    return ''.join(rng.choice(CONSONANTS) + rng.choice(VOWELS) for _ in range(syllables))
+
+
+def misspell(rng: random.Random, word: str, edits: int) -> str:
+    for _ in range(edits):
+        i = rng.randrange(len(word))
+        kind = rng.choice(['delete', 'insert', 'replace', 'swap'])
+        if kind == 'delete' and len(word) > 4:
+            word = word[:i] + word[i + 1:]
+        elif kind == 'insert':
+            word = word[:i] + rng.choice(VOWELS + CONSONANTS) + word[i:]
+        elif kind == 'swap' and i < len(word) - 1:
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        else:
+            word = word[:i] + rng.choice(VOWELS + CONSONANTS) + word[i + 1:]
+    return word
+
+
+def linear_lookup(names: list, word: str, limit: int):
+    best = None
+    for name in names:
+        distance = _osa_distance(word, name, limit)
+        if distance <= limit and (best is None or distance < best[1]):
+            best = (name, distance)
+    return best
+
+
+def time_lookups(lookup, queries: list) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main(sizes):
+    rng = random.Random(7)
+    print(f"{'catalog':>8} {'build s':>8} {'MB':>7} {'query':<10} {'index us':>9} {'scan us':>9} {'found':>6}")
+    for size in sizes:
+        names = list(dict.fromkeys(product_name(rng) for _ in range(size * 2)))[:size]
+        
+        tracemalloc.start()
+        start = time.perf_counter()
+        index = FuzzyIndex(max_distance=2)
+        for name in names:
+            index.add(name)
+        build_seconds = time.perf_counter() - start
+        megabytes = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+        
+        query_sets = {
+            'exact': [rng.choice(names) for _ in range(QUERIES)],
+            '1 edit': [misspell(rng, rng.choice(names), 1) for _ in range(QUERIES)],
+            '2 edits': [misspell(rng, rng.choice(names), 2) for _ in range(QUERIES)],
+            'no match': [''.join(rng.choice('qwxyj') for _ in range(8)) for _ in range(QUERIES)],
+        }
+        for label, queries in query_sets.items():
+            index_us = time_lookups(index.lookup, queries)
+            sample = queries[:max(QUERIES * 100 // size, 5)]
+            scan_us = time_lookups(lambda q: linear_lookup(names, q, index.allowed_distance(q)), sample)
+            found = sum(index.lookup(query) is not None for query in queries) / len(queries)
+            print(f"{size:>8,} {build_seconds:>8.2f} {megabytes:>7.1f} {label:<10} {index_us:>9.1f} "
+                  f"{scan_us:>9.0f} {found:>6.0%}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
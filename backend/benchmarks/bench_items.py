@@ -0,0 +1,67 @@
+"""
+Memory and serialization benchmark for ShoppingItem
+
+Compares the slotted ShoppingItem against the previous dataclass that
+serialized through dataclasses.asdict. Run from the backend directory:
+
+    python -m benchmarks.bench_items
+"""
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+from app.models.shopping_list import ShoppingItem
+
+SIZES = [1_000, 100_000]
+
+
+@dataclass
+class LegacyShoppingItem:
+    """The pre-slots item, kept for comparison"""
+    id: str
+    name: str
+    quantity: int = 1
+    unit: str = "piece"
+    category: str = "uncategorized"
+    price_estimate: float = 0.0
+    added_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    
+    def to_dict(self):
+        return asdict(self)
+
+
+def build(item_cls, size: int) -> list:
+    return [item_cls(id=f'id-{n}', name=f'item {n}', category='dairy') for n in range(size)]
+
+
+def bytes_per_item(item_cls, size: int) -> float:
+    tracemalloc.start()
+    items = build(item_cls, size)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / size
+
+
+def serialize_us_per_item(item_cls, size: int) -> float:
+    items = build(item_cls, size)
+    for item in items:
+        item.to_dict()
+    start = time.perf_counter()
+    for item in items:
+        item.to_dict()
+    return (time.perf_counter() - start) / size * 1e6
+
+
+def main():
+    print(f"{'size':>8} {'metric':<16} {'before':>10} {'after':>10}")
+    for size in SIZES:
+        for metric, measure in (('bytes/item', bytes_per_item), ('to_dict us/item', serialize_us_per_item)):
+            before = measure(LegacyShoppingItem, size)
+            after = measure(ShoppingItem, size)
+            print(f"{size:>8} {metric:<16} {before:>10.2f} {after:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Micro-benchmark for NLPProcessor command parsing
+
+Compares the compiled single-pass parser against the previous
+multi-regex implementation. Run from the backend directory:
+
+    python -m benchmarks.bench_nlp
+"""
+import re
+import time
+from typing import Dict, List, Tuple
+
+from app.services.lru_cache import LRUCache
+from app.services.nlp_processor import NLPProcessor
+
+COMMANDS = [
+    'add milk',
+    'add 2 bread',
+    'show my list',
+    'i need to buy 3 bottles of water',
+    'remove eggs from my list',
+    'what do we have',
+    'search for organic apples',
+    'add milk, eggs, butter to my list',
+    'get 2 kg chicken',
+    'delete the ice cream',
+]
+
+
+class LegacyNLPProcessor(NLPProcessor):
+    """The pre-compiled-engine parser, kept for comparison"""
+    
+    LEGACY_INTENTS = {
+        'ADD': [
+            r'(add|buy|get|need|add me|purchase|put|include)',
+            r'(i\s+(?:need|want|should|must)\s+(?:to\s+)?(?:buy|get|purchase))',
+        ],
+        'REMOVE': [r'(remove|delete|cancel|take off|strike|eliminate)'],
+        'LIST': [r'(show|display|list|what.*have|what.*got|check)'],
+        'SEARCH': [r'(search|find|look for|where)'],
+        'QUANTITY': [r'(\d+)\s*(bottle|piece|kg|liter|pack|box|item|items)'],
+    }
+    
+    def process_command(self, text: str) -> Dict:
+        text = text.lower().strip()
+        result = {
+            'original': text,
+            'intent': self._extract_intent(text),
+            'items': self._extract_items(text),
+            'quantity': self._extract_quantity(text),
+            'category': None,
+        }
+        # The legacy parser corrected nothing
+        result['keys'] = list(result['items'])
+        if result['items']:
+            result['category'] = self._categorize_item(result['items'][0])
+        return result
+    
+    def _extract_intent(self, text: str) -> str:
+        for intent, patterns in self.LEGACY_INTENTS.items():
+            for pattern in patterns:
+                if re.search(pattern, text, re.IGNORECASE):
+                    return intent
+        return 'UNKNOWN'
+    
+    def _extract_items(self, text: str) -> List[str]:
+        stopwords = {'the', 'a', 'an', 'of', 'to', 'and', 'or', 'from', 'in', 'on', 'at', 'by'}
+        cleaned = re.sub(r'(add|buy|get|need|remove|delete|search|find)', '', text, flags=re.IGNORECASE)
+        cleaned = re.sub(r'(\d+\s*(?:bottle|piece|kg|liter|pack|box))', '', cleaned, flags=re.IGNORECASE)
+        cleaned = re.sub(r'(to\s+my\s+list|from\s+my\s+list)', '', cleaned, flags=re.IGNORECASE)
+        items = [word.strip() for word in cleaned.split(',') if word.strip() and word.strip() not in stopwords]
+        return [item for item in items if len(item) > 1]
+    
+    def _extract_quantity(self, text: str) -> Tuple[int, str]:
+        match = re.search(r'(\d+)\s*([a-z]+)?', text, re.IGNORECASE)
+        if match:
+            return int(match.group(1)), match.group(2) or 'piece'
+        return 1, 'piece'
+
+
+def commands_per_second(nlp: NLPProcessor, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for command in COMMANDS:
+            nlp.process_command(command)
+    return rounds * len(COMMANDS) / (time.perf_counter() - start)
+
+
+def main(rounds: int = 20000):
+    uncached = LRUCache(maxsize=0)
+    legacy, compiled = LegacyNLPProcessor(cache=uncached), NLPProcessor(cache=uncached)
+    cached = NLPProcessor(cache=LRUCache(maxsize=1024))
+    
+    for command in COMMANDS:
+        assert legacy.process_command(command) == compiled.process_command(command), command
+    
+    before = commands_per_second(legacy, rounds)
+    after = commands_per_second(compiled, rounds)
+    warm = commands_per_second(cached, rounds)
+    print(f"before: {before:,.0f} commands/s")
+    print(f"after:  {after:,.0f} commands/s ({after / before:.2f}x)")
+    print(f"cached: {warm:,.0f} commands/s ({warm / before:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
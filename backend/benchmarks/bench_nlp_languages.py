@@ -0,0 +1,51 @@
+"""
+Cold versus warm parse latency per language
+
+Language packs are compiled on the first command in their language. For
+each language this drops the compiled pack (and its rules module), then
+times that first parse, which imports and compiles the pack, against the
+mean of later uncached parses. Run from the backend directory:
+
+    python -m benchmarks.bench_nlp_languages [rounds]
+"""
+import sys
+import time
+
+from app.services import nlp_processor
+from app.services.lru_cache import LRUCache
+from app.services.nlp_processor import NLPProcessor
+
+COMMANDS = {
+    'en': ['add milk, eggs, butter to my list', 'get 2 kg chicken', 'remove eggs from my list'],
+    'es': ['añade leche a mi lista', 'compra 2 litros de leche', 'quita los huevos de mi lista'],
+    'fr': ["ajoute 2 bouteilles d'eau à ma liste", 'achète du pain', 'enlève le fromage'],
+    'de': ['füge milch zu meiner liste hinzu', 'kaufe 3 flaschen wasser', 'lösche brot'],
+    'hi': ['दूध जोड़ो', '2 किलो चावल खरीदो', 'मेरी सूची में अंडे डालो'],
+}
+
+
+def unload(language: str):
+    nlp_processor._packs.pop(language, None)
+    sys.modules.pop(f'{nlp_processor.language_packs.__name__}.{language}', None)
+
+
+def main(rounds: int = 2000):
+    nlp = NLPProcessor(cache=LRUCache(maxsize=0))
+    print(f"packs compiled at import: {len(nlp_processor._packs)}")
+    print(f"{'language':>8} {'cold ms':>8} {'warm us':>8}")
+    for language, commands in COMMANDS.items():
+        unload(language)
+        start = time.perf_counter()
+        nlp.process_command(commands[0], language)
+        cold = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for command in commands:
+                nlp.process_command(command, language)
+        warm = (time.perf_counter() - start) / (rounds * len(commands))
+        print(f"{language:>8} {cold * 1e3:>8.2f} {warm * 1e6:>8.1f}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,90 @@
+"""
+Incremental parse sessions versus parsing every interim transcript
+
+Feeds utterances to the parser the way a recognizer reports them, one
+interim transcript per word with the occasional revised last word, and
+compares parsing each transcript from scratch against one ParseSession
+per utterance. Also times the final parse after the interim ones, which
+is what the user waits for once they stop talking. Run from the backend
+directory:
+    
+    python -m benchmarks.bench_parse_session [rounds]
+"""
+import sys
+import time
+
+from app.services.lru_cache import LRUCache
+from app.services.nlp_processor import NLPProcessor
+from app.services.parse_session import ParseSession
+
+UTTERANCES = [
+    'add two bottles of milk, some brocoli, orange juice and a loaf of bread to my list',
+    'i need 3 kg chicken, basmati rice, tomatos, onions and fresh coriander',
+    'get 2 packs of pasta, parmesan cheese, olive oil and a bottle of red wine',
+    'remove the eggs and the strawberry yogurt from my list',
+]
+
+
+def interim_transcripts(utterance: str):
+    """Growing transcripts, each last word first heard as a shorter word"""
+    words = utterance.split(' ')
+    transcripts = []
+    for n in range(1, len(words) + 1):
+        heard = words[:n]
+        if len(heard[-1]) > 4:
+            transcripts.append(' '.join(heard[:-1] + [heard[-1][:3]]))
+        transcripts.append(' '.join(heard))
+    return transcripts
+
+
+def main(rounds: int = 200):
+    nlp = NLPProcessor(cache=LRUCache(maxsize=0))
+    utterances = [interim_transcripts(utterance) for utterance in UTTERANCES]
+    updates = sum(len(transcripts) for transcripts in utterances)
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for transcripts in utterances:
+            for transcript in transcripts:
+                nlp.process_command(transcript)
+    scratch = time.perf_counter() - start
+    
+    final = 0.0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for transcripts in utterances:
+            session = ParseSession(nlp)
+            for transcript in transcripts[:-1]:
+                session.update(transcript)
+            finished = time.perf_counter()
+            session.finish(transcripts[-1])
+            final += time.perf_counter() - finished
+    incremental = time.perf_counter() - start
+    
+    repeated = 0.0
+    for _ in range(rounds):
+        for transcripts in utterances:
+            session = ParseSession(nlp)
+            for transcript in transcripts:
+                session.update(transcript)
+            finished = time.perf_counter()
+            session.finish(transcripts[-1])
+            repeated += time.perf_counter() - finished
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for transcripts in utterances:
+            nlp.process_command(transcripts[-1])
+    final_scratch = time.perf_counter() - start
+    
+    runs = rounds * len(utterances)
+    print(f"{len(utterances)} utterances, {updates} interim transcripts, {rounds} rounds")
+    print(f"per transcript: from scratch {scratch / (rounds * updates) * 1e6:.0f}us, "
+          f"session {incremental / (rounds * updates) * 1e6:.0f}us ({scratch / incremental:.1f}x)")
+    print(f"final parse after speaking: from scratch {final_scratch / runs * 1e6:.0f}us, "
+          f"session {final / runs * 1e6:.0f}us ({final_scratch / final:.1f}x), "
+          f"session when it repeats the last interim transcript {repeated / runs * 1e6:.0f}us")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
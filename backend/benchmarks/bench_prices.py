@@ -0,0 +1,73 @@
+"""
+Price catalog benchmark
+
+Writes a synthetic CSV catalog and times loading it three ways (a plain
+dict of tuples, the packed in-memory catalog, the memory-mapped compiled
+catalog), then bulk lookups and list totals against the mapped catalog,
+and how long the request thread is held when a changed catalog is
+reloaded. Run from the backend directory:
+
+    python -m benchmarks.bench_prices [rows]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from app.services.price_catalog import PriceEngine, compile_catalog, open_catalog, read_csv
+
+LIST_SIZE = 100
+ROUNDS = 200
+
+
+def write_csv(path: str, rows: int):
+    rng = random.Random(3)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'min', 'max', 'avg'])
+        for n in range(rows):
+            low = round(rng.uniform(0.5, 20), 2)
+            writer.writerow([f'product {n}', low, round(low * 1.6, 2), round(low * 1.3, 2)])
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(rows: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'prices.csv')
+        target = os.path.join(directory, 'prices.bin')
+        write_csv(source, rows)
+        
+        _, dict_s = timed(lambda: {name: (low, high, avg) for name, low, high, avg in read_csv(source)})
+        _, packed_s = timed(lambda: open_catalog(source))
+        _, compile_s = timed(lambda: compile_catalog(source, target))
+        catalog, mapped_s = timed(lambda: open_catalog(target))
+        print(f"{rows:,} rows: dict {dict_s:.2f}s, packed {packed_s:.2f}s, "
+              f"compile {compile_s:.2f}s, mmap open {mapped_s * 1e3:.2f}ms")
+        
+        engine = PriceEngine(catalog, target, check_interval=0)
+        rng = random.Random(9)
+        lists = [[f'product {rng.randrange(rows * 2)}' for _ in range(LIST_SIZE)] for _ in range(ROUNDS)]
+        quantities = [rng.randint(1, 4) for _ in range(LIST_SIZE)]
+        
+        _, lookup_s = timed(lambda: [engine.get_price_ranges(names) for names in lists])
+        _, totals_s = timed(lambda: [engine.estimate_totals(names, quantities) for names in lists])
+        print(f"{LIST_SIZE}-item list: price ranges {lookup_s / ROUNDS * 1e6:.0f}us, "
+              f"totals {totals_s / ROUNDS * 1e6:.0f}us")
+        
+        # Touch the file and time the request that notices the change
+        compile_catalog(source, target)
+        _, check_s = timed(lambda: engine.catalog)
+        while not engine.reloads:
+            time.sleep(0.01)
+        print(f"reload: request held {check_s * 1e3:.2f}ms while the new catalog loaded in the background")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+"""
+Profiling overhead benchmark
+
+Times /api/shopping/add through the test client with PROFILING off, on
+for requests sending X-Profile but without one, with stage timings and
+with every request under cProfile. PROFILING is read at import, so each
+mode runs in a fresh interpreter. Each command is new so every request
+parses, and requests are spread over USERS lists so they stay short. Run
+from the backend directory:
+
+    python -m benchmarks.bench_profiling [requests] [rounds]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODES = [
+    ('off', 'off', ''),
+    ('no header', 'header', ''),
+    ('timings', 'header', '1'),
+    ('cprofile', 'header', 'cprofile'),
+]
+USERS = 100
+
+RUN = '''
+import json, sys, time
+from app import create_app
+from app.services import profiling
+header, requests, rounds, users = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+client = create_app().test_client()
+headers = {profiling.HEADER: header, profiling.TOKEN_HEADER: 'bench'} if header else {}
+def run(round_, count):
+    start = time.perf_counter()
+    for i in range(count):
+        client.post('/api/shopping/add', headers=headers,
+                    json={'user_id': f'profiling-{round_}-{i % users}', 'command': f'add {i} kg item{i} {round_}'})
+    return (time.perf_counter() - start) / count
+run(-1, 200)
+print(json.dumps([run(round_, requests) for round_ in range(rounds)]))
+'''
+
+
+def time_requests(mode: str, header: str, requests: int, rounds: int) -> float:
+    env = dict(os.environ, PROFILING=mode, PROFILING_DIR=tempfile.mkdtemp(), PROFILING_TOKEN='bench')
+    output = subprocess.run([sys.executable, '-c', RUN, header, str(requests), str(rounds), str(USERS)],
+                            env=env, check=True, capture_output=True, text=True).stdout
+    return statistics.median(json.loads(output.strip().splitlines()[-1]))
+
+
+def main(requests: int = 2000, rounds: int = 5):
+    print(f"/api/shopping/add, median of {rounds} rounds of {requests} requests")
+    print(f"{'mode':>10} {'us/request':>11} {'vs off':>8}")
+    baseline = None
+    for name, mode, header in MODES:
+        median = time_requests(mode, header, requests, rounds)
+        baseline = baseline or median
+        print(f"{name:>10} {median * 1e6:>11.1f} {(median / baseline - 1) * 100:>+7.1f}%")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""
+Ranking benchmark for RecommendationEngine
+
+Times the merge-and-select stage on candidate pools from 10 to 10,000
+candidates (about a third of them duplicates proposed by a second source),
+against the old concatenate, dedupe and truncate approach, and checks how
+often the old approach dropped a higher-confidence candidate. Run from the
+backend directory:
+
+    python -m benchmarks.bench_recommendations [k]
+"""
+import random
+import sys
+import time
+
+from app.services.recommendation_engine import RecommendationEngine
+
+POOL_SIZES = [10, 100, 1_000, 10_000]
+TYPES = ['frequently_together', 'seasonal', 'restock']
+ROUNDS = 200
+
+
+def candidate_pool(rng: random.Random, size: int) -> list:
+    items = [f'item-{n}' for n in range(size * 2 // 3 + 1)]
+    return [{
+        'item': rng.choice(items),
+        'reason': 'benchmark',
+        'confidence': round(rng.uniform(0.3, 0.95), 2),
+        'type': rng.choice(TYPES),
+    } for _ in range(size)]
+
+
+def legacy_rank(candidates: list, k: int) -> list:
+    seen = set()
+    unique = []
+    for rec in candidates:
+        if rec['item'] not in seen:
+            unique.append(rec)
+            seen.add(rec['item'])
+    return unique[:k]
+
+
+def time_per_call(rank, pools: list) -> float:
+    start = time.perf_counter()
+    for pool in pools:
+        rank(pool)
+    return (time.perf_counter() - start) / len(pools) * 1e6
+
+
+def main(k: int = 5):
+    rng = random.Random(11)
+    print(f"{'candidates':>10} {'heap us':>9} {'sort us':>9} {'legacy us':>10} {'legacy missed best':>19}")
+    for size in POOL_SIZES:
+        pools = [candidate_pool(rng, size) for _ in range(ROUNDS)]
+        heap_us = time_per_call(lambda pool: RecommendationEngine._rank(pool, set(), k), pools)
+        sort_us = time_per_call(lambda pool: RecommendationEngine._rank(pool, set(), len(pool)), pools)
+        legacy_us = time_per_call(lambda pool: legacy_rank(pool, k), pools)
+        missed = sum(
+            max(rec['confidence'] for rec in pool) > max(rec['confidence'] for rec in legacy_rank(pool, k))
+            for pool in pools
+        ) / len(pools)
+        print(f"{size:>10,} {heap_us:>9.1f} {sort_us:>9.1f} {legacy_us:>10.1f} {missed:>19.0%}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,85 @@
+"""
+Restock prediction benchmark
+
+Builds a synthetic purchase log (every user rebuys a few dozen items on
+their own noisy schedule) and times:
+
+- due(): the per-user heap, against rescanning the user's whole history
+- learning every user's intervals by replaying the log in Python, against
+  the NumPy batch rebuild, checking that both give the same intervals
+
+Run from the backend directory (the rebuild needs requirements-offline.txt):
+
+    python -m benchmarks.bench_restock [users] [purchases_per_user]
+"""
+import random
+import sys
+import time
+
+from app.services.purchase_history import InMemoryPurchaseHistory
+from app.services.restock import DAY, RestockModel
+
+ITEMS = 40
+LOOKUPS = 2_000
+
+
+def build_history(users: int, per_user: int) -> InMemoryPurchaseHistory:
+    rng = random.Random(17)
+    history = InMemoryPurchaseHistory()
+    # Spread so the log ends around now, leaving some items due and some not
+    start = time.time() - per_user / ITEMS * 16.5 * DAY
+    for n in range(users):
+        periods = {f'item-{i}': rng.uniform(3, 30) * DAY for i in range(ITEMS)}
+        next_due = {item: start + rng.uniform(0, period) for item, period in periods.items()}
+        for _ in range(per_user):
+            item = min(next_due, key=next_due.get)
+            history.record(f'user-{n}', [item], purchased_at=next_due[item])
+            next_due[item] += periods[item] * rng.uniform(0.7, 1.3)
+    return history
+
+
+def scan_due(history: InMemoryPurchaseHistory, model: RestockModel, user_id: str, now: float) -> list:
+    items = model.learn(history.purchases(user_id))
+    due = []
+    for item, (last, interval) in items.items():
+        if interval is not None and last + interval <= now:
+            due.append(item)
+    return due
+
+
+def main(users: int = 1_000, per_user: int = 200):
+    history = build_history(users, per_user)
+    print(f"{users:,} users, {users * per_user:,} purchases")
+    
+    start = time.perf_counter()
+    model = RestockModel(history)
+    learned = {f'user-{n}': model.learn(history.purchases(f'user-{n}')) for n in range(users)}
+    replay_s = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    rebuilt = RestockModel.rebuild(history)
+    rebuild_s = time.perf_counter() - start
+    mismatches = sum(
+        abs((interval or 0) - (rebuilt._users[user_id].items[item][1] or 0)) > 1e-6
+        for user_id, items in learned.items() for item, (_, interval) in items.items()
+    )
+    print(f"learn all: replay {replay_s:.2f}s, NumPy rebuild {rebuild_s:.2f}s, {mismatches} mismatched intervals")
+    
+    rng = random.Random(5)
+    now = time.time()
+    user_ids = [f'user-{rng.randrange(users)}' for _ in range(LOOKUPS)]
+    
+    start = time.perf_counter()
+    for user_id in user_ids:
+        rebuilt.due(user_id, now)
+    heap_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+    
+    start = time.perf_counter()
+    for user_id in user_ids:
+        scan_due(history, rebuilt, user_id, now)
+    scan_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+    print(f"due() per call: heap {heap_us:.1f}us, history scan {scan_us:.1f}us")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
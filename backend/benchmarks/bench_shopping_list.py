@@ -0,0 +1,81 @@
+"""
+Benchmark of ShoppingList operations at different list sizes
+
+Compares the indexed ShoppingList against the previous scan-based list.
+Run from the backend directory:
+
+    python -m benchmarks.bench_shopping_list
+"""
+import time
+import uuid
+from typing import List
+
+from app.models.shopping_list import ShoppingItem, ShoppingList
+
+SIZES = [10, 1_000, 100_000]
+CATEGORIES = ['dairy', 'produce', 'meat', 'bakery', 'pantry']
+
+
+class LegacyShoppingList:
+    """The pre-index list, kept for comparison"""
+    
+    def __init__(self, id: str, user_id: str):
+        self.id = id
+        self.user_id = user_id
+        self.items: List[ShoppingItem] = []
+    
+    def add_item(self, item: ShoppingItem):
+        existing = next((i for i in self.items if i.name.lower() == item.name.lower()), None)
+        if existing:
+            existing.quantity += item.quantity
+        else:
+            self.items.append(item)
+    
+    def remove_item(self, item_id: str):
+        self.items = [i for i in self.items if i.id != item_id]
+    
+    def get_by_category(self, category: str) -> List[ShoppingItem]:
+        return [i for i in self.items if i.category.lower() == category.lower()]
+
+
+def make_item(n: int) -> ShoppingItem:
+    return ShoppingItem(id=str(uuid.uuid4()), name=f'Item {n}', category=CATEGORIES[n % len(CATEGORIES)])
+
+
+def time_per_op(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for n in range(ops):
+        fn(n)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def run(list_cls, size: int, ops: int) -> dict:
+    shopping_list = list_cls(id='bench', user_id='bench')
+    if isinstance(shopping_list, LegacyShoppingList):
+        # Filling the legacy list through add_item is quadratic
+        shopping_list.items = [make_item(n) for n in range(size)]
+    else:
+        for n in range(size):
+            shopping_list.add_item(make_item(n))
+    
+    new_items = [make_item(size + n) for n in range(ops)]
+    repeats = [make_item(n % size) for n in range(ops)]
+    return {
+        'add new': time_per_op(lambda n: shopping_list.add_item(new_items[n]), ops),
+        'add existing': time_per_op(lambda n: shopping_list.add_item(repeats[n]), ops),
+        'get category': time_per_op(lambda n: shopping_list.get_by_category('Dairy'), ops),
+        'remove': time_per_op(lambda n: shopping_list.remove_item(new_items[n].id), ops),
+    }
+
+
+def main(ops: int = 100):
+    print(f"{'size':>8} {'operation':<14} {'before us/op':>14} {'after us/op':>14}")
+    for size in SIZES:
+        before = run(LegacyShoppingList, size, ops)
+        after = run(ShoppingList, size, ops)
+        for operation in before:
+            print(f"{size:>8} {operation:<14} {before[operation]:>14.2f} {after[operation]:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
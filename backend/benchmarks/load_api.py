@@ -0,0 +1,428 @@
+"""
+Mixed-workload load test for the whole API
+
+Replays a reproducible mix of adds with quantities, removes, list reads,
+category reads, recommendation calls and purchase records for `users`
+households whose lists start with `list_size` items. It runs in process
+through the WSGI test client (the app's own cost, no HTTP) and against
+gunicorn over local HTTP, and reports throughput, p50/p95/p99 latency and
+memory per endpoint. Save the results with --output and diff two runs,
+e.g. before and after a commit, with --compare. Run from the backend
+directory:
+
+    python -m benchmarks.load_api [--mode client|gunicorn|both] [--users 50] [--list-size 50]
+                                  [--requests 5000] [--concurrency 8] [--workers 4] [--output results.json]
+    python -m benchmarks.load_api --compare before.json after.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+# Relative weights of each request kind in the mix
+MIX = {
+    'add': 30,
+    'remove': 10,
+    'list': 25,
+    'category': 10,
+    'recommendations': 20,
+    'record_purchase': 5,
+}
+PRODUCTS = ['milk', 'cheese', 'butter', 'yogurt', 'apple', 'banana', 'orange', 'carrot', 'chicken', 'beef',
+            'fish', 'chips', 'cookie', 'chocolate', 'water', 'juice', 'coffee', 'bread', 'bagel', 'ice cream',
+            'frozen pizza', 'rice', 'pasta', 'oil', 'soap', 'shampoo', 'toothpaste', 'detergent']
+CATEGORIES = ['dairy', 'produce', 'meat', 'snacks', 'beverages', 'bakery', 'frozen', 'pantry']
+UNITS = ['kg', 'pack', 'bottle', 'box']
+BRANDS = ['acme', 'organic', 'fresh', 'value', 'premium', 'local', 'classic', 'family']
+SETUP_BATCH = 100
+
+
+class Workload:
+    """A reproducible stream of API requests over a set of households.
+    
+    Each client thread owns some of the users and its own random stream,
+    and remembers the ids and names on its users' lists from the
+    responses it gets, so removes and recommendation calls name real items.
+    """
+    
+    def __init__(self, users: int, list_size: int, seed: int = 7):
+        self.users = [f'load-user-{n}' for n in range(users)]
+        self.list_size = list_size
+        self.seed = seed
+        self.items = {user_id: [] for user_id in self.users}
+        self._kinds = list(MIX)
+        self._weights = [MIX[kind] for kind in self._kinds]
+    
+    def name(self, rng: random.Random) -> str:
+        return f'{rng.choice(BRANDS)}{rng.randrange(self.list_size or 1)} {rng.choice(PRODUCTS)}'
+    
+    def setup_requests(self):
+        """Batches of add commands giving every user a list of about list_size items"""
+        rng = random.Random(self.seed)
+        for user_id in self.users:
+            commands = [f'add {self.name(rng)}' for _ in range(self.list_size)]
+            for start in range(0, len(commands), SETUP_BATCH):
+                yield 'setup', 'POST', '/api/shopping/add-batch', {
+                    'user_id': user_id, 'commands': commands[start:start + SETUP_BATCH]
+                }
+    
+    def next_request(self, rng: random.Random, users):
+        """Pick the next request of the mix for one of the given users"""
+        user_id = rng.choice(users)
+        kind = rng.choices(self._kinds, self._weights)[0]
+        items = self.items[user_id]
+        if kind == 'remove' and not items:
+            kind = 'add'
+        
+        if kind == 'add':
+            command = f'add {rng.randint(1, 5)} {rng.choice(UNITS)} {self.name(rng)}'
+            return kind, 'POST', '/api/shopping/add', {'user_id': user_id, 'command': command}
+        if kind == 'remove':
+            item_id, _ = items[rng.randrange(len(items))]
+            return kind, 'POST', '/api/shopping/remove', {'user_id': user_id, 'item_id': item_id}
+        if kind == 'list':
+            return kind, 'GET', f'/api/shopping/list?user_id={user_id}', None
+        if kind == 'category':
+            return kind, 'GET', f'/api/shopping/category/{rng.choice(CATEGORIES)}?user_id={user_id}', None
+        if kind == 'recommendations':
+            names = [name for _, name in rng.sample(items, min(3, len(items)))]
+            query = urllib.parse.urlencode([('user_id', user_id)] + [('items', name) for name in names])
+            return kind, 'GET', f'/api/recommendations/personalized?{query}', None
+        basket = [rng.choice(PRODUCTS) for _ in range(rng.randint(1, 6))]
+        return kind, 'POST', '/api/recommendations/record-purchase', {'user_id': user_id, 'items': basket}
+    
+    def observe(self, kind: str, body, response: dict):
+        """Remember the items on a user's list from a response that carries it"""
+        shopping_list = response.get('shopping_list') or (response if kind == 'list' else None)
+        if shopping_list and 'items' in shopping_list:
+            self.items[shopping_list['user_id']] = [(item['id'], item['name']) for item in shopping_list['items']]
+
+
+def rss_kb(pid: int = None) -> int:
+    """Resident memory of a process in kB, 0 where /proc isn't available"""
+    try:
+        with open(f'/proc/{pid or "self"}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss_kb(pid: int) -> int:
+    """Resident memory of a process and all of its children in kB"""
+    total = rss_kb(pid)
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return total
+    return total + sum(process_tree_rss_kb(child) for child in children)
+
+
+def percentile(ordered, fraction: float) -> float:
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1e3 if ordered else 0.0
+
+
+def summarize(samples: dict, errors: dict, growth: dict, elapsed: float) -> dict:
+    endpoints = {}
+    for kind in MIX:
+        latencies = sorted(samples.get(kind, []))
+        endpoints[kind] = {
+            'requests': len(latencies),
+            'errors': errors.get(kind, 0),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'mean_ms': round(sum(latencies) / len(latencies) * 1e3, 3) if latencies else 0.0,
+            'p50_ms': round(percentile(latencies, 0.50), 3),
+            'p95_ms': round(percentile(latencies, 0.95), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+        }
+        if kind in growth:
+            endpoints[kind]['rss_growth_kb'] = growth[kind]
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'errors': sum(errors.values()),
+        'throughput_rps': round(total / elapsed, 1),
+        'endpoints': endpoints,
+    }
+
+
+def drive(workload: Workload, send, requests: int, concurrency: int, track_rss: bool = False) -> dict:
+    """Send the mix from `concurrency` threads, each owning a share of the users.
+    
+    send(method, path, body) returns (status, decoded JSON or None). With
+    track_rss, the growth of this process's RSS over each request is
+    added up per endpoint; it is read outside the timed part.
+    """
+    samples = {kind: [] for kind in MIX}
+    errors = {}
+    growth = {kind: 0 for kind in MIX} if track_rss else {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+    
+    def client(n: int):
+        rng = random.Random(workload.seed * 1000 + n)
+        users = workload.users[n::concurrency] or workload.users
+        count = requests // concurrency + (n < requests % concurrency)
+        latencies = {kind: [] for kind in MIX}
+        failed = {}
+        grown = {kind: 0 for kind in MIX}
+        barrier.wait()
+        for _ in range(count):
+            kind, method, path, body = workload.next_request(rng, users)
+            before = rss_kb() if track_rss else 0
+            start = time.perf_counter()
+            status, response = send(method, path, body)
+            latencies[kind].append(time.perf_counter() - start)
+            if track_rss:
+                grown[kind] += max(rss_kb() - before, 0)
+            if status >= 400:
+                failed[kind] = failed.get(kind, 0) + 1
+            elif response:
+                workload.observe(kind, body, response)
+        with lock:
+            for kind in MIX:
+                samples[kind] += latencies[kind]
+                if track_rss:
+                    growth[kind] += grown[kind]
+            for kind, count in failed.items():
+                errors[kind] = errors.get(kind, 0) + count
+    
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, errors, growth, time.perf_counter() - start)
+
+
+def set_up(workload: Workload, send):
+    for _, method, path, body in workload.setup_requests():
+        status, response = send(method, path, body)
+        if status >= 400:
+            raise RuntimeError(f'setup request failed with {status}: {response}')
+    for user_id in workload.users:
+        status, response = send('GET', f'/api/shopping/list?user_id={user_id}', None)
+        workload.observe('list', None, response)
+
+
+def run_client(args) -> dict:
+    """Drive the app in this process through the WSGI test client"""
+    start_rss = rss_kb()
+    from app import create_app
+    app = create_app()
+    local = threading.local()
+    
+    def send(method, path, body):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+    
+    workload = Workload(args.users, args.list_size, args.seed)
+    set_up(workload, send)
+    drive(workload, send, args.warmup, args.concurrency)
+    loaded_rss = rss_kb()
+    result = drive(workload, send, args.requests, args.concurrency, track_rss=True)
+    result['rss_kb'] = {'start': start_rss, 'loaded': loaded_rss, 'end': rss_kb()}
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, args) -> subprocess.Popen:
+    data_dir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(args.workers),
+        GUNICORN_WORKER_CLASS=args.worker_class,
+        GUNICORN_LOG_LEVEL='warning',
+        SHOPPING_LIST_DB=os.path.join(data_dir, 'shopping_lists.db'),
+        PURCHASE_HISTORY_DB=os.path.join(data_dir, 'purchase_history.db'),
+        METRICS_DIR=os.path.join(data_dir, 'metrics'),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '--access-logfile', '/dev/null', 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def run_gunicorn(args) -> dict:
+    """Drive gunicorn over local HTTP, reusing connections the server keeps open"""
+    port = free_port()
+    server = start_server(port, args)
+    local = threading.local()
+    
+    def send(method, path, body):
+        connection = getattr(local, 'connection', None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # The server closed an idle connection; retry once on a new one
+            connection.close()
+            connection.request(method, path, payload, headers)
+            response = connection.getresponse()
+            data = response.read()
+        if response.will_close:
+            connection.close()
+        return response.status, json.loads(data) if data else None
+    
+    peak = [0]
+    sampling = threading.Event()
+    
+    def sample_rss():
+        while not sampling.wait(0.25):
+            peak[0] = max(peak[0], process_tree_rss_kb(server.pid))
+    
+    try:
+        workload = Workload(args.users, args.list_size, args.seed)
+        set_up(workload, send)
+        drive(workload, send, args.warmup, args.concurrency)
+        loaded_rss = process_tree_rss_kb(server.pid)
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        result = drive(workload, send, args.requests, args.concurrency)
+        sampling.set()
+        sampler.join()
+        end_rss = process_tree_rss_kb(server.pid)
+        result['rss_kb'] = {'loaded': loaded_rss, 'peak': max(peak[0], end_rss), 'end': end_rss}
+    finally:
+        server.terminate()
+        server.wait()
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def report(mode: str, result: dict):
+    rss = ', '.join(f'{key} {value / 1024:.1f}MB' for key, value in result['rss_kb'].items())
+    print(f"\n{mode}: {result['requests']} requests in {result['elapsed_s']:.2f}s, "
+          f"{result['throughput_rps']:.0f} req/s, {result['errors']} errors, RSS {rss}")
+    print(f"{'endpoint':<16} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}"
+          + (f" {'RSS +kB':>8}" if mode == 'client' else ''))
+    for kind, endpoint in result['endpoints'].items():
+        line = (f"{kind:<16} {endpoint['requests']:>6} {endpoint['throughput_rps']:>8.0f} {endpoint['p50_ms']:>8.2f} "
+                f"{endpoint['p95_ms']:>8.2f} {endpoint['p99_ms']:>8.2f} {endpoint['errors']:>6}")
+        if 'rss_growth_kb' in endpoint:
+            line += f" {endpoint['rss_growth_kb']:>8}"
+        print(line)
+
+
+def compare(before_path: str, after_path: str):
+    """Print how each run and endpoint changed between two saved results"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before['meta'].get('commit') or before_path} -> {after['meta'].get('commit') or after_path}")
+    
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.0f}%" if old else 'n/a'
+    
+    for mode in after['runs']:
+        if mode not in before['runs']:
+            continue
+        old_run, new_run = before['runs'][mode], after['runs'][mode]
+        print(f"\n{mode}: {old_run['throughput_rps']:.0f} -> {new_run['throughput_rps']:.0f} req/s "
+              f"({change(old_run['throughput_rps'], new_run['throughput_rps'])})")
+        print(f"{'endpoint':<16} {'p50 ms':>18} {'p99 ms':>18}")
+        for kind, new in new_run['endpoints'].items():
+            old = old_run['endpoints'].get(kind)
+            if old is None:
+                continue
+            print(f"{kind:<16} {old['p50_ms']:>7.2f} -> {new['p50_ms']:<7.2f}{change(old['p50_ms'], new['p50_ms']):>5} "
+                  f"{old['p99_ms']:>7.2f} -> {new['p99_ms']:<7.2f}{change(old['p99_ms'], new['p99_ms']):>5}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mixed-workload load test for the API')
+    parser.add_argument('--mode', choices=['client', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--list-size', type=int, default=50, help='items on each list before the run')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--worker-class', default='sync', help='gunicorn worker class')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='diff two saved results')
+    args = parser.parse_args(argv)
+    
+    if args.compare:
+        compare(*args.compare)
+        return
+    
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    print(f"{args.users} users, lists of {args.list_size} items, {args.requests} requests "
+          f"from {args.concurrency} threads, mix {MIX}")
+    runs = {}
+    if args.mode in ('client', 'both'):
+        runs['client'] = run_client(args)
+        report('client', runs['client'])
+    if args.mode in ('gunicorn', 'both'):
+        runs['gunicorn'] = run_gunicorn(args)
+        report(f"gunicorn ({args.workers} {args.worker_class} workers)", runs['gunicorn'])
+    
+    if args.output:
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+            },
+            'config': config,
+            'mix': MIX,
+            'runs': runs,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nsaved {args.output}")
+
+
+if __name__ == '__main__':
+    main()
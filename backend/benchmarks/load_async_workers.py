@@ -0,0 +1,135 @@
+"""
+Sync vs gevent gunicorn workers under many concurrent slow clients
+
+Starts gunicorn once per worker class with the same number of workers and
+a stub recognizer that takes `latency` seconds per transcript (standing in
+for a speech-to-text call), then opens `clients` concurrent connections
+that alternate a chunked audio upload to /api/voice/stream-audio with a
+/api/voice/process-command call. Reports p50/p99 latency per mode. Needs
+requirements-async.txt. Run from the backend directory:
+    
+    python -m benchmarks.load_async_workers [clients] [requests_per_client] [workers] [latency_ms]
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+MODES = ['sync', 'gevent']
+AUDIO = [b'add ', b'2 bottles ', b'of ', b'milk']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(worker_class: str, workers: int, port: int, latency: float) -> subprocess.Popen:
+    data_dir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_WORKER_CLASS=worker_class,
+        GUNICORN_LOG_LEVEL='warning',
+        STUB_RECOGNIZER_LATENCY=str(latency),
+        AUDIO_POOL_WORKERS='64',
+        AUDIO_POOL_PENDING='1000',
+        SHOPPING_LIST_DB=os.path.join(data_dir, 'shopping_lists.db'),
+        PURCHASE_HISTORY_DB=os.path.join(data_dir, 'purchase_history.db'),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '--access-logfile', '/dev/null', 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f'gunicorn ({worker_class}) did not start')
+
+
+async def send(port: int, head: bytes, body_parts) -> float:
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(head)
+    for part in body_parts:
+        writer.write(part)
+        await writer.drain()
+    response = await reader.read()
+    writer.close()
+    if not response.startswith(b'HTTP/1.1 200'):
+        raise RuntimeError(response.split(b'\r\n', 1)[0].decode())
+    return time.perf_counter() - start
+
+
+def upload_audio(port: int):
+    head = (b'POST /api/voice/stream-audio?language=en HTTP/1.1\r\nHost: localhost\r\n'
+            b'Content-Type: application/octet-stream\r\nTransfer-Encoding: chunked\r\n'
+            b'Connection: close\r\n\r\n')
+    chunks = [b'%x\r\n%s\r\n' % (len(part), part) for part in AUDIO] + [b'0\r\n\r\n']
+    return send(port, head, chunks)
+
+
+def process_command(port: int):
+    body = json.dumps({'command': 'add 2 bottles of milk'}).encode()
+    head = (b'POST /api/voice/process-command HTTP/1.1\r\nHost: localhost\r\n'
+            b'Content-Type: application/json\r\nContent-Length: %d\r\n'
+            b'Connection: close\r\n\r\n' % len(body))
+    return send(port, head, [body])
+
+
+async def client(port: int, requests: int, latencies: dict, errors: list):
+    for n in range(requests):
+        kind = 'stream-audio' if n % 2 == 0 else 'process-command'
+        try:
+            if kind == 'stream-audio':
+                latencies[kind].append(await upload_audio(port))
+            else:
+                latencies[kind].append(await process_command(port))
+        except (OSError, RuntimeError) as e:
+            errors.append(str(e))
+
+
+async def run_clients(port: int, clients: int, requests: int):
+    latencies = {'stream-audio': [], 'process-command': []}
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, latencies, errors) for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000 if ordered else 0.0
+
+
+def main(clients: int = 500, requests: int = 4, workers: int = 4, latency_ms: int = 50):
+    print(f"{clients} concurrent clients x {requests} requests, {workers} workers, "
+          f"{latency_ms}ms recognizer latency")
+    print(f"{'mode':<8} {'endpoint':<16} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7}")
+    for mode in MODES:
+        port = free_port()
+        server = start_server(mode, workers, port, latency_ms / 1000)
+        try:
+            latencies, errors, elapsed = asyncio.run(run_clients(port, clients, requests))
+        finally:
+            server.terminate()
+            server.wait()
+        done = sum(len(values) for values in latencies.values())
+        for endpoint, values in latencies.items():
+            print(f"{mode:<8} {endpoint:<16} {percentile(values, 0.5):>9.1f} {percentile(values, 0.99):>9.1f} "
+                  f"{done / elapsed:>8.0f} {len(errors):>7}")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+"""
+Multi-process load test for SQLiteShoppingListStore
+
+Forks several worker processes that add items to the same users' lists
+concurrently, the way gunicorn workers would, then checks that every
+worker reads back identical lists with exact quantities. Run from the
+backend directory:
+
+    python -m benchmarks.load_shopping_store [workers] [adds_per_worker]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from app.models.shopping_list import ShoppingItem
+from app.services.shopping_list_store import SQLiteShoppingListStore
+
+USERS = ['household-1', 'household-2', 'household-3']
+PRODUCTS = ['milk', 'bread', 'eggs', 'butter', 'apples', 'coffee', 'rice', 'pasta']
+
+
+def add_items(path: str, worker: int, adds: int) -> float:
+    store = SQLiteShoppingListStore(path)
+    start = time.perf_counter()
+    for n in range(adds):
+        user_id = USERS[(worker + n) % len(USERS)]
+        name = PRODUCTS[n % len(PRODUCTS)]
+        store.add_items(user_id, [ShoppingItem(id=str(uuid.uuid4()), name=name, quantity=1)])
+    return time.perf_counter() - start
+
+
+def snapshot(path: str) -> dict:
+    store = SQLiteShoppingListStore(path)
+    lists = {}
+    for user_id in USERS:
+        shopping_list = store.get_list(user_id)
+        lists[user_id] = (shopping_list.revision, [(i.name, i.quantity) for i in shopping_list.items])
+    return lists
+
+
+def main(workers: int = 4, adds: int = 500):
+    path = os.path.join(tempfile.mkdtemp(), 'shopping_lists.db')
+    
+    with multiprocessing.Pool(workers) as pool:
+        elapsed = pool.starmap(add_items, [(path, worker, adds) for worker in range(workers)])
+        views = pool.map(snapshot, [path] * workers)
+    
+    total_adds = workers * adds
+    print(f"{workers} workers, {total_adds} adds: {total_adds / max(elapsed):,.0f} adds/s")
+    
+    assert all(view == views[0] for view in views), "workers disagree on list contents"
+    total_quantity = sum(q for _, items in views[0].values() for _, q in items)
+    assert total_quantity == total_adds, f"expected {total_adds} units, found {total_quantity}"
+    assert sum(revision for revision, _ in views[0].values()) == total_adds
+    print("consistent: every worker read the same lists with exact quantities")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,137 @@
+"""
+Idle /api/shopping/stream subscribers on one gevent worker
+
+Starts gunicorn with a single gevent worker and opens `subscribers`
+concurrent streams spread over `lists` household lists, waiting for each
+stream's initial snapshot. Reports the worker's memory and thread count
+before and after, then adds an item to every list and times how long it
+takes until each subscriber has received its add event. Needs
+requirements-async.txt and a file descriptor limit above twice
+`subscribers`. Run from the backend directory:
+    
+    python -m benchmarks.load_stream_subscribers [subscribers] [lists]
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, subscribers: int) -> subprocess.Popen:
+    data_dir = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS='1',
+        GUNICORN_WORKER_CLASS='gevent',
+        GUNICORN_WORKER_CONNECTIONS=str(subscribers + 100),
+        GUNICORN_LOG_LEVEL='warning',
+        SHOPPING_LIST_DB=os.path.join(data_dir, 'shopping_lists.db'),
+        PURCHASE_HISTORY_DB=os.path.join(data_dir, 'purchase_history.db'),
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', '--access-logfile', '/dev/null', 'wsgi:app'],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('gunicorn did not start')
+
+
+def worker_status(server: subprocess.Popen) -> dict:
+    """VmRSS (kB) and Threads of the single gunicorn worker"""
+    with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+        worker = int(f.read().split()[0])
+    status = {}
+    with open(f'/proc/{worker}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('VmRSS', 'Threads'):
+                status[key] = int(value.split()[0])
+    return status
+
+
+async def read_event(reader: asyncio.StreamReader) -> bytes:
+    """Read the next event, skipping keepalive comments"""
+    while True:
+        # Drop the chunked encoding framing; events never contain \r\n
+        event = (await reader.readuntil(b'\n\n')).split(b'\r\n')[-1]
+        if not event.startswith(b':'):
+            return event
+
+
+async def subscribe(port: int, user_id: str):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET /api/shopping/stream?user_id={user_id} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+    await reader.readuntil(b'\r\n\r\n')
+    event = await read_event(reader)
+    assert b'event: snapshot' in event, event
+    return reader, writer
+
+
+def add_item(port: int, user_id: str):
+    body = json.dumps({'user_id': user_id, 'command': 'add milk', 'since_revision': 0}).encode()
+    request = urllib.request.Request(f'http://127.0.0.1:{port}/api/shopping/add', data=body,
+                                     headers={'Content-Type': 'application/json'})
+    urllib.request.urlopen(request, timeout=30).read()
+
+
+async def run(port: int, server: subprocess.Popen, subscribers: int, lists: int):
+    idle = worker_status(server)
+    start = time.perf_counter()
+    streams = []
+    for batch in range(0, subscribers, 500):
+        streams += await asyncio.gather(*(subscribe(port, f'household-{n % lists}')
+                                          for n in range(batch, min(batch + 500, subscribers))))
+    connected = time.perf_counter() - start
+    await asyncio.sleep(1)
+    held = worker_status(server)
+    print(f"{subscribers} subscribers over {lists} lists connected in {connected:.2f}s")
+    print(f"worker RSS {idle['VmRSS'] / 1024:.1f} MB -> {held['VmRSS'] / 1024:.1f} MB "
+          f"({(held['VmRSS'] - idle['VmRSS']) * 1024 / subscribers / 1024:.1f} kB per subscriber), "
+          f"threads {idle['Threads']} -> {held['Threads']}")
+    
+    loop = asyncio.get_running_loop()
+    received = [loop.create_task(read_event(reader)) for reader, _ in streams]
+    start = time.perf_counter()
+    for n in range(lists):
+        await loop.run_in_executor(None, add_item, port, f'household-{n}')
+    written = time.perf_counter() - start
+    events = await asyncio.gather(*received)
+    delivered = time.perf_counter() - start
+    assert all(b'event: add' in event for event in events)
+    print(f"{lists} adds written in {written * 1e3:.0f}ms, "
+          f"all {subscribers} add events delivered after {delivered * 1e3:.0f}ms")
+    
+    for _, writer in streams:
+        writer.close()
+
+
+def main(subscribers: int = 5000, lists: int = 100):
+    port = free_port()
+    server = start_server(port, subscribers)
+    try:
+        asyncio.run(run(port, server, subscribers, lists))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
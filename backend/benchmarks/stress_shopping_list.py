@@ -0,0 +1,82 @@
+"""
+Threaded stress test for InMemoryShoppingListStore
+
+First 64 threads add to one household's list at once, with a tiny thread
+switch interval so they interleave mid-update, and the test checks the
+quantities and the revision are exact. Then it times threads adding to
+many households' lists behind one global lock and behind per-user lock
+stripes. Run from the backend directory:
+
+    python -m benchmarks.stress_shopping_list [threads] [adds_per_thread]
+"""
+import sys
+import threading
+import time
+
+from app.models.shopping_list import ShoppingItem
+from app.services.shopping_list_store import InMemoryShoppingListStore
+
+PRODUCTS = ['milk', 'bread', 'eggs', 'butter', 'apples', 'coffee', 'rice', 'pasta']
+USERS = 256
+
+
+class GlobalLockStore(InMemoryShoppingListStore):
+    LOCK_STRIPES = 1
+
+
+def hammer(store, threads: int, adds: int, users) -> float:
+    barrier = threading.Barrier(threads + 1)
+    
+    def worker(n: int):
+        barrier.wait()
+        for i in range(adds):
+            user_id = users[(n + i) % len(users)]
+            name = PRODUCTS[i % len(PRODUCTS)]
+            store.add_items(user_id, [ShoppingItem(id=f'{n}-{i}', name=name, quantity=1)])
+            if i % 10 == 0:
+                store.get_snapshot(user_id)
+    
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def check_one_list(threads: int, adds: int):
+    store = InMemoryShoppingListStore()
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        hammer(store, threads, adds, ['household'])
+    finally:
+        sys.setswitchinterval(interval)
+    
+    shopping_list = store.get_list('household')
+    total = threads * adds
+    quantities = {item.name: item.quantity for item in shopping_list.items}
+    expected = {name: sum(1 for i in range(adds) if i % len(PRODUCTS) == n) * threads
+                for n, name in enumerate(PRODUCTS) if n < adds}
+    assert quantities == expected, f"lost updates: expected {expected}, found {quantities}"
+    assert shopping_list.revision == total, f"expected revision {total}, found {shopping_list.revision}"
+    print(f"{threads} threads x {adds} adds to one list: quantities and revision exact")
+
+
+def main(threads: int = 64, adds: int = 500):
+    check_one_list(threads, adds)
+    
+    users = [f'household-{n}' for n in range(USERS)]
+    total = threads * adds
+    print(f"\n{threads} threads, {total:,} adds across {USERS} lists")
+    for label, store in (('global lock', GlobalLockStore()), ('striped', InMemoryShoppingListStore())):
+        elapsed = hammer(store, threads, adds, users)
+        revisions = sum(store.get_revision(user_id) or 0 for user_id in users)
+        assert revisions == total, f"{label}: expected {total} revisions, found {revisions}"
+        print(f"{label:>12}: {total / elapsed:>10,.0f} adds/s")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
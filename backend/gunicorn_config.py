@@ -3,6 +3,7 @@ Gunicorn configuration for production deployment
 """
 import multiprocessing
 import os
+import shutil
 
 # Server socket
 bind = os.getenv('GUNICORN_BIND', "0.0.0.0:8000")
@@ -10,11 +11,32 @@ backlog = 2048
 
 # Worker processes
 workers = int(os.getenv('GUNICORN_WORKERS', max(multiprocessing.cpu_count() - 1, 2)))
-worker_class = "sync"
-worker_connections = 1000
+# "sync" handles one request per worker; "gthread" runs `threads` requests
+# per worker on native threads; "gevent" multiplexes up to
+# worker_connections requests per worker so slow uploads don't block it
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', "sync")
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
 timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
 keepalive = 5
 
+# Load the app once in the master and fork workers from it, so its compiled
+# tables (NLP grammar, product indexes, price catalog) are built once and
+# shared copy-on-write instead of rebuilt by every worker
+preload_app = os.getenv('GUNICORN_PRELOAD_APP', 'false').lower() in ('1', 'true', 'yes')
+if preload_app:
+    os.environ.setdefault('PRELOAD_SERVICES', '1')
+
+# Every worker has its own memory, so share lists and purchase history through SQLite
+os.environ.setdefault('SHOPPING_LIST_STORE', 'sqlite')
+os.environ.setdefault('SHOPPING_LIST_DB', '/tmp/shopping_lists.db')
+os.environ.setdefault('PURCHASE_HISTORY_STORE', 'sqlite')
+os.environ.setdefault('PURCHASE_HISTORY_DB', '/tmp/purchase_history.db')
+# ...and let /metrics on any worker report totals for all of them
+os.environ.setdefault('METRICS_DIR', '/tmp/voice-assistant-metrics')
+# ...and /debug/profile merge the cProfile dumps of sampled requests when PROFILING is on
+os.environ.setdefault('PROFILING_DIR', '/tmp/voice-assistant-profiles')
+
 # Server mechanics
 daemon = False
 pidfile = None
@@ -38,3 +60,18 @@ proc_name = "voice-assistant"
 
 # Application
 wsgi_app = "wsgi:app"
+
+def on_starting(server):
+    """Drop metric and profile files left behind by a previous run.
+    
+    With preload_app this runs after the app was imported in the master,
+    so the metrics registry and profiler recreate their directories
+    whenever they write instead of relying on the ones made at import.
+    """
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+    shutil.rmtree(os.environ['PROFILING_DIR'], ignore_errors=True)
+
+def child_exit(server, worker):
+    """Fold an exited or recycled worker's metrics file into the archive of exited ones"""
+    from app.services import metrics
+    metrics.registry.retire(worker.pid)
@@ -1,5 +1,7 @@
 import os
+from flask import Response
 from app import create_app
+from app.services import metrics
 
 app = create_app()
 
@@ -7,6 +9,10 @@ app = create_app()
 def health_check():
     return {'status': 'ok'}, 200
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV', 'development') == 'development'
@@ -0,0 +1,109 @@
+"""
+Co-purchase counts synced from a shared purchase history agree between
+workers. Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from app.services.co_purchase import CoPurchaseModel
+from app.services.purchase_history import InMemoryPurchaseHistory, SQLitePurchaseHistory
+
+
+class _GuardedRow(dict):
+    """Count row that fails when iterated without the model's write lock"""
+    
+    def __init__(self, lock):
+        super().__init__()
+        self.lock = lock
+    
+    def items(self):
+        assert self.lock.locked(), 'count row iterated outside the write lock'
+        return super().items()
+
+
+class _GuardedRows(dict):
+    
+    def __init__(self, lock):
+        super().__init__()
+        self.lock = lock
+    
+    def setdefault(self, key, default=None):
+        return super().setdefault(key, _GuardedRow(self.lock))
+
+
+class CoPurchaseSyncTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+    
+    def test_models_sharing_a_history_agree(self):
+        history = SQLitePurchaseHistory(os.path.join(self.tmp.name, 'history.db'))
+        first, second = CoPurchaseModel(), CoPurchaseModel()
+        history.record('a', ['pasta', 'basil'])
+        first.sync(history)
+        history.record('b', ['pasta', 'basil', 'cheese'])
+        history.record('c', ['milk'])
+        for model in (first, second):
+            model.sync(history)
+        self.assertEqual(first.baskets, 3)
+        self.assertEqual(first.cursor, second.cursor)
+        self.assertEqual(first.pair_counts, second.pair_counts)
+        self.assertEqual(first.top_k('pasta'), [('basil', 1.5)])
+    
+    def test_snapshot_counts_only_later_baskets(self):
+        history = InMemoryPurchaseHistory()
+        path = os.path.join(self.tmp.name, 'co_purchases.json')
+        model = CoPurchaseModel()
+        history.record('a', ['pasta', 'basil'])
+        model.sync(history)
+        model.save(path)
+        history.record('a', ['pasta', 'basil'])
+        loaded = CoPurchaseModel.load(path)
+        loaded.sync(history)
+        self.assertEqual(loaded.baskets, 2)
+        self.assertEqual(loaded.pair_counts['pasta'], {'basil': 2})
+
+    
+    def test_only_writers_iterate_counts(self):
+        model = CoPurchaseModel()
+        model.pair_counts = _GuardedRows(model._writing)
+        rng = random.Random(1)
+        items = [f'item-{n}' for n in range(50)]
+        for _ in range(500):
+            model.add_basket(rng.sample(items, 4))
+            # Readers may run while another thread writes, so they must not iterate the counts
+            for item in rng.sample(items, 3):
+                for other, _ in model.top_k(item, 5):
+                    model.confidence(item, other)
+                    model.score(item, other)
+                model.recommend([item, 'item-1'])
+        self.assertTrue(model.top_k('item-1'))
+    
+    def test_rebuild_ranks_like_incremental_counts(self):
+        try:
+            import numpy, scipy  # noqa: F401
+        except ImportError:
+            self.skipTest('needs requirements-offline.txt')
+        rng = random.Random(2)
+        items = [f'item-{n}' for n in range(60)]
+        baskets = [rng.sample(items, rng.randint(2, 8)) for _ in range(3_000)]
+        model = CoPurchaseModel()
+        for basket in baskets:
+            model._count(basket)
+        model._rerank(model.item_counts)
+        rebuilt = CoPurchaseModel.rebuild(baskets)
+        for item in items:
+            with self.subTest(item=item):
+                expected, found = model.top_k(item, 50), rebuilt.top_k(item, 50)
+                self.assertEqual([other for other, _ in found], [other for other, _ in expected])
+                for (_, score), (_, expected_score) in zip(found, expected):
+                    self.assertAlmostEqual(score, expected_score)
+
+
+if __name__ == '__main__':
+    unittest.main()
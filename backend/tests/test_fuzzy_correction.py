@@ -0,0 +1,71 @@
+"""
+Misspelling correction keeps correctly spelled words. Run from the
+backend directory:
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from app.models.shopping_list import ShoppingItem, ShoppingList
+from app.services.fuzzy_index import FuzzyIndex
+from app.services.lru_cache import LRUCache
+from app.services.nlp_processor import NLPProcessor
+
+
+class FuzzyCorrectionTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.nlp = NLPProcessor(cache=LRUCache(maxsize=16))
+    
+    def parse(self, command, language=None):
+        return self.nlp.process_command(command, language)
+    
+    def test_known_words_are_not_corrected(self):
+        for word in ['cereal', 'salmon', 'soup', 'peas', 'sprite', 'pear', 'tea']:
+            with self.subTest(word=word):
+                result = self.parse(f'add {word}')
+                self.assertEqual(result['items'], [word])
+                self.assertEqual(result['keys'], [word])
+    
+    def test_known_words_next_to_quantities_are_not_corrected(self):
+        result = self.parse('add 2boxes of cereal')
+        self.assertEqual(result['items'], result['keys'])
+        self.assertTrue(result['keys'][0].endswith('cereal'))
+    
+    def test_known_words_of_other_languages_are_not_corrected(self):
+        result = self.parse('ajoute saumon', 'fr')
+        self.assertEqual(result['items'], ['saumon'])
+        self.assertEqual(result['keys'], ['saumon'])
+    
+    def test_misspelling_is_keyed_by_the_catalog_name(self):
+        result = self.parse('add brocoli')
+        self.assertEqual(result['items'], ['brocoli'])
+        self.assertEqual(result['keys'], ['broccoli'])
+        self.assertEqual(result['category'], 'produce')
+    
+    def test_only_unknown_words_of_a_name_are_corrected(self):
+        result = self.parse('add frozen piza')
+        self.assertEqual(result['items'], ['frozen piza'])
+        self.assertEqual(result['keys'], ['frozen pizza'])
+    
+    def test_tied_candidates_are_not_corrected(self):
+        index = FuzzyIndex()
+        for term in ['pear', 'peas']:
+            index.add(term)
+        self.assertIsNone(index.correct('peat'))
+        self.assertEqual(index.correct('pearr'), 'pear')
+    
+    def test_corrections_more_than_one_edit_away_are_rejected(self):
+        index = FuzzyIndex()
+        index.add('cream')
+        self.assertIsNone(index.correct('cereal'))
+    
+    def test_list_dedupes_on_the_key(self):
+        shopping_list = ShoppingList(id='list', user_id='user')
+        shopping_list.add_item(ShoppingItem(id='1', name='brocoli', key='broccoli'))
+        shopping_list.add_item(ShoppingItem(id='2', name='broccoli'))
+        self.assertEqual([(item.name, item.quantity) for item in shopping_list.items], [('brocoli', 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
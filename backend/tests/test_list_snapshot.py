@@ -0,0 +1,48 @@
+"""
+List snapshots send the same list as a full copy would. Run from the
+backend directory:
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+from app.models.shopping_list import ShoppingItem
+from app.services.shopping_list_store import InMemoryShoppingListStore, SQLiteShoppingListStore
+
+
+class ListSnapshotTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+    
+    def stores(self):
+        yield InMemoryShoppingListStore()
+        yield SQLiteShoppingListStore(os.path.join(self.tmp.name, 'lists.db'))
+    
+    def test_snapshot_matches_list(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                store.add_items('u', [
+                    ShoppingItem(id='1', name='Milk', quantity=2),
+                    ShoppingItem(id='2', name='brocoli', key='broccoli'),
+                    ShoppingItem(id='3', name='milk'),
+                ])
+                store.remove_item('u', '2')
+                snapshot, shopping_list = store.get_snapshot('u'), store.get_list('u')
+                self.assertEqual(snapshot.to_dict(), shopping_list.to_dict())
+                self.assertEqual(snapshot.revision, shopping_list.revision)
+                self.assertEqual(len(snapshot), 1)
+                self.assertEqual((snapshot.keys, snapshot.quantities), (['milk'], [3]))
+    
+    def test_snapshot_creates_the_list(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.assertEqual(store.get_snapshot('new').to_dict()['items'], [])
+                self.assertIsNotNone(store.get_list('new'))
+
+
+if __name__ == '__main__':
+    unittest.main()
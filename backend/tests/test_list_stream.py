@@ -0,0 +1,38 @@
+"""
+List streams are refused by gunicorn workers that would be tied up by them.
+Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.services import change_feed
+
+
+class StreamWorkerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = create_app().test_client()
+    
+    def status(self, server: str) -> int:
+        response = self.client.get('/api/shopping/stream?user_id=stream-test', buffered=False,
+                                   environ_overrides={'SERVER_SOFTWARE': server})
+        response.close()
+        return response.status_code
+    
+    def test_sync_and_gthread_workers_refuse(self):
+        with mock.patch.object(change_feed, 'gevent_patched', return_value=False):
+            self.assertEqual(self.status('gunicorn/21.2.0'), 503)
+    
+    def test_gevent_workers_stream(self):
+        with mock.patch.object(change_feed, 'gevent_patched', return_value=True):
+            self.assertEqual(self.status('gunicorn/21.2.0'), 200)
+    
+    def test_development_server_streams(self):
+        self.assertEqual(self.status('Werkzeug/2.3.6 Python/3.9'), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Metrics of exited workers are archived without counters going backwards.
+Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import glob
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.services.metrics import MetricsRegistry
+
+
+class RetireTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+    
+    def worker(self, pid: int, requests: int) -> MetricsRegistry:
+        """A registry that flushed a worker's count to that worker's file"""
+        registry = MetricsRegistry(self.directory, flush_interval=3600)
+        registry._path = os.path.join(self.directory, f'{pid}-test.json')
+        registry.counter('requests_total', 'Requests', ('endpoint',)).inc('add', amount=requests)
+        registry.flush()
+        return registry
+    
+    def total(self, registry: MetricsRegistry) -> float:
+        return registry.collect()['requests_total'][('add',)][0]
+    
+    def test_retired_counts_are_kept(self):
+        live = self.worker(1, 2)
+        self.worker(2, 3)
+        self.worker(3, 4)
+        self.assertEqual(self.total(live), 9)
+        live.retire(2)
+        live.retire(3)
+        self.assertEqual(self.total(live), 9)
+        files = glob.glob(os.path.join(self.directory, '*.json'))
+        self.assertEqual([os.path.basename(path) for path in files], ['1-test.json'])
+    
+    def test_file_left_by_an_interrupted_retire_is_not_counted_twice(self):
+        live = self.worker(1, 2)
+        self.worker(2, 3)
+        # Archive written, worker file not yet removed
+        with mock.patch('os.remove'):
+            live.retire(2)
+        self.assertEqual(len(glob.glob(os.path.join(self.directory, '*.json'))), 2)
+        self.assertEqual(self.total(live), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Profiling reports and the X-Profile header need PROFILING_TOKEN. Run from
+the backend directory:
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app import create_app
+from app.services import profiling
+
+
+class ProfilingTokenTest(unittest.TestCase):
+    
+    def client(self, token):
+        env = {'PROFILING': 'header', 'PROFILING_DIR': tempfile.mkdtemp(), 'PROFILING_TOKEN': token}
+        with mock.patch.dict(os.environ, env):
+            return create_app().test_client()
+    
+    def test_report_needs_the_token(self):
+        client = self.client('secret')
+        self.assertEqual(client.get('/debug/profile').status_code, 403)
+        self.assertEqual(client.get('/debug/profile', headers={profiling.TOKEN_HEADER: 'guess'}).status_code, 403)
+        self.assertEqual(client.get('/debug/profile', headers={profiling.TOKEN_HEADER: 'secret'}).status_code, 200)
+    
+    def test_header_needs_the_token(self):
+        client = self.client('secret')
+        command = {'user_id': 'profiling-test', 'command': 'add milk'}
+        response = client.post('/api/shopping/add', json=command, headers={profiling.HEADER: '1'})
+        self.assertNotIn('Server-Timing', response.headers)
+        response = client.post('/api/shopping/add', json=command,
+                               headers={profiling.HEADER: '1', profiling.TOKEN_HEADER: 'secret'})
+        self.assertIn('total;dur=', response.headers['Server-Timing'])
+    
+    def test_no_token_refuses_everyone(self):
+        client = self.client('')
+        self.assertEqual(client.get('/debug/profile', headers={profiling.TOKEN_HEADER: ''}).status_code, 403)
+
+
+
+class ProfilingModeTest(unittest.TestCase):
+    
+    def test_boolean_spellings(self):
+        for value, mode in (('', 'off'), ('0', 'off'), ('False', 'off'), ('off', 'off'),
+                            ('1', 'header'), ('true', 'header'), ('On', 'header'), ('always', 'always')):
+            with self.subTest(value=value):
+                self.assertEqual(profiling.profiling_mode(value), mode)
+                profiling.Profiler(profiling.profiling_mode(value))
+    
+    def test_unknown_value_is_rejected(self):
+        with self.assertRaises(ValueError):
+            profiling.profiling_mode('sometimes')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Cached recommendations follow list and purchase revisions shared by workers.
+Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import os
+import tempfile
+import unittest
+
+from app.models.shopping_list import ShoppingItem
+from app.services.purchase_history import SQLitePurchaseHistory
+from app.services.recommendation_engine import RecommendationEngine
+from app.services.shopping_list_store import SQLiteShoppingListStore
+
+
+class RecommendationCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.lists = os.path.join(tmp.name, 'lists.db')
+        self.history = os.path.join(tmp.name, 'history.db')
+    
+    def worker(self) -> RecommendationEngine:
+        """An engine with its own cache over the shared databases, as each worker builds"""
+        return RecommendationEngine(SQLitePurchaseHistory(self.history),
+                                    lists=SQLiteShoppingListStore(self.lists))
+    
+    def misses(self, engine: RecommendationEngine) -> int:
+        engine.get_recommendations('u', ['milk'])
+        return engine.cache_stats()['misses']
+    
+    def test_list_change_by_another_worker(self):
+        first, second = self.worker(), self.worker()
+        self.assertEqual(self.misses(first), 1)
+        self.assertEqual(self.misses(first), 1)
+        second.lists.add_items('u', [ShoppingItem(id='1', name='bread')])
+        self.assertEqual(self.misses(first), 2)
+        self.assertEqual(self.misses(first), 2)
+    
+    def test_purchase_by_another_worker(self):
+        first, second = self.worker(), self.worker()
+        self.assertEqual(self.misses(first), 1)
+        second.record_purchase('u', ['milk', 'cookies'])
+        self.assertEqual(self.misses(first), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Restock intervals learned incrementally match a full replay of the log.
+Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from app.services.purchase_history import InMemoryPurchaseHistory, SQLitePurchaseHistory
+from app.services.restock import DAY, RestockModel
+
+
+class RestockIncrementalTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+    
+    def histories(self):
+        yield InMemoryPurchaseHistory()
+        yield SQLitePurchaseHistory(os.path.join(self.tmp.name, 'history.db'))
+    
+    def assert_matches_replay(self, history, model, user_id):
+        learned = model._user_state(user_id).items
+        expected = model.learn(history.purchases(user_id))
+        self.assertEqual(learned.keys(), expected.keys())
+        for item, (last, interval) in expected.items():
+            self.assertAlmostEqual(learned[item][0], last)
+            self.assertAlmostEqual(learned[item][1] or 0, interval or 0)
+    
+    def test_new_purchases_are_folded_in(self):
+        rng = random.Random(3)
+        for history in self.histories():
+            with self.subTest(history=type(history).__name__):
+                model = RestockModel(history)
+                now = 0.0
+                for _ in range(30):
+                    now += rng.uniform(0.1, 5) * DAY
+                    history.record('u', rng.sample(['milk', 'eggs', 'bread', 'rice'], 2), purchased_at=now)
+                    self.assert_matches_replay(history, model, 'u')
+    
+    def test_only_newer_purchases_are_read(self):
+        history = InMemoryPurchaseHistory()
+        model = RestockModel(history)
+        history.record('u', ['milk'], purchased_at=DAY)
+        model.due('u')
+        history.record('u', ['milk'], purchased_at=3 * DAY)
+        read = []
+        purchases_since = history.purchases_since
+        history.purchases_since = lambda user_id, cursor: read.append(cursor) or purchases_since(user_id, cursor)
+        self.assertEqual(model.due('u', now=10 * DAY), [('milk', 3 * DAY, 2 * DAY)])
+        self.assertEqual(read, [1])
+    
+    def test_backdated_purchase_replays_the_log(self):
+        for history in self.histories():
+            with self.subTest(history=type(history).__name__):
+                model = RestockModel(history)
+                for day in (10, 20):
+                    history.record('u', ['milk'], purchased_at=day * DAY)
+                model.due('u')
+                history.record('u', ['milk'], purchased_at=2 * DAY)
+                self.assert_matches_replay(history, model, 'u')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Base64 audio decodes the same however it is wrapped or sliced.
+Run from the backend directory:
+
+    python -m unittest discover tests
+"""
+import base64
+import unittest
+
+from app.services.voice_processor import StubRecognizer, VoiceProcessor
+
+
+class Base64AudioTest(unittest.TestCase):
+    
+    def setUp(self):
+        # A small chunk size so the input spans many slices
+        self.voice = VoiceProcessor(recognizer=StubRecognizer(), chunk_size=9)
+        self.command = 'add two litres of milk and a dozen eggs to my list please ' * 3
+    
+    def test_plain_input(self):
+        audio = base64.b64encode(self.command.encode()).decode()
+        self.assertEqual(self.voice.process_audio_file(audio), self.command.strip())
+    
+    def test_mime_wrapped_input(self):
+        audio = base64.encodebytes(self.command.encode()).decode()
+        self.assertIn('\n', audio.strip())
+        self.assertEqual(self.voice.process_audio_file(audio), self.command.strip())
+    
+    def test_crlf_wrapped_input(self):
+        audio = base64.b64encode(self.command.encode()).decode()
+        wrapped = '\r\n'.join(audio[start:start + 7] for start in range(0, len(audio), 7))
+        self.assertEqual(self.voice.process_audio_file(wrapped), self.command.strip())
+    
+    def test_truncated_input_is_rejected(self):
+        audio = base64.b64encode(self.command.encode()).decode()
+        self.assertIsNone(self.voice.process_audio_file(audio[:-3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,9 @@
 WSGI entry point for production deployment with Gunicorn
 """
 import os
+from flask import Response
 from app import create_app
+from app.services import metrics
 
 # Create Flask app
 app = create_app()
@@ -14,5 +16,9 @@ os.environ.setdefault('FLASK_ENV', 'production')
 def health_check():
     return {'status': 'ok'}, 200
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run()
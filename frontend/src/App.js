@@ -15,10 +15,40 @@ function App() {
   const [error, setError] = useState('');
   const [userId] = useState('default_user');
   const [activeTab, setActiveTab] = useState('list');
+  // Parse session of the utterance being spoken, and the items it has found so far
+  const parseSessionRef = useRef(null);
+  const speculativeItemsRef = useRef('');
 
   useEffect(() => {
-    fetchShoppingList();
     fetchRecommendations();
+    if (!window.EventSource) {
+      fetchShoppingList();
+      return undefined;
+    }
+
+    // The server sends the whole list once, then every change anyone makes to it
+    const source = new EventSource(`${API_BASE_URL}/shopping/stream?user_id=${encodeURIComponent(userId)}`);
+    const upsertItem = (event) => {
+      const item = JSON.parse(event.data);
+      setShoppingList(items => (items.some(existing => existing.id === item.id)
+        ? items.map(existing => (existing.id === item.id ? item : existing))
+        : [...items, item]));
+    };
+    source.addEventListener('snapshot', (event) => setShoppingList(JSON.parse(event.data).items));
+    source.addEventListener('add', upsertItem);
+    source.addEventListener('update', upsertItem);
+    source.addEventListener('remove', (event) => {
+      const { id } = JSON.parse(event.data);
+      setShoppingList(items => items.filter(item => item.id !== id));
+    });
+    // Servers whose workers can't hold streams answer 503, which closes the source for good;
+    // load the list once instead (dropped connections leave it CONNECTING and it retries)
+    source.addEventListener('error', () => {
+      if (source.readyState === EventSource.CLOSED) {
+        fetchShoppingList();
+      }
+    });
+    return () => source.close();
   }, []);
 
   const fetchShoppingList = async () => {
@@ -37,9 +67,9 @@ function App() {
     }
   };
 
-  const fetchRecommendations = async () => {
+  const fetchRecommendations = async (speculativeItems = []) => {
     try {
-      const items = shoppingList.map(item => item.name);
+      const items = [...shoppingList.map(item => item.name), ...speculativeItems];
       const response = await axios.get(`${API_BASE_URL}/recommendations/personalized`, {
         params: {
           user_id: userId,
@@ -52,12 +82,35 @@ function App() {
     }
   };
 
+  const handleInterimTranscript = async (transcript) => {
+    try {
+      const response = await axios.post(`${API_BASE_URL}/voice/parse-partial`, {
+        session_id: parseSessionRef.current,
+        transcript: transcript
+      });
+      parseSessionRef.current = response.data.session_id;
+
+      // Show recommendations for the items heard so far before the user stops talking
+      const { intent, items } = response.data.processed;
+      if (intent === 'ADD' && items.length && items.join(',') !== speculativeItemsRef.current) {
+        speculativeItemsRef.current = items.join(',');
+        await fetchRecommendations(items);
+      }
+    } catch (err) {
+      console.error('Failed to parse interim transcript:', err);
+    }
+  };
+
   const handleVoiceCommand = async (command) => {
+    const parseSession = parseSessionRef.current;
+    parseSessionRef.current = null;
+    speculativeItemsRef.current = '';
     try {
       setLoading(true);
       const response = await axios.post(`${API_BASE_URL}/shopping/add`, {
         user_id: userId,
-        command: command
+        command: command,
+        parse_session: parseSession
       });
       
       if (response.data.success) {
@@ -139,6 +192,7 @@ function App() {
         <div className="input-section">
           <VoiceInput 
             onCommand={handleVoiceCommand}
+            onInterim={handleInterimTranscript}
             loading={loading}
           />
           <SearchBar 
@@ -2,10 +2,12 @@ import React, { useState, useRef } from 'react';
 import { FaMicrophone, FaStop } from 'react-icons/fa';
 import '../styles/VoiceInput.css';
 
-const VoiceInput = ({ onCommand, loading }) => {
+const VoiceInput = ({ onCommand, onInterim, loading }) => {
   const [isListening, setIsListening] = useState(false);
   const [transcript, setTranscript] = useState('');
   const recognitionRef = useRef(null);
+  // Recognition callbacks are created once, so they read the transcript from a ref
+  const transcriptRef = useRef('');
 
   const initSpeechRecognition = () => {
     const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
@@ -22,6 +24,7 @@ const VoiceInput = ({ onCommand, loading }) => {
     recognition.onstart = () => {
       setIsListening(true);
       setTranscript('');
+      transcriptRef.current = '';
     };
 
     recognition.onresult = (event) => {
@@ -31,13 +34,20 @@ const VoiceInput = ({ onCommand, loading }) => {
         interim += transcriptSegment;
       }
       setTranscript(interim);
+      if (interim.trim() && interim !== transcriptRef.current && onInterim) {
+        // Let the server parse what has been said so far while the user keeps talking
+        onInterim(interim);
+      }
+      transcriptRef.current = interim;
     };
 
     recognition.onend = () => {
       setIsListening(false);
-      if (transcript.trim()) {
-        onCommand(transcript);
+      const finalTranscript = transcriptRef.current;
+      if (finalTranscript.trim()) {
+        onCommand(finalTranscript);
         setTranscript('');
+        transcriptRef.current = '';
       }
     };
 